@@ -0,0 +1,82 @@
+"""Sistema de nómina: fábrica de la aplicación y API pública del paquete.
+
+Cada sección (auth, empleados, asistencia, nómina, api…) es un blueprint en
+su propio módulo; aquí se reexporta lo que usan gunicorn.conf.py, bench/ y
+las pruebas con `from app import ...`.
+
+`flask --app app` y `gunicorn 'app:create_app()'` llaman a create_app().
+Importar el paquete no abre la base ni crea carpetas. pandas, numpy,
+xlsxwriter y lectura (que carga pandas) se importan dentro de las funciones
+que los usan: arrancar la app o atender /login no los carga.
+"""
+import os
+from flask import Flask
+from sqlalchemy import event
+
+from .api import bp_api
+from .asistencia import bp_asistencia
+from .auth import bp_auth
+from .caches import CachePaginas, CacheTTL, datos_modificados, paginas
+from .calculo import generar_nomina, nomina_lote
+from .calendario import asegurar_calendario
+from .cargas import procesar_archivo
+from .comandos import bp_comandos
+from .config import _pragmas_sqlite, configurar
+from .directorio import DirectorioEmpleados, directorio
+from .empleados import bp_empleados
+from .exportacion import ProveedorJSON
+from .extensiones import db, login_manager
+from .metricas import Metricas, instrumentar
+from .migraciones import MIGRACIONES, migrar
+from .modelos import (
+    Attendance, Bonus, Calendario, Deduction, Employee, Job, Payroll, SchemaVersion,
+    huella_movimiento
+)
+from .movimientos import bp_movimientos
+from .nomina import bp_nomina
+from .periodos import cerrar_periodo
+from .principal import bp_principal
+from .resumen import reconstruir_resumen
+from .trabajos import detener_trabajos, marcar_huerfanos
+
+__all__ = [
+    'create_app', 'db', 'migrar', 'MIGRACIONES',
+    'Attendance', 'Bonus', 'Calendario', 'Deduction', 'Employee', 'Job', 'Payroll',
+    'SchemaVersion', 'huella_movimiento',
+    'asegurar_calendario', 'reconstruir_resumen', 'datos_modificados', 'procesar_archivo',
+    'generar_nomina', 'nomina_lote', 'cerrar_periodo',
+    'CachePaginas', 'paginas', 'directorio', 'marcar_huerfanos', 'detener_trabajos',
+]
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def create_app(config=None):
+    """Crea la app: configuración, extensiones, caches, blueprints y comandos.
+
+    Plantillas y static siguen junto al paquete, en la raíz del proyecto.
+    `config` sobrescribe claves de la configuración, p. ej. la base en pruebas.
+    """
+    app = Flask(__name__, root_path=RAIZ)
+    configurar(app, config)
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    db.init_app(app)
+    login_manager.init_app(app)
+    with app.app_context():
+        event.listen(db.engine, 'connect', _pragmas_sqlite(app.config))
+    app.json = ProveedorJSON(app)
+    app.extensions['nomina'] = {
+        'cache_meta': CacheTTL(ttl=app.config['METADATA_CACHE_TTL']),
+        'directorio': DirectorioEmpleados(ttl=app.config['DIRECTORIO_TTL']),
+        'paginas':    CachePaginas(app.config['PAGINAS_MB'], app.config['PAGINAS_DIR'],
+                                   app.config['PAGINAS_DISCO_MB']),
+        'metricas':   Metricas(),
+    }
+
+    for bp in (bp_auth, bp_principal, bp_empleados, bp_movimientos, bp_asistencia,
+               bp_nomina, bp_api, bp_comandos):
+        app.register_blueprint(bp)
+    if app.config['INSTRUMENTACION']:
+        instrumentar(app)
+    return app
@@ -0,0 +1,10 @@
+"""Servidor de desarrollo: python -m app (en producción, gunicorn -c gunicorn.conf.py)."""
+from . import create_app, db, migrar, marcar_huerfanos
+
+
+app = create_app()
+with app.app_context():
+    migrar()
+    marcar_huerfanos()
+    db.session.commit()
+app.run(debug=True)
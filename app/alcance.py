@@ -0,0 +1,76 @@
+"""Usuario admin por defecto y alcance de datos por rol (se resuelve dentro de la base)."""
+from flask import current_app
+from flask_login import UserMixin, current_user
+
+from .directorio import directorio
+from .extensiones import db, login_manager
+from .lotes import LOTE_IN
+from .modelos import Employee
+
+
+class Admin(UserMixin):
+    id = 'admin'
+    usuario       = 'admin'
+    is_admin      = True
+    is_supervisor = False
+
+@login_manager.user_loader
+def load_user(user_id):
+    if user_id == 'admin':
+        return Admin()
+    return directorio.get(user_id)
+
+
+# —————————————————————————————————————————————————————————
+# Alcance de datos por rol (se resuelve dentro de la base)
+# —————————————————————————————————————————————————————————
+def alcance_actual():
+    """(rol, usuario) de current_user; es serializable y se puede pasar a un job."""
+    if current_user.is_admin:
+        return ('admin', None)
+    return ('supervisor' if current_user.is_supervisor else 'agente', current_user.usuario)
+
+
+def agentes_visibles(supervisor, recursivo=None):
+    """SELECT de los usuarios a cargo de `supervisor` (sin él mismo).
+
+    Con ALCANCE_RECURSIVO incluye también a los agentes de los supervisores
+    a su cargo, en cualquier nivel, con una CTE recursiva sobre supervisor_id.
+    """
+    if recursivo is None:
+        recursivo = current_app.config['ALCANCE_RECURSIVO']
+    directos = db.select(Employee.usuario).where(Employee.supervisor_id==supervisor)
+    if not recursivo:
+        return directos
+    arbol = directos.cte('arbol_agentes', recursive=True)
+    hijo  = db.aliased(Employee)
+    # UNION (no UNION ALL) corta los ciclos en supervisor_id
+    arbol = arbol.union(db.select(hijo.usuario).where(hijo.supervisor_id==arbol.c.usuario))
+    return db.select(arbol.c.usuario)
+
+
+def _condicion_rol(col, alcance=None):
+    """Condición sobre la columna de usuario según lo que puede ver el usuario.
+
+    `alcance` es un (rol, usuario) de alcance_actual(); por defecto el de
+    current_user. Para supervisores es un IN (subconsulta), no una lista.
+    """
+    rol, usuario = alcance or alcance_actual()
+    if rol == 'admin':
+        return db.true()
+    if rol == 'supervisor':
+        return col.in_(agentes_visibles(usuario))
+    return col==usuario
+
+
+def usuarios_en_alcance(usuarios, alcance):
+    """Los de `usuarios` que el alcance permite ver, consultando en lotes de LOTE_IN."""
+    usuarios = sorted(set(usuarios))
+    if alcance[0] == 'admin':
+        return set(usuarios)
+    permitidos = set()
+    for i in range(0, len(usuarios), LOTE_IN):
+        permitidos.update(u for (u,) in db.session.query(Employee.usuario).filter(
+            Employee.usuario.in_(usuarios[i:i+LOTE_IN]),
+            _condicion_rol(Employee.usuario, alcance)))
+    return permitidos
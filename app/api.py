@@ -0,0 +1,145 @@
+"""API JSON de sólo lectura (/api/v1) con ETag por versión de tabla."""
+import hashlib
+from datetime import timezone
+from flask import Blueprint, request, Response, jsonify, make_response
+from flask_login import login_required
+from functools import wraps
+
+from .alcance import _condicion_rol, alcance_actual
+from .caches import versiones
+from .calculo import totales_nomina
+from .calendario import agregados_asistencia, validar_rango
+from .exportacion import LOTE_EXPORT, respuesta_ndjson
+from .extensiones import db
+from .modelos import Attendance, Employee, Payroll, PayrollRun
+from .paginacion import _fechas_api, columnas_internas
+from .periodos import ARCHIVABLES, consultar_historico
+from .resumen import _filtrar_asistencia
+
+
+bp_api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+def con_version(*tablas):
+    """ETag/Last-Modified a partir de table_version; 304 sin ejecutar la vista.
+
+    El ETag cubre la ruta con sus parámetros, el alcance del usuario y la
+    versión de cada tabla, así que cambia en cuanto se escribe en alguna.
+    """
+    def deco(vista):
+        @wraps(vista)
+        def envuelta(*args, **kwargs):
+            version, modificado = versiones(tablas)
+            modificado = modificado.replace(microsecond=0, tzinfo=timezone.utc)
+            params = sorted(request.args.items(multi=True))
+            etag   = hashlib.sha1(repr((request.path, params, alcance_actual(), version))
+                                  .encode('utf-8')).hexdigest()
+            if request.if_none_match:
+                vigente = request.if_none_match.contains(etag)
+            else:
+                vigente = bool(request.if_modified_since) and modificado <= request.if_modified_since
+            resp = Response(status=304) if vigente else make_response(vista(*args, **kwargs))
+            resp.set_etag(etag)
+            resp.last_modified = modificado
+            resp.cache_control.private  = True
+            resp.cache_control.no_cache = True          # siempre revalidar con el ETag
+            return resp
+        return envuelta
+    return deco
+
+
+@bp_api.route('/payroll/periods')
+@login_required
+@con_version('payroll', 'payroll_run', 'employee')
+def api_payroll_periods():
+    q = db.session.query(
+            Payroll.inicio, Payroll.fin, db.func.count(Payroll.id),
+            db.func.coalesce(db.func.sum(Payroll.neto), 0), PayrollRun.ejecutado
+        ).outerjoin(PayrollRun, (PayrollRun.inicio==Payroll.inicio) & (PayrollRun.fin==Payroll.fin))\
+         .filter(_condicion_rol(Payroll.usuario))\
+         .group_by(Payroll.inicio, Payroll.fin, PayrollRun.ejecutado)\
+         .order_by(Payroll.inicio.desc(), Payroll.fin.desc())
+    return jsonify(periodos=[
+        {'inicio': i.isoformat(), 'fin': f.isoformat(), 'empleados': n, 'total_neto': neto,
+         'ejecutado': e and e.isoformat()}
+        for i, f, n, neto, e in q
+    ])
+
+
+@bp_api.route('/payroll/totals')
+@login_required
+@con_version('payroll', 'employee')
+def api_payroll_totals():
+    try:
+        inicio, fin = _fechas_api('inicio', 'fin')
+    except ValueError as ex:
+        return jsonify(error=str(ex)), 400
+    return jsonify(inicio=inicio.isoformat(), fin=fin.isoformat(),
+                   **totales_nomina(inicio, fin, _condicion_rol(Payroll.usuario)))
+
+
+@bp_api.route('/payroll')
+@login_required
+@con_version('payroll', 'employee')
+def api_payroll():
+    try:
+        inicio, fin = _fechas_api('inicio', 'fin')
+    except ValueError as ex:
+        return jsonify(error=str(ex)), 400
+    q = db.session.query(
+            Payroll.usuario, Employee.nombre, Payroll.inicio, Payroll.fin, Payroll.sueldo_base,
+            Payroll.total_bonos, Payroll.total_deducciones, Payroll.neto
+        ).outerjoin(Employee, Employee.usuario==Payroll.usuario)\
+         .filter(Payroll.inicio==inicio, Payroll.fin==fin, _condicion_rol(Payroll.usuario))\
+         .order_by(Payroll.usuario)\
+         .execution_options(yield_per=LOTE_EXPORT)
+    return respuesta_ndjson(r._asdict() for r in q)
+
+
+@bp_api.route('/attendance/weekly')
+@login_required
+@con_version('attendance', 'calendar_dim', 'employee')
+def api_attendance_weekly():
+    """Días trabajados, MG, faltas, descansos y festivos por usuario y semana ISO."""
+    try:
+        inicio, fin = _fechas_api('inicio', 'fin')
+        validar_rango(inicio, fin)
+    except ValueError as ex:
+        return jsonify(error=str(ex)), 400
+    df = agregados_asistencia(inicio, fin,
+                              db.select(Employee.usuario).where(_condicion_rol(Employee.usuario)))
+    return respuesta_ndjson(df.sort_values(['usuario', 'semana']).to_dict('records'))
+
+
+@bp_api.route('/attendance')
+@login_required
+@con_version('attendance', 'employee')
+def api_attendance():
+    """Asistencia por rango (start_date/end_date) con los filtros de filter_attendance."""
+    try:
+        _fechas_api('start_date', 'end_date', requeridas=False)
+    except ValueError as ex:
+        return jsonify(error=str(ex)), 400
+    q = _filtrar_asistencia(db.session.query(
+            Attendance.usuario, Attendance.fecha, Attendance.estado,
+            Attendance.supervisor, Attendance.cartera))\
+          .order_by(Attendance.fecha, Attendance.usuario)\
+          .execution_options(yield_per=LOTE_EXPORT)
+    return respuesta_ndjson(r._asdict() for r in q)
+
+
+@bp_api.route('/history/<tabla>')
+@login_required
+@con_version('payroll', 'attendance', 'bonus', 'deduction', 'payroll_close', 'employee')
+def api_history(tabla):
+    """Filas vivas + archivadas de payroll/attendance/bonus/deduction en [desde, hasta]."""
+    if tabla not in ARCHIVABLES:
+        return jsonify(error=f"Tabla «{tabla}» no disponible"), 404
+    try:
+        desde, hasta = _fechas_api('desde', 'hasta')
+    except ValueError as ex:
+        return jsonify(error=str(ex)), 400
+    df = consultar_historico(tabla, desde, hasta, alcance_actual())
+    df = df.drop(columns=columnas_internas(ARCHIVABLES[tabla]) & set(df.columns))
+    df = df.astype(object).where(df.notna(), None)
+    return respuesta_ndjson(df.to_dict('records'))
@@ -0,0 +1,148 @@
+"""Listado, filtro (con resumen matricial), edición y exportación de Asistencia."""
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask_login import login_required
+
+from .alcance import _condicion_rol
+from .caches import (
+    cache_pagina, datos_modificados, lista_carteras, lista_supervisores, lista_usuarios
+)
+from .calculo import registrar_cambios
+from .calendario import dias_calendario, validar_rango
+from .exportacion import LOTE_EXPORT, respuesta_export
+from .extensiones import db
+from .modelos import Attendance, ESTADOS
+from .paginacion import _fechas_api, json_pagina, paginar, quiere_json
+from .periodos import periodos_cerrados
+from .resumen import (
+    MatrizAsistencia, _filtrar_asistencia, refrescar_resumen, resumen_asistencia
+)
+
+
+bp_asistencia = Blueprint('asistencia', __name__)
+
+
+@bp_asistencia.route('/attendance')
+@login_required
+def list_attendance():
+    q = Attendance.query.filter(_condicion_rol(Attendance.usuario))
+    records, siguiente = paginar(q, Attendance)
+    if quiere_json():
+        return json_pagina(records, siguiente)
+    return render_template('attendance.html', records=records, siguiente=siguiente)
+
+
+@bp_asistencia.route('/attendance/filter', methods=['GET'])
+@login_required
+@cache_pagina('attendance', 'employee', 'calendar_dim')
+def filter_attendance():
+    usuarios    = lista_usuarios()
+    supervisors = lista_supervisores()
+    carteras    = lista_carteras()
+
+    u_sel = request.args.get('usuario','')
+    s_sel = request.args.get('supervisor','')
+    c_sel = request.args.get('cartera','')
+    d1    = request.args.get('start_date','')
+    d2    = request.args.get('end_date','')
+
+    try:
+        start, end = _fechas_api('start_date', 'end_date', requeridas=False)
+        validar_rango(start, end)
+    except ValueError as ex:
+        if quiere_json():
+            return jsonify(error=str(ex)), 400
+        flash(str(ex), 'warning')
+        return redirect(url_for('asistencia.filter_attendance'))
+
+    q = _filtrar_asistencia(Attendance.query)
+
+    registros, siguiente = paginar(q, Attendance)
+    if quiere_json():
+        return json_pagina(registros, siguiente)
+
+    if start and end:
+        dias      = dias_calendario(start, end)
+        date_list = [d.fecha for d in dias]
+        celdas    = _filtrar_asistencia(db.session.query(
+                        Attendance.usuario, Attendance.fecha, Attendance.estado)).all()
+    else:
+        dias, date_list, celdas = [], [], []
+
+    # La matriz y el resumen cubren todo el filtro, no sólo la página
+    matrix  = MatrizAsistencia.construir(celdas, date_list)
+    summary = resumen_asistencia(start, end)
+
+    observations = []
+
+    return render_template('attendance_filter.html',
+        registros     = registros,
+        siguiente     = siguiente,
+        usuarios      = usuarios,
+        supervisors   = supervisors,
+        carteras      = carteras,
+        usuario_sel   = u_sel,
+        supervisor_sel= s_sel,
+        cartera_sel   = c_sel,
+        start_date    = d1,
+        end_date      = d2,
+        date_list     = date_list,
+        calendario    = dias,
+        matrix        = matrix,
+        summary       = summary,
+        observations  = observations
+    )
+
+
+@bp_asistencia.route('/attendance/export', methods=['GET'])
+@login_required
+def export_attendance():
+    q = _filtrar_asistencia(db.session.query(
+            Attendance.usuario, Attendance.fecha, Attendance.estado,
+            Attendance.supervisor, Attendance.cartera
+        )).order_by(Attendance.fecha, Attendance.usuario)\
+          .execution_options(yield_per=LOTE_EXPORT)
+    d1 = request.args.get('start_date','') or 'inicio'
+    d2 = request.args.get('end_date','')   or 'hoy'
+    return respuesta_export(['Usuario','Fecha','Estado','SUP','CARTERA'], q,
+                            f"asistencia_{d1}_a_{d2}", 'Asistencia')
+
+
+@bp_asistencia.route('/attendance/<int:id>/edit', methods=['GET','POST'])
+@login_required
+def edit_attendance(id):
+    r = Attendance.query.get_or_404(id)
+    if request.method=='POST' and periodos_cerrados(r.fecha, r.fecha):
+        flash("El periodo de este registro está cerrado.", "danger")
+        return redirect(request.referrer or url_for('asistencia.filter_attendance'))
+    if request.method=='POST':
+        nuevo = request.form['estado'].strip().upper()
+        if nuevo not in ESTADOS:
+            flash("Estado inválido", "warning")
+        else:
+            r.estado = nuevo
+            r.supervisor = request.form['supervisor'].strip()
+            r.cartera = request.form['cartera'].strip()
+            refrescar_resumen({(r.usuario, r.fecha)})
+            registrar_cambios([(r.usuario, r.fecha, r.fecha)])
+            db.session.commit()
+            datos_modificados('attendance')
+            flash('Asistencia actualizada.', 'success')
+        return redirect(request.referrer or url_for('asistencia.filter_attendance'))
+    return render_template('attendance_edit.html', r=r)
+
+
+@bp_asistencia.route('/attendance/<int:id>/delete', methods=['POST'])
+@login_required
+def delete_attendance(id):
+    r = Attendance.query.get_or_404(id)
+    if periodos_cerrados(r.fecha, r.fecha):
+        flash("El periodo de este registro está cerrado.", "danger")
+        return redirect(request.referrer or url_for('asistencia.filter_attendance'))
+    db.session.delete(r)
+    db.session.flush()
+    refrescar_resumen({(r.usuario, r.fecha)})
+    registrar_cambios([(r.usuario, r.fecha, r.fecha)])
+    db.session.commit()
+    datos_modificados('attendance')
+    flash('Registro eliminado.', 'warning')
+    return redirect(request.referrer or url_for('asistencia.filter_attendance'))
@@ -0,0 +1,32 @@
+"""Rutas de autenticación."""
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask_login import login_user, login_required, logout_user
+
+from .alcance import Admin
+from .modelos import Employee
+
+
+bp_auth = Blueprint('auth', __name__)
+
+
+@bp_auth.route('/login', methods=['GET','POST'])
+def login():
+    if request.method=='POST':
+        usr = request.form['username'].strip()
+        pwd = request.form['password']
+        if usr == 'admin' and pwd == 'admin123':
+            login_user(Admin())
+            return redirect(url_for('principal.dashboard'))
+        emp = Employee.query.get(usr)
+        if emp and emp.check_password(pwd):
+            login_user(emp)
+            return redirect(url_for('principal.dashboard'))
+        flash("Usuario o contraseña inválidos", "danger")
+    return render_template('login.html')
+
+
+@bp_auth.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('auth.login'))
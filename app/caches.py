@@ -0,0 +1,277 @@
+"""Caches: metadatos de los filtros, versiones por tabla y páginas renderizadas."""
+import os
+import tempfile
+import hashlib
+import threading
+import time
+from datetime import datetime
+from flask import current_app, request, Response, make_response, session
+from flask_login import current_user
+from collections import defaultdict, OrderedDict
+from functools import wraps
+
+from .directorio import directorio
+from .extensiones import _de_la_app, db
+from .lotes import _insert_dialecto
+from .modelos import Attendance, TableVersion
+
+
+class CacheTTL:
+    """Cache LRU con expiración por entrada, segura entre hilos.
+
+    Las claves son tuplas cuyo primer elemento es la tabla de origen, para
+    poder invalidar por tabla cuando cambian los datos.
+    """
+
+    def __init__(self, maxsize=128, ttl=300):
+        self.maxsize = maxsize
+        self.ttl     = ttl
+        self.hits    = 0
+        self.misses  = 0
+        self._datos  = OrderedDict()        # clave -> (expira, valor)
+        self._gen    = defaultdict(int)     # tabla -> generación
+        self._lock   = threading.Lock()
+
+    def obtener(self, clave, calcular):
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada and entrada[0] > ahora:
+                self._datos.move_to_end(clave)
+                self.hits += 1
+                return entrada[1]
+            self.misses += 1
+            gen = self._gen[clave[0]]
+        valor = calcular()
+        with self._lock:
+            # Si se invalidó mientras se calculaba, no se guarda el valor viejo
+            if self._gen[clave[0]] == gen:
+                self._datos[clave] = (ahora + self.ttl, valor)
+                self._datos.move_to_end(clave)
+                while len(self._datos) > self.maxsize:
+                    self._datos.popitem(last=False)
+        return valor
+
+    def invalidar(self, *tablas):
+        with self._lock:
+            for tabla in tablas:
+                self._gen[tabla] += 1
+            for clave in [c for c in self._datos if c[0] in tablas]:
+                del self._datos[clave]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'hit_ratio': self.hits/total if total else None,
+                    'entradas': len(self._datos), 'maxsize': self.maxsize,
+                    'ttl': self.ttl}
+
+
+cache_meta = _de_la_app('cache_meta')
+
+
+def datos_modificados(*tablas):
+    """Avisa que cambiaron filas de esas tablas (tras el commit)."""
+    cache_meta.invalidar(*tablas)
+    paginas.invalidar(*tablas)
+    if 'employee' in tablas:
+        directorio.invalidar()
+    subir_versiones(tablas)
+    db.session.commit()
+
+
+def subir_versiones(tablas):
+    """version += 1 y modificado = ahora en table_version; no hace commit."""
+    insert = _insert_dialecto()
+    stmt = insert(TableVersion.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['tabla'],
+        set_={'version': TableVersion.__table__.c.version + 1, 'modificado': stmt.excluded.modificado}
+    )
+    ahora = datetime.utcnow()
+    db.session.execute(stmt, [{'tabla': t, 'version': 1, 'modificado': ahora} for t in tablas])
+
+
+def versiones(tablas):
+    """(versiones, última modificación) de esas tablas, en una consulta por PK."""
+    filas = {t: (v, m) for t, v, m in db.session.query(
+                TableVersion.tabla, TableVersion.version, TableVersion.modificado
+             ).filter(TableVersion.tabla.in_(tablas))}
+    version = tuple(filas.get(t, (0, None))[0] for t in tablas)
+    modificado = max((m for _, m in filas.values()), default=None) or datetime(2000, 1, 1)
+    return version, modificado
+
+
+def lista_usuarios():
+    return directorio.usuarios()
+
+
+def lista_supervisores():
+    return cache_meta.obtener(('attendance', 'supervisores'), lambda: [
+        s for (s,) in db.session.query(Attendance.supervisor).distinct().order_by(Attendance.supervisor) if s])
+
+
+def lista_carteras():
+    return cache_meta.obtener(('attendance', 'carteras'), lambda: [
+        c for (c,) in db.session.query(Attendance.cartera).distinct().order_by(Attendance.cartera) if c])
+
+
+# —————————————————————————————————————————————————————————
+# Cache de páginas renderizadas (listado de nómina, matriz de asistencia)
+# —————————————————————————————————————————————————————————
+class CachePaginas:
+    """Respuestas ya renderizadas, con LRU acotado por bytes y disco opcional.
+
+    La clave lleva la versión de las tablas en table_version, así que una
+    escritura en cualquier worker deja de acertar en todos sin avisarles;
+    invalidar() sólo libera la memoria local. Con `directorio` los workers
+    comparten las páginas: un archivo por clave, expulsado por antigüedad
+    de uso (mtime) cuando el directorio pasa de `disco_mb`.
+    """
+
+    def __init__(self, max_mb=64, directorio=None, disco_mb=512):
+        self.max_bytes   = max_mb << 20
+        self.directorio  = directorio
+        self.disco_bytes = disco_mb << 20
+        self.hits = self.hits_disco = self.misses = 0
+        self._datos  = OrderedDict()        # clave -> (tablas, mimetype, cuerpo)
+        self._bytes  = 0
+        self._escritas = 0
+        self._lock   = threading.Lock()
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    def obtener(self, clave):
+        """(mimetype, cuerpo) o None."""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada:
+                self._datos.move_to_end(clave)
+                self.hits += 1
+                return entrada[1:]
+        if self.directorio:
+            ruta = self._ruta(clave)
+            try:
+                with open(ruta, 'rb') as f:
+                    mimetype, cuerpo = f.read().split(b'\n', 1)
+                os.utime(ruta)
+            except (OSError, ValueError):
+                pass
+            else:
+                with self._lock:
+                    self.hits_disco += 1
+                return mimetype.decode('ascii'), cuerpo
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def guardar(self, clave, tablas, mimetype, cuerpo):
+        if not self.max_bytes or len(cuerpo) > self.max_bytes // 4:
+            return                          # cache apagado, o una página enorme lo vaciaría
+        with self._lock:
+            previa = self._datos.pop(clave, None)
+            if previa:
+                self._bytes -= len(previa[2])
+            self._datos[clave] = (tablas, mimetype, cuerpo)
+            self._bytes += len(cuerpo)
+            while self._bytes > self.max_bytes:
+                _, (_, _, viejo) = self._datos.popitem(last=False)
+                self._bytes -= len(viejo)
+            self._escritas += 1
+            podar = self._escritas % 32 == 0
+        if self.directorio:
+            self._escribir(self._ruta(clave), mimetype.encode('ascii') + b'\n' + cuerpo)
+            if podar:
+                self._podar_disco()
+
+    def invalidar(self, *tablas):
+        with self._lock:
+            for clave in [c for c, e in self._datos.items() if set(e[0]) & set(tablas)]:
+                self._bytes -= len(self._datos.pop(clave)[2])
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, hashlib.sha1(repr(clave).encode('utf-8')).hexdigest())
+
+    def _escribir(self, ruta, datos):
+        # Temporal único por escritura: dos hilos (o workers) que fallan la
+        # misma clave a la vez no se pisan; el último os.replace gana
+        fd, tmp = tempfile.mkstemp(dir=self.directorio, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(datos)
+            os.replace(tmp, ruta)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _podar_disco(self):
+        archivos = []
+        for e in os.scandir(self.directorio):
+            if e.name.startswith('.tmp-'):
+                continue                    # escritura en curso
+            try:
+                st = e.stat()
+            except OSError:
+                continue                    # otro worker lo borró
+            archivos.append((st.st_mtime, st.st_size, e.path))
+        total = sum(a[1] for a in archivos)
+        for _, tam, ruta in sorted(archivos):
+            if total <= self.disco_bytes:
+                break
+            try:
+                os.unlink(ruta)
+            except OSError:
+                pass
+            total -= tam
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.hits_disco + self.misses
+            return {'hits': self.hits, 'hits_disco': self.hits_disco, 'misses': self.misses,
+                    'hit_ratio': (self.hits + self.hits_disco)/total if total else None,
+                    'entradas': len(self._datos), 'bytes': self._bytes,
+                    'max_bytes': self.max_bytes, 'directorio': self.directorio}
+
+
+paginas = _de_la_app('paginas')
+
+
+def cache_pagina(*tablas):
+    """Sirve la vista desde `paginas` mientras no cambien `tablas`.
+
+    Clave: (vista, parámetros sin vacíos y ordenados, usuario, versiones). El
+    usuario y no su alcance: la página lleva su identidad, y el admin y los
+    empleados con is_admin comparten alcance. Sólo se guardan respuestas 200
+    que no sean streaming, y no se usa el cache si hay mensajes flash
+    pendientes (irían dentro de la página).
+    """
+    def deco(vista):
+        @wraps(vista)
+        def envuelta(*args, **kwargs):
+            if session.get('_flashes'):
+                return vista(*args, **kwargs)
+            params = tuple(sorted((k, v.strip()) for k, v in request.args.items(multi=True)
+                                  if v.strip()))
+            clave  = (request.endpoint, tuple(sorted(kwargs.items())), params,
+                      current_user.get_id(), versiones(tablas)[0])
+            guardada = paginas.obtener(clave)
+            if guardada:
+                resp = Response(guardada[1], mimetype=guardada[0])
+                resp.headers['X-Cache'] = 'hit'
+                return resp
+            resp = make_response(vista(*args, **kwargs))
+            if resp.status_code == 200 and not resp.is_streamed and not session.get('_flashes'):
+                try:
+                    paginas.guardar(clave, tablas, resp.mimetype, resp.get_data())
+                except Exception:
+                    # La página ya está lista: un cache que no se pudo escribir no es un 500
+                    current_app.logger.exception("No se pudo guardar %s en el cache de páginas",
+                                                 request.endpoint)
+                resp.headers['X-Cache'] = 'miss'
+            return resp
+        return envuelta
+    return deco
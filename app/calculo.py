@@ -0,0 +1,361 @@
+"""Motor de cálculo de nómina: por periodo, por lotes y conciliación."""
+import multiprocessing
+import time
+from datetime import datetime
+from flask import current_app, has_app_context
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .caches import datos_modificados
+from .calendario import agregados_asistencia, asegurar_calendario
+from .extensiones import db
+from .importes import centavos, de_centavos, tabla_centavos
+from .lotes import LOTE_IN, _upsert, escribir_por_lotes
+from .modelos import (
+    Attendance, Bonus, Calendario, Deduction, Employee, Payroll, PayrollChange,
+    PayrollRun
+)
+from .periodos import periodos_cerrados
+
+
+def calcular_nomina(inicio, fin, usuarios=None):
+    """Calcula las filas de nómina para [inicio, fin].
+
+    Usa tres consultas agrupadas (días por semana del calendario, bonos y
+    deducciones) con sumas enteras en SQL y combina todo en arreglos int64.
+    Los importes de las filas están en centavos; el sueldo base es
+    salario × medios días / 2, con la mitad de centavo redondeada hacia
+    arriba. `usuarios` limita el cálculo a esos empleados: lista o SELECT
+    de usuarios (None = todos).
+    """
+    import numpy as np
+    import pandas as pd
+    if isinstance(usuarios, list) and len(usuarios) > LOTE_IN:
+        todos = set(usuarios)
+        return [f for f in calcular_nomina(inicio, fin) if f['usuario'] in todos]
+
+    def de(q, col):
+        return q if usuarios is None else q.filter(col.in_(usuarios))
+
+    dias = agregados_asistencia(inicio, fin, usuarios).groupby('usuario')[['trabajados', 'medios']].sum()
+    asistencia = 2*dias['trabajados'] + dias['medios']          # medios días pagados
+    bonos = dict(de(
+        db.session.query(Bonus.usuario, centavos(db.func.sum(Bonus.monto)))
+        .filter(Bonus.fecha.between(inicio,fin)), Bonus.usuario)
+        .group_by(Bonus.usuario)
+    )
+    deducciones = dict(de(
+        db.session.query(Deduction.usuario, centavos(db.func.sum(Deduction.monto)))
+        .filter(Deduction.fecha.between(inicio,fin)), Deduction.usuario)
+        .group_by(Deduction.usuario)
+    )
+
+    empleados = de(db.session.query(Employee.usuario, centavos(Employee.salario_diario)),
+                   Employee.usuario).all()
+    usrs    = pd.Index([u for u, _ in empleados])
+    salario = np.array([int(s or 0) for _, s in empleados], dtype=np.int64)
+
+    def alineado(por_usuario):
+        return pd.Series(por_usuario, dtype='float64').reindex(usrs, fill_value=0)\
+                 .to_numpy().astype(np.int64)
+
+    sb = (salario * alineado(asistencia) + 1) // 2
+    tb = alineado(bonos)
+    td = alineado(deducciones)
+    return [{
+            'usuario':           usr,
+            'inicio':            inicio,
+            'fin':               fin,
+            'sueldo_base':       b,
+            'total_bonos':       t,
+            'total_deducciones': d,
+            'neto':              n
+        } for usr, b, t, d, n in zip(usrs, sb.tolist(), tb.tolist(), td.tolist(),
+                                     (sb + tb - td).tolist())]
+
+
+def registrar_cambios(cambios):
+    """Marca entradas de nómina modificadas: (usuario, desde, hasta).
+
+    desde/hasta nulos significan "todos los periodos" (alta, baja o cambio de
+    salario). No hace commit: va en la misma transacción que el cambio.
+    """
+    filas = [{'usuario': u, 'desde': d, 'hasta': h} for u, d, h in cambios]
+    if filas:
+        db.session.execute(db.insert(PayrollChange), filas)
+
+
+def _usuarios_sucios(inicio, fin, desde_id, hasta_id):
+    C = PayrollChange
+    return [u for (u,) in db.session.query(C.usuario).distinct().filter(
+        C.id > desde_id, C.id <= hasta_id,
+        db.or_(C.desde.is_(None), db.and_(C.desde <= fin, C.hasta >= inicio))
+    )]
+
+
+def _upsert_nomina(filas):
+    _upsert(tabla_centavos(Payroll), filas, ['usuario','inicio','fin'],
+            ['sueldo_base','total_bonos','total_deducciones','neto'])
+
+
+def generar_nomina(inicio, fin, incremental=False, avance=None):
+    """Calcula la nómina del periodo.
+
+    Completa: recalcula a todos y reemplaza sus filas.
+    Incremental: recalcula sólo los empleados con cambios desde la última
+    corrida del periodo; informa qué cambió.
+    En ambos casos se escribe con upsert en transacciones de LOTE_ESCRITURA.
+    Sin corrida previa, la incremental se hace completa.
+    """
+    # Cualquier solapamiento, no sólo el mismo periodo: un cierre podado ya no
+    # tiene su asistencia en las tablas vivas y el cálculo saldría incompleto
+    cerrados = periodos_cerrados(inicio, fin)
+    if cerrados:
+        i, f, _ = cerrados[0]
+        raise ValueError(f"El periodo del {inicio} al {fin} se solapa con el cerrado "
+                         f"del {i} al {f}")
+    asegurar_calendario(inicio, fin)
+    corte = db.session.query(db.func.max(PayrollChange.id)).scalar() or 0
+    run   = db.session.get(PayrollRun, (inicio, fin))
+
+    if incremental and run:
+        sucios = _usuarios_sucios(inicio, fin, run.ultimo_cambio, corte)
+        filas  = calcular_nomina(inicio, fin, sucios)
+        if avance:
+            avance(0, len(filas))
+        antes = {}
+        for i in range(0, len(sucios), LOTE_IN):
+            antes.update(db.session.query(Payroll.usuario, centavos(Payroll.neto)).filter(
+                Payroll.inicio==inicio, Payroll.fin==fin,
+                Payroll.usuario.in_(sucios[i:i+LOTE_IN])))
+        escribir_por_lotes(filas, _upsert_nomina, avance)
+        # Empleados dados de baja: su fila del periodo sobra (al borrar un
+        # empleado la relación deja sus filas con usuario nulo)
+        bajas = sorted(set(antes) - {f['usuario'] for f in filas})
+        Payroll.query.filter(Payroll.inicio==inicio, Payroll.fin==fin).filter(
+            db.or_(Payroll.usuario.in_(bajas), Payroll.usuario.is_(None))
+        ).delete(synchronize_session=False)
+        cambios = [(f['usuario'], antes.get(f['usuario']), f['neto']) for f in filas
+                   if antes.get(f['usuario']) != f['neto']]
+        cambios += [(u, antes[u], None) for u in bajas]
+        mensajes = [(f"Nómina incremental del {inicio} al {fin}: {len(sucios)} empleados "
+                     f"recalculados, {len(cambios)} con cambios.", 'success')]
+        mensajes += [(f"{u}: neto {de_centavos(a) if a is not None else '—'} → "
+                      f"{de_centavos(d) if d is not None else 'baja'}", 'info')
+                     for u, a, d in cambios[:100]]
+        if len(cambios) > 100:
+            mensajes.append((f"… y {len(cambios)-100} cambios más.", 'info'))
+    else:
+        # Upsert por lotes y al final se quitan las filas sin empleado: en
+        # ningún momento el periodo queda vacío o a medias para quien lo lee
+        filas = calcular_nomina(inicio, fin)
+        if avance:
+            avance(0, len(filas))
+        escribir_por_lotes(filas, _upsert_nomina, avance)
+        _quitar_sin_empleado(inicio, fin)
+        mensajes = [(f"Nómina del {inicio} al {fin}: {len(filas)} empleados.", 'success')]
+
+    _registrar_corrida(inicio, fin, corte)
+    datos_modificados('payroll')
+    return mensajes
+
+
+def _quitar_sin_empleado(inicio, fin):
+    Payroll.query.filter(Payroll.inicio==inicio, Payroll.fin==fin).filter(
+        db.or_(Payroll.usuario.is_(None),
+               Payroll.usuario.not_in(db.select(Employee.usuario)))
+    ).delete(synchronize_session=False)
+
+
+def _registrar_corrida(inicio, fin, corte):
+    """Anota la corrida del periodo hasta el cambio `corte` y hace commit."""
+    run = db.session.get(PayrollRun, (inicio, fin))
+    if run:
+        run.ultimo_cambio, run.ejecutado = corte, datetime.utcnow()
+    else:
+        db.session.add(PayrollRun(inicio=inicio, fin=fin, ultimo_cambio=corte))
+    db.session.flush()
+    # Los cambios ya incluidos por todas las corridas no se vuelven a necesitar
+    minimo = db.session.query(db.func.min(PayrollRun.ultimo_cambio)).scalar() or 0
+    PayrollChange.query.filter(PayrollChange.id <= minimo).delete(synchronize_session=False)
+    db.session.commit()
+
+
+# —————————————————————————————————————————————————————————
+# Nómina por lotes desde la línea de comandos (varios periodos)
+# —————————————————————————————————————————————————————————
+def quincenas(desde, hasta):
+    """Periodos 1–15 y 16–fin de mes cuyo inicio cae en [desde, hasta] (del calendario)."""
+    asegurar_calendario(desde, hasta)
+    C = Calendario
+    return db.session.query(C.quincena_inicio, C.quincena_fin).distinct()\
+             .filter(C.quincena_inicio.between(desde, hasta))\
+             .order_by(C.quincena_inicio).all()
+
+
+def _cartera_en_periodo(inicio, fin):
+    # Cartera asignada a cada empleado en el periodo (la menor, si tuvo varias)
+    return db.select(db.func.min(Attendance.cartera)).where(
+        Attendance.usuario==Employee.usuario,
+        Attendance.fecha.between(inicio, fin)).scalar_subquery()
+
+
+def grupos_nomina(inicio, fin, por=None):
+    """Particiones de la plantilla para repartir un periodo: ('supervisor'|'cartera', valor).
+
+    Cada empleado cae en exactamente una; None = un solo grupo con todos.
+    """
+    if por is None:
+        return [None]
+    col = Employee.supervisor_id if por == 'supervisor' else _cartera_en_periodo(inicio, fin)
+    return [(por, v) for (v,) in db.session.query(col).select_from(Employee).distinct()]
+
+
+def usuarios_grupo(inicio, fin, grupo):
+    """SELECT de los usuarios del grupo (None = todos)."""
+    if grupo is None:
+        return None
+    por, valor = grupo
+    col = Employee.supervisor_id if por == 'supervisor' else _cartera_en_periodo(inicio, fin)
+    return db.select(Employee.usuario).where(col.is_(None) if valor is None else col==valor)
+
+
+_app_proceso = None                 # la app de un proceso del pool de nomina_lote
+
+
+def _nomina_grupo(base, inicio, fin, grupo):
+    """Calcula y guarda un grupo de un periodo; corre en un proceso del pool
+    (con su propio motor y sesión) o en el mismo proceso si no hay pool.
+    En el pool crea una vez por proceso una app sobre la base `base` (URI)."""
+    global _app_proceso
+    t0 = time.perf_counter()
+    if has_app_context():
+        app = current_app._get_current_object()
+    else:
+        if _app_proceso is None:
+            from . import create_app
+            _app_proceso = create_app({'SQLALCHEMY_DATABASE_URI': base})
+        app = _app_proceso
+    with app.app_context():
+        filas = calcular_nomina(inicio, fin, usuarios_grupo(inicio, fin, grupo))
+        escribir_por_lotes(filas, _upsert_nomina, None)
+        db.session.remove()
+    return inicio, fin, grupo, len(filas), time.perf_counter() - t0
+
+
+def nomina_lote(periodos, por=None, procesos=1, informar=print):
+    """Nómina completa de varios periodos, repartida en grupos y procesos.
+
+    Deja lo mismo que generar_nomina(inicio, fin) periodo por periodo: los
+    grupos sólo hacen el upsert y el cierre de cada periodo (filas sin
+    empleado, corrida y cambios consumidos) se hace aquí una vez.
+    Devuelve las estadísticas de la corrida.
+    """
+    t0 = time.perf_counter()
+    abiertos = []
+    for inicio, fin in periodos:
+        cerrados = periodos_cerrados(inicio, fin)
+        if cerrados:
+            informar(f"Se omite {inicio} – {fin}: se solapa con el periodo cerrado "
+                     f"{cerrados[0][0]} – {cerrados[0][1]}")
+        else:
+            abiertos.append((inicio, fin))
+    if abiertos:
+        # Antes del pool: los procesos de cálculo sólo leen el calendario
+        asegurar_calendario(min(i for i, _ in abiertos), max(f for _, f in abiertos))
+    corte  = db.session.query(db.func.max(PayrollChange.id)).scalar() or 0
+    base   = current_app.config['SQLALCHEMY_DATABASE_URI']
+    tareas = [(base, i, f, g) for i, f in abiertos for g in grupos_nomina(i, f, por)]
+    db.session.commit()
+
+    filas = Counter(); segundos = Counter()
+    if procesos > 1 and len(tareas) > 1:
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context('forkserver')
+        else:
+            ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=ctx) as pool:
+            futuros = [pool.submit(_nomina_grupo, *t) for t in tareas]
+            resultados = (fut.result() for fut in as_completed(futuros))
+            for inicio, fin, grupo, n, dur in resultados:
+                filas[(inicio, fin)] += n; segundos[(inicio, fin)] += dur
+    else:
+        for t in tareas:
+            inicio, fin, grupo, n, dur = _nomina_grupo(*t)
+            filas[(inicio, fin)] += n; segundos[(inicio, fin)] += dur
+
+    for inicio, fin in abiertos:
+        _quitar_sin_empleado(inicio, fin)
+        _registrar_corrida(inicio, fin, corte)
+        informar(f"{inicio} – {fin}: {filas[(inicio, fin)]} empleados "
+                 f"en {segundos[(inicio, fin)]:.2f} s de cálculo")
+    if abiertos:
+        datos_modificados('payroll')
+    total = time.perf_counter() - t0
+    stats = {'periodos': len(abiertos), 'tareas': len(tareas), 'filas': sum(filas.values()),
+             'segundos': round(total, 3), 'procesos': procesos,
+             'filas_por_s': round(sum(filas.values()) / total, 1) if total else None,
+             'periodos_por_min': round(len(abiertos) * 60 / total, 2) if total else None}
+    informar(f"{stats['periodos']} periodos, {stats['tareas']} tareas, {stats['filas']} filas "
+             f"en {stats['segundos']} s con {procesos} procesos: "
+             f"{stats['filas_por_s']} filas/s, {stats['periodos_por_min']} periodos/min")
+    return stats
+
+
+# —————————————————————————————————————————————————————————
+# Conciliación de importes de nómina (centavos exactos)
+# —————————————————————————————————————————————————————————
+def conciliar_nomina(desde=None, hasta=None):
+    """Reporte de conciliación por periodo, todo en centavos enteros.
+
+    Compara el neto guardado con el recalculado desde los movimientos,
+    cuenta las filas cuyo neto no es base + bonos − deducciones y las que
+    cambian al recalcular, y muestra la deriva que daba sumar en float.
+    """
+    import numpy as np
+    import pandas as pd
+    q = db.session.query(Payroll.inicio, Payroll.fin).distinct().order_by(Payroll.inicio, Payroll.fin)
+    if desde:
+        q = q.filter(Payroll.inicio >= desde)
+    if hasta:
+        q = q.filter(Payroll.fin <= hasta)
+    importes = ['sueldo_base', 'total_bonos', 'total_deducciones', 'neto']
+    reporte  = []
+    for inicio, fin in q.all():
+        guardada = pd.DataFrame(db.session.query(
+                Payroll.usuario, *[centavos(getattr(Payroll, c)) for c in importes]
+            ).filter(Payroll.inicio==inicio, Payroll.fin==fin).all(), columns=['usuario', *importes])
+        guardada[importes] = guardada[importes].fillna(0).astype(np.int64)
+        calculada = pd.DataFrame(calcular_nomina(inicio, fin), columns=['usuario', *importes])
+        cruce = guardada.merge(calculada[['usuario', 'neto']], on='usuario', how='outer',
+                               suffixes=('', '_calc'))
+        neto, neto_calc = int(guardada['neto'].sum()), int(calculada['neto'].sum())
+        en_float = 0.0
+        for c in guardada['neto']:          # como se sumaba antes: pesos en float
+            en_float += c / 100
+        reporte.append({
+            'inicio': inicio, 'fin': fin, 'empleados': len(guardada),
+            'neto_guardado': de_centavos(neto), 'neto_recalculado': de_centavos(neto_calc),
+            'diferencia': de_centavos(neto - neto_calc),
+            'descuadradas': int((guardada['sueldo_base'] + guardada['total_bonos']
+                                 - guardada['total_deducciones'] != guardada['neto']).sum()),
+            'distintas': int((cruce['neto'].fillna(-1) != cruce['neto_calc'].fillna(-1)).sum()),
+            'deriva_float': en_float - neto / 100,
+        })
+    return reporte
+
+
+def totales_nomina(inicio, fin, condicion=None):
+    """Sumas del periodo calculadas en SQL (una sola consulta)."""
+    q = db.session.query(
+            db.func.count(Payroll.id),
+            db.func.coalesce(db.func.sum(Payroll.sueldo_base), 0),
+            db.func.coalesce(db.func.sum(Payroll.total_bonos), 0),
+            db.func.coalesce(db.func.sum(Payroll.total_deducciones), 0),
+            db.func.coalesce(db.func.sum(Payroll.neto), 0),
+        ).filter(Payroll.inicio==inicio, Payroll.fin==fin)
+    if condicion is not None:
+        q = q.filter(condicion)
+    n, sb, tb, td, neto = q.one()
+    return {'empleados': n, 'sueldo_base': sb, 'total_bonos': tb,
+            'total_deducciones': td, 'neto': neto}
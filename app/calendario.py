@@ -0,0 +1,146 @@
+"""Calendario: dimensión de fechas (quincenas, semanas, festivos)."""
+import calendar
+from datetime import datetime, timedelta
+from flask import current_app
+
+from .extensiones import db
+from .lotes import _insert_dialecto
+from .modelos import Attendance, Bonus, Calendario, Deduction, Payroll
+
+
+def _lunes(anio, mes, n):
+    """El n-ésimo lunes del mes."""
+    primero = datetime(anio, mes, 1).date()
+    return primero + timedelta(days=(7 - primero.weekday()) % 7 + 7*(n-1))
+
+
+def festivos_oficiales(anio):
+    """{fecha: nombre} de los descansos obligatorios (art. 74 LFT) del año."""
+    dia = lambda m, d: datetime(anio, m, d).date()
+    festivos = {
+        dia(1, 1):            'Año Nuevo',
+        _lunes(anio, 2, 1):   'Día de la Constitución',
+        _lunes(anio, 3, 3):   'Natalicio de Benito Juárez',
+        dia(5, 1):            'Día del Trabajo',
+        dia(9, 16):           'Día de la Independencia',
+        _lunes(anio, 11, 3):  'Día de la Revolución',
+        dia(12, 25):          'Navidad',
+    }
+    if anio >= 2024 and (anio - 2024) % 6 == 0:
+        festivos[dia(10, 1)] = 'Transmisión del Poder Ejecutivo Federal'
+    return festivos
+
+
+def filas_calendario(anio):
+    """Renglones de calendar_dim para un año completo."""
+    festivos = festivos_oficiales(anio)
+    primero  = datetime(anio, 1, 1).date()
+    filas = []
+    for f in (primero + timedelta(days=n) for n in range(366 if calendar.isleap(anio) else 365)):
+        ultimo = calendar.monthrange(anio, f.month)[1]
+        q1     = f.day <= 15
+        iso    = f.isocalendar()
+        filas.append({
+            'fecha': f, 'anio': anio, 'mes': f.month, 'dia_semana': f.weekday(),
+            'semana': iso[0]*100 + iso[1],
+            'quincena': anio*1000 + f.month*10 + (1 if q1 else 2),
+            'quincena_inicio': f.replace(day=1 if q1 else 16),
+            'quincena_fin': f.replace(day=15 if q1 else ultimo),
+            'es_festivo': f in festivos, 'festivo': festivos.get(f),
+        })
+    return filas
+
+
+def asegurar_calendario(desde, hasta):
+    """Garantiza que calendar_dim cubra [desde, hasta], por años completos.
+
+    Las consultas hacen JOIN con el calendario, así que un día faltante sería
+    un error: lo llaman el arranque, la nómina y `flask calendario`, nunca
+    una vista de lectura (ver validar_rango). Se comprueba contra la
+    tabla en cada llamada (un COUNT sobre la llave primaria), así que una
+    tabla borrada o recreada se vuelve a llenar. Inserta en la transacción
+    en curso (sin commit).
+    """
+    dias = db.session.query(db.func.count(Calendario.fecha))\
+             .filter(Calendario.fecha.between(desde, hasta)).scalar()
+    if dias == (hasta - desde).days + 1:
+        return
+    d1, d2 = db.session.query(db.func.min(Calendario.fecha), db.func.max(Calendario.fecha)).one()
+    # Siempre contiguo: se llena desde el año del extremo existente más lejano
+    a1 = min(desde.year, d1.year) if d1 else desde.year
+    a2 = max(hasta.year, d2.year) if d2 else hasta.year
+    stmt = _insert_dialecto()(Calendario.__table__).on_conflict_do_nothing(index_elements=['fecha'])
+    for anio in range(a1, a2 + 1):
+        db.session.execute(stmt, filas_calendario(anio))
+
+
+def _rango_datos():
+    """Años con datos (asistencia, movimientos, nómina) más el actual y el siguiente."""
+    minimos = [db.session.query(db.func.min(c)).scalar()
+               for c in (Attendance.fecha, Bonus.fecha, Deduction.fecha, Payroll.inicio)]
+    hoy = datetime.now().date()
+    desde = min(filter(None, minimos), default=hoy)
+    return desde.replace(month=1, day=1), hoy.replace(year=hoy.year + 1, month=12, day=31)
+
+
+def validar_rango(desde, hasta):
+    """ValueError si [desde, hasta] está al revés, es demasiado largo o sale del calendario.
+
+    Las vistas de lectura no amplían calendar_dim (lo hacen el arranque, la
+    nómina y `flask calendario`): sólo consultan lo que ya cubre. Cualquiera
+    de las dos fechas puede ser None (sin límite de ese lado).
+    """
+    if desde and hasta:
+        if desde > hasta:
+            raise ValueError("La fecha inicial es posterior a la final.")
+        maximo = current_app.config['RANGO_MAX_DIAS']
+        if (hasta - desde).days >= maximo:
+            raise ValueError(f"El rango no puede pasar de {maximo} días.")
+    d1, d2 = db.session.query(db.func.min(Calendario.fecha), db.func.max(Calendario.fecha)).one()
+    for f in filter(None, (desde, hasta)):
+        if d1 is None or not d1 <= f <= d2:
+            raise ValueError(f"El {f} está fuera del calendario (del {d1} al {d2}).")
+
+
+def dias_calendario(desde, hasta):
+    """Renglones del calendario en [desde, hasta], en orden: eje de fechas de la matriz."""
+    return db.session.query(
+            Calendario.fecha, Calendario.dia_semana, Calendario.es_festivo, Calendario.festivo
+        ).filter(Calendario.fecha.between(desde, hasta)).order_by(Calendario.fecha).all()
+
+
+def agregados_asistencia(inicio, fin, usuarios=None):
+    """Días por usuario y semana ISO en [inicio, fin], con una sola consulta agrupada.
+
+    Columnas: trabajados (A, V), medios (MG), faltas (F), descansos (D) y
+    festivos (días A/V que caen en festivo). `usuarios` como en calcular_nomina.
+    """
+    import pandas as pd
+    df = pd.DataFrame(_consulta_agregados(inicio, fin, usuarios).all(),
+                      columns=['usuario', 'semana', 'trabajados', 'medios',
+                               'faltas', 'descansos', 'festivos'])
+    # LEFT JOIN: un día sin renglón de calendario no se pierde en silencio
+    if df['semana'].isna().any():
+        raise RuntimeError(f"calendar_dim no tiene todos los días con asistencia "
+                           f"del {inicio} al {fin}")
+    return df
+
+
+def _consulta_agregados(inicio, fin, usuarios=None):
+    """La consulta agrupada de agregados_asistencia (plan-consultas también la muestra)."""
+    A, C = Attendance, Calendario
+
+    def dias(condicion):
+        return db.func.sum(db.case((condicion, 1), else_=0))
+
+    q = db.session.query(
+            A.usuario, C.semana,
+            dias(A.estado.in_(['A','V'])), dias(A.estado=='MG'),
+            dias(A.estado=='F'), dias(A.estado=='D'),
+            dias(A.estado.in_(['A','V']) & C.es_festivo)
+        ).outerjoin(C, C.fecha==A.fecha)\
+         .filter(A.fecha.between(inicio, fin))\
+         .group_by(A.usuario, C.semana)
+    if usuarios is not None:
+        q = q.filter(A.usuario.in_(usuarios))
+    return q
@@ -0,0 +1,250 @@
+"""Ingesta vectorizada y subida masiva de Asistencia/Deducciones/Bonos."""
+import hashlib
+
+from .alcance import usuarios_en_alcance
+from .caches import datos_modificados
+from .calculo import registrar_cambios
+from .extensiones import db
+from .importes import centavos_o_nada, tabla_centavos
+from .lotes import LOTE_IN, _upsert
+from .metricas import leer_archivo
+from .modelos import ArchivoCargado, Attendance, Bonus, Deduction, ESTADOS, huella_movimiento
+from .periodos import periodos_cerrados
+from .resumen import refrescar_resumen
+
+
+def _texto(col):
+    """Columna como texto sin espacios; los vacíos quedan como ''."""
+    return col.where(col.notna(), '').astype(str).str.strip()
+
+
+def _etiqueta_fila(hoja):
+    """«Fila» para la primera hoja (o csv/parquet), «Hoja «X», fila» para las demás."""
+    return f"Hoja «{hoja}», fila" if hoja else "Fila"
+
+
+def bloques_archivo(data, nombre, cols, mensajes, que='archivo'):
+    """Bloques (hoja, df) del archivo subido, listos para validar y escribir.
+
+    Los errores de lectura y las columnas faltantes se agregan a `mensajes`
+    y cortan la iteración; lo ya escrito de bloques anteriores se conserva.
+    """
+    try:
+        vacio = True
+        for hoja, df in leer_archivo(data, nombre, cols):
+            if vacio:
+                falt = set(cols) - set(df.columns)
+                if falt:
+                    mensajes.append((f"Faltan columnas: {', '.join(falt)}", 'warning'))
+                    return
+                vacio = False
+            yield hoja, df
+        if vacio:
+            mensajes.append((f"El {que} no tiene filas.", 'warning'))
+    except Exception as ex:
+        mensajes.append((f"Error al leer {que}: {ex}", 'danger'))
+
+
+def _por_llave(llave, valores, *extra):
+    """Filas (llave…, extra…) de la base que pueden coincidir con las tuplas `valores`.
+
+    Cada columna de la llave se filtra con IN de sus valores distintos (la
+    más variada en lotes de LOTE_IN), que SQLite resuelve con el índice
+    compuesto de la llave; el cruce exacto lo hace el merge del llamador.
+    Así cada bloque de una carga cuesta lo que sus propias filas y no lo que
+    ya hay en la base dentro de su rango de fechas.
+    """
+    distintos = [sorted(set(c)) for c in zip(*valores)]
+    mayor = max(range(len(llave)), key=lambda k: len(distintos[k]))
+    filas = []
+    for i in range(0, len(distintos[mayor]), LOTE_IN):
+        q = db.session.query(*llave, *extra)
+        for k, col in enumerate(llave):
+            q = q.filter(col.in_(distintos[k][i:i+LOTE_IN] if k == mayor else distintos[k]))
+        filas += q.all()
+    return filas
+
+
+def _validar_carga(tipo, df, hoja=None):
+    """Normaliza las columnas de un bloque del archivo.
+
+    Devuelve (validas, errores): un DataFrame con las filas correctas y la
+    lista de mensajes «Fila N: …» de las que se omiten.
+    """
+    import pandas as pd
+    out = pd.DataFrame(index=df.index)
+    out['fila']    = df.index + 2
+    out['usuario'] = _texto(df['Usuario'])
+    fechas         = pd.to_datetime(df['Fecha'], errors='coerce', format='mixed')
+    out['fecha']   = fechas.dt.date
+
+    motivo = pd.Series('', index=df.index, dtype=object)
+    motivo[fechas.isna()] = 'fecha inválida «' + _texto(df['Fecha'])[fechas.isna()] + '»'
+    motivo[out['usuario']==''] = 'usuario vacío'
+
+    if tipo=='asistencia':
+        out['estado']     = _texto(df['Estado']).str.upper()
+        out['supervisor'] = _texto(df['SUP'])
+        out['cartera']    = _texto(df['CARTERA'])
+        malo = ~out['estado'].isin(ESTADOS) & (motivo=='')
+        motivo[malo] = 'estado inválido «' + out['estado'][malo] + '»'
+    else:
+        out['tipo']  = _texto(df['Tipo'])
+        # Centavos valor por valor con el redondeo de pesos(), igual que el ORM
+        # y la huella por defecto: 10.125 es 1013 por cualquier camino
+        out['monto'] = pd.Series([centavos_o_nada(v) for v in df['Monto']],
+                                 index=df.index, dtype=object)
+        malo = out['monto'].isna() & (motivo=='')
+        motivo[malo] = 'monto inválido «' + _texto(df['Monto'])[malo] + '»'
+        out['observacion'] = (_texto(df['Observación'])
+                              if 'Observación' in df.columns else '')
+
+    error   = motivo!=''
+    etiqueta = _etiqueta_fila(hoja)
+    errores = [f"{etiqueta} {f}: {m}" for f, m in zip(out['fila'][error], motivo[error])]
+    return out[~error], errores
+
+
+def cargar_movimientos(tipo, df, hoja=None, tocados=None):
+    """Valida y escribe (con commit) un bloque de asistencia, deducciones o bonos.
+
+    La asistencia se inserta/actualiza con un upsert sobre uix_usuario_fecha;
+    los registros previos se leen por las llaves (usuario, fecha) del bloque.
+    Con un set en `tocados` los (usuario, mes) de asistencia se agregan ahí y
+    el resumen lo refresca el llamador una vez por archivo, no por bloque.
+    En bonos/deducciones se buscan las (fecha, huella) del bloque y las filas
+    ya cargadas (o repetidas en el archivo) se descartan con un anti-join.
+    """
+    import pandas as pd
+    validas, errores = _validar_carga(tipo, df, hoja)
+    if not validas.empty:
+        for i, f, _ in periodos_cerrados(validas['fecha'].min(), validas['fecha'].max()):
+            cerrada  = (validas['fecha'] >= i) & (validas['fecha'] <= f)
+            errores += [f"{_etiqueta_fila(hoja)} {n}: periodo cerrado ({i} a {f})"
+                        for n in validas['fila'][cerrada]]
+            validas  = validas[~cerrada]
+    rep = {'cargados': 0, 'reemplazados': 0, 'repetidos': 0, 'errores': errores, 'detalles': []}
+    if validas.empty:
+        return rep
+
+    model = {'asistencia': Attendance, 'deducciones': Deduction}.get(tipo, Bonus)
+    if tipo=='asistencia':
+        previos = pd.DataFrame(
+            _por_llave((Attendance.usuario, Attendance.fecha),
+                       zip(validas['usuario'], validas['fecha']), Attendance.estado),
+            columns=['usuario','fecha','previo']
+        )
+        validas = validas.reset_index(drop=True)
+        # Si la llave se repite en el archivo, lo reemplazado es la fila anterior
+        validas['previo'] = validas.groupby(['usuario','fecha'])['estado'].shift(1)
+        en_bd = validas[['usuario','fecha']].merge(previos, how='left',
+                                                   on=['usuario','fecha'])['previo']
+        validas['previo'] = validas['previo'].fillna(en_bd)
+
+        reempl = validas[validas['previo'].notna()]
+        rep['reemplazados'] = len(reempl)
+        rep['cargados']     = len(validas) - len(reempl)
+        rep['detalles']     = [
+            f"{_etiqueta_fila(hoja)} {f}: {u} {d} {p}→{e}"
+            for f, u, d, p, e in zip(reempl['fila'], reempl['usuario'],
+                                     reempl['fecha'], reempl['previo'], reempl['estado'])
+        ]
+        cols  = ['usuario','fecha','estado','supervisor','cartera']
+        filas = (validas.drop_duplicates(['usuario','fecha'], keep='last')[cols]
+                 .to_dict('records'))
+        _upsert(Attendance, filas, ['usuario','fecha'], ['estado','supervisor','cartera'])
+        meses = pd.to_datetime(validas['fecha']).dt.to_period('M').dt.start_time.dt.date
+        if tocados is None:
+            refrescar_resumen(set(zip(validas['usuario'], meses)))
+        else:
+            tocados.update(zip(validas['usuario'], meses))
+    else:
+        cols  = ['usuario','fecha','tipo','monto','observacion']
+        filas = validas[cols].assign(monto=validas['monto'].astype('int64'))
+        filas['huella'] = [huella_movimiento(*t) for t in zip(
+            filas['usuario'], filas['fecha'], filas['tipo'], filas['monto'], filas['observacion'])]
+        previas = pd.DataFrame(
+            _por_llave((model.fecha, model.huella), zip(filas['fecha'], filas['huella'].tolist())),
+            columns=['fecha','huella'])[['huella']]
+        nuevas = filas.drop_duplicates('huella').merge(previas.drop_duplicates(), on='huella',
+                                                       how='left', indicator=True)
+        nuevas = nuevas[nuevas['_merge']=='left_only'].drop(columns='_merge')
+        rep['repetidos'] = len(filas) - len(nuevas)
+        rep['cargados']  = len(nuevas)
+        if nuevas.empty:
+            return rep
+        db.session.execute(db.insert(tabla_centavos(model)), nuevas.to_dict('records'))
+        validas = nuevas
+
+    # Las fechas como datetime64: agregar objetos date cae al camino lento de pandas
+    rangos = pd.to_datetime(validas['fecha']).groupby(validas['usuario']).agg(['min','max'])
+    registrar_cambios(zip(rangos.index, rangos['min'].dt.date, rangos['max'].dt.date))
+    db.session.commit()
+    datos_modificados(model.__tablename__)
+    return rep
+
+
+# —————————————————————————————————————————————————————————
+# Subida masiva de Asistencia/Deducciones/Bonos
+# —————————————————————————————————————————————————————————
+def procesar_archivo(tipo, data, alcance=None, archivo=None, avance=None):
+    """Carga un archivo (.xlsx, .csv o .parquet) de asistencia/deducciones/bonos.
+
+    Cada bloque leído se valida y se escribe apenas llega, mientras el
+    lector sigue con el siguiente. `alcance` (de alcance_actual) limita la
+    asistencia a los usuarios que ese rol puede ver (None = sin límite).
+    Un archivo de bonos/deducciones con el mismo contenido que uno ya
+    cargado no se vuelve a leer. Devuelve los mensajes (texto, categoría).
+    """
+    cols = ['Usuario','Fecha','Tipo','Monto']
+    if tipo=='asistencia':
+        cols = ['Usuario','Fecha','Estado','SUP','CARTERA']
+    else:
+        sha  = hashlib.sha256(data).hexdigest()
+        hecho = db.session.get(ArchivoCargado, (tipo, sha))
+        if hecho:
+            return [(f"Este archivo ya se cargó el {hecho.cargado:%Y-%m-%d %H:%M} "
+                     f"({hecho.filas} registros); no se volvió a procesar.", 'info')]
+
+    lectura = []
+    cargados = reemplazados = repetidos = fuera = leidas = 0
+    errores  = []
+    tocados  = set()
+    try:
+        for hoja, df in bloques_archivo(data, archivo, cols, lectura):
+            leidas += len(df)
+            # — RESTRICCIÓN POR ROL: para asistencia solo sus agentes/admin —
+            if tipo=='asistencia' and alcance is not None:
+                usuarios = _texto(df['Usuario'])
+                antes = len(df)
+                df = df[usuarios.isin(usuarios_en_alcance(usuarios, alcance))]
+                fuera += antes - len(df)
+            rep = cargar_movimientos(tipo, df, hoja, tocados)
+            cargados     += rep['cargados']
+            reemplazados += rep['reemplazados']
+            repetidos    += rep['repetidos']
+            errores      += rep['errores']
+            if avance:
+                avance(leidas, None)
+    finally:
+        # Aunque un bloque falle, los anteriores ya tienen commit: su resumen se refresca
+        if tocados:
+            db.session.rollback()
+            refrescar_resumen(tocados)
+            db.session.commit()
+
+    if lectura and not leidas:
+        return lectura
+    if tipo!='asistencia' and not lectura:
+        db.session.add(ArchivoCargado(tipo=tipo, sha256=sha, nombre=archivo, filas=cargados))
+        db.session.commit()
+    mensajes = []
+    if fuera:
+        mensajes.append((f"{fuera} fila(s) omitida(s): fuera de tu cartera.", 'warning'))
+    if cargados:     mensajes.append((f"Se añadieron {cargados} registros de «{tipo}».", 'success'))
+    if reemplazados: mensajes.append((f"Se reemplazaron {reemplazados} registros de asistencia.", 'info'))
+    if repetidos:    mensajes.append((f"Se omitieron {repetidos} registros que ya estaban cargados.", 'info'))
+    if errores:
+        mensajes.append(("Se omitieron filas con errores:", 'warning'))
+        mensajes += [(e, 'warning') for e in errores]
+    return mensajes + lectura
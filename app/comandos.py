@@ -0,0 +1,128 @@
+"""Comandos de línea (flask migrar, flask nomina-lote…).
+
+Van en un blueprint sin grupo para seguir siendo `flask migrar` y no
+`flask comandos migrar`.
+"""
+import os
+import csv
+import click
+from datetime import datetime
+from flask import Blueprint
+
+from .caches import datos_modificados
+from .calculo import conciliar_nomina, nomina_lote, quincenas
+from .calendario import asegurar_calendario
+from .extensiones import db
+from .migraciones import migrar
+from .modelos import Calendario
+from .periodos import cerrar_periodo, podar_periodo
+from .planes import plan_consultas
+
+
+bp_comandos = Blueprint('comandos', __name__, cli_group=None)
+
+
+@bp_comandos.cli.command('migrar')
+def migrar_cmd():
+    """Aplica las migraciones pendientes a la base configurada."""
+    aplicadas = migrar()
+    print(f"Migraciones aplicadas: {aplicadas}" if aplicadas else "El esquema está al día.")
+
+
+@bp_comandos.cli.command('calendario')
+@click.argument('desde')
+@click.argument('hasta')
+def calendario_cmd(desde, hasta):
+    """Amplía calendar_dim para cubrir DESDE–HASTA (YYYY-MM-DD), por años completos."""
+    asegurar_calendario(datetime.strptime(desde, '%Y-%m-%d').date(),
+                        datetime.strptime(hasta, '%Y-%m-%d').date())
+    db.session.commit()
+    datos_modificados('calendar_dim')
+    d1, d2, n = db.session.query(db.func.min(Calendario.fecha), db.func.max(Calendario.fecha),
+                                 db.func.count()).one()
+    print(f"Calendario del {d1} al {d2}: {n} días.")
+
+
+@bp_comandos.cli.command('festivo')
+@click.argument('fecha')
+@click.argument('nombre', required=False)
+@click.option('--quitar', is_flag=True, help='Lo vuelve día ordinario.')
+def festivo_cmd(fecha, nombre, quitar):
+    """Marca FECHA (YYYY-MM-DD) como festivo, p. ej. un descanso pactado en el contrato."""
+    f = datetime.strptime(fecha, '%Y-%m-%d').date()
+    asegurar_calendario(f, f)
+    db.session.flush()
+    dia = db.session.get(Calendario, f)
+    dia.es_festivo, dia.festivo = (False, None) if quitar else (True, nombre or 'Festivo')
+    db.session.commit()
+    datos_modificados('calendar_dim')
+    print(f"{f}: {'día ordinario' if quitar else dia.festivo}")
+
+
+@bp_comandos.cli.command('nomina-lote')
+@click.argument('desde')
+@click.argument('hasta')
+@click.option('--por', type=click.Choice(['supervisor', 'cartera']),
+              help='Reparte cada periodo por supervisor o por cartera.')
+@click.option('--procesos', type=int, default=os.cpu_count() or 1, show_default=True,
+              help='Procesos de cálculo (1 = en este proceso).')
+def nomina_lote_cmd(desde, hasta, por, procesos):
+    """Recalcula la nómina de todas las quincenas entre DESDE y HASTA (YYYY-MM-DD)."""
+    periodos = quincenas(datetime.strptime(desde, '%Y-%m-%d').date(),
+                         datetime.strptime(hasta, '%Y-%m-%d').date())
+    if not periodos:
+        raise click.UsageError('No hay quincenas en ese rango.')
+    nomina_lote(periodos, por, max(1, procesos))
+
+
+@bp_comandos.cli.command('conciliar-nomina')
+@click.option('--desde', help='Primer inicio de periodo (YYYY-MM-DD).')
+@click.option('--hasta', help='Último fin de periodo (YYYY-MM-DD).')
+@click.option('--csv', 'ruta_csv', type=click.Path(dir_okay=False), help='Guarda además el reporte en CSV.')
+def conciliar_nomina_cmd(desde, hasta, ruta_csv):
+    """Concilia la nómina guardada contra el recálculo exacto, por periodo."""
+    fecha = lambda t: t and datetime.strptime(t, '%Y-%m-%d').date()
+    reporte = conciliar_nomina(fecha(desde), fecha(hasta))
+    for r in reporte:
+        marca = '✓' if not (r['diferencia'] or r['descuadradas'] or r['distintas']) else '⚠'
+        print(f"{marca} {r['inicio']} – {r['fin']}: {r['empleados']} empleados, "
+              f"neto {r['neto_guardado']} (recalculado {r['neto_recalculado']}, "
+              f"diferencia {r['diferencia']}), {r['descuadradas']} descuadradas, "
+              f"{r['distintas']} distintas, deriva en float {r['deriva_float']:+.6f}")
+    if ruta_csv and reporte:
+        with open(ruta_csv, 'w', newline='', encoding='utf-8') as f:
+            w = csv.DictWriter(f, fieldnames=list(reporte[0]))
+            w.writeheader()
+            w.writerows(reporte)
+    if not reporte:
+        print("No hay nómina en ese rango.")
+
+
+@bp_comandos.cli.command('cerrar-periodo')
+@click.argument('inicio')
+@click.argument('fin')
+@click.option('--podar', is_flag=True, help='Borra además el periodo de las tablas vivas.')
+def cerrar_periodo_cmd(inicio, fin, podar):
+    """Archiva un periodo de nómina en Parquet (INICIO y FIN en YYYY-MM-DD)."""
+    for texto, _ in cerrar_periodo(datetime.strptime(inicio, '%Y-%m-%d').date(),
+                                   datetime.strptime(fin, '%Y-%m-%d').date(), podar):
+        print(texto)
+
+
+@bp_comandos.cli.command('podar-periodo')
+@click.argument('inicio')
+@click.argument('fin')
+def podar_periodo_cmd(inicio, fin):
+    """Borra de las tablas vivas un periodo ya cerrado."""
+    for texto, _ in podar_periodo(datetime.strptime(inicio, '%Y-%m-%d').date(),
+                                  datetime.strptime(fin, '%Y-%m-%d').date()):
+        print(texto)
+
+
+@bp_comandos.cli.command('plan-consultas')
+def plan_consultas_cmd():
+    """Imprime EXPLAIN QUERY PLAN de la consulta principal de cada vista."""
+    for nombre, lineas, completo in plan_consultas():
+        print(f"{'⚠' if completo else '✓'} {nombre}")
+        for l in lineas:
+            print(f"    {l}")
@@ -0,0 +1,142 @@
+"""Directorio de empleados en memoria (login, user_loader, validaciones)."""
+import threading
+import time
+from array import array
+from collections import defaultdict
+
+from .extensiones import _de_la_app, db
+from .importes import centavos, de_centavos
+from .modelos import Employee, TableVersion
+
+
+ES_ADMIN, ES_SUPERVISOR = 1, 2      # bits de _Foto.flags
+
+
+class EmpleadoDir:
+    """Vista de sólo lectura de un empleado del directorio.
+
+    Cumple lo que Flask-Login espera de un usuario, así que load_user la
+    devuelve en lugar del objeto ORM; no guarda el hash de la contraseña.
+    """
+    __slots__ = ('usuario', 'nombre', 'puesto', 'salario_diario',
+                 'is_admin', 'is_supervisor', 'supervisor_id')
+
+    is_authenticated = True
+    is_active        = True
+    is_anonymous     = False
+
+    def __init__(self, foto, i):
+        self.usuario        = foto.usuarios[i]
+        self.nombre         = foto.nombres[i]
+        self.puesto         = foto.puestos[i]
+        self.salario_diario = de_centavos(foto.salarios[i])
+        self.is_admin       = bool(foto.flags[i] & ES_ADMIN)
+        self.is_supervisor  = bool(foto.flags[i] & ES_SUPERVISOR)
+        self.supervisor_id  = foto.supervisores[i]
+
+    def get_id(self):
+        return self.usuario
+
+    def __repr__(self):
+        return f"<EmpleadoDir {self.usuario}>"
+
+
+class _Foto:
+    """Columnas del directorio en una versión dada; nunca se modifica.
+
+    Los textos van en listas ordenadas por usuario (supervisor_id reutiliza
+    el mismo objeto str del usuario); salario (centavos) y flags en arreglos
+    compactos de la biblioteca estándar (array y bytes).
+    """
+    __slots__ = ('version', 'usuarios', 'nombres', 'puestos', 'salarios',
+                 'flags', 'supervisores', 'indice', 'por_supervisor')
+
+    def __init__(self, version, filas):
+        self.version  = version
+        self.usuarios = [f[0] for f in filas]
+        self.indice   = {u: i for i, u in enumerate(self.usuarios)}
+        self.nombres  = [f[1] for f in filas]
+        self.puestos  = [f[2] for f in filas]
+        self.salarios = array('q', (int(f[3] or 0) for f in filas))
+        self.flags    = bytes((ES_ADMIN if f[4] else 0) | (ES_SUPERVISOR if f[5] else 0)
+                              for f in filas)
+        self.supervisores = []
+        por_supervisor = defaultdict(list)
+        for i, f in enumerate(filas):
+            sup = f[6]
+            if sup is not None and sup in self.indice:
+                sup = self.usuarios[self.indice[sup]]
+            self.supervisores.append(sup)
+            if sup:
+                por_supervisor[sup].append(i)
+        self.por_supervisor = {s: array('i', ix) for s, ix in por_supervisor.items()}
+
+
+class DirectorioEmpleados:
+    """Empleados de la tabla employee en memoria, uno por app y proceso.
+
+    La foto se recarga cuando cambia la versión de 'employee' en
+    table_version. Ese sello se consulta a lo sumo cada `ttl` segundos
+    (otro worker pudo cambiar empleados); los cambios hechos en este
+    proceso la invalidan al momento vía datos_modificados.
+    """
+
+    def __init__(self, ttl=5):
+        self.ttl       = ttl
+        self.recargas  = 0
+        self._foto     = None
+        self._revisado = 0.0
+        self._lock     = threading.Lock()
+
+    def _version(self):
+        return db.session.query(TableVersion.version).filter_by(tabla='employee').scalar() or 0
+
+    def foto(self, forzar=False):
+        """Foto vigente; con forzar=True siempre compara el sello en la base."""
+        foto = self._foto
+        if foto is not None and not forzar and time.monotonic() - self._revisado < self.ttl:
+            return foto
+        with self._lock:
+            version = self._version()
+            if self._foto is None or self._foto.version != version:
+                filas = db.session.query(
+                    Employee.usuario, Employee.nombre, Employee.puesto, centavos(Employee.salario_diario),
+                    Employee.is_admin, Employee.is_supervisor, Employee.supervisor_id
+                ).order_by(Employee.usuario).all()
+                self._foto = _Foto(version, filas)
+                self.recargas += 1
+            self._revisado = time.monotonic()
+            return self._foto
+
+    def invalidar(self):
+        with self._lock:
+            self._foto = None
+
+    def get(self, usuario):
+        foto = self.foto()
+        i = foto.indice.get(usuario)
+        return None if i is None else EmpleadoDir(foto, i)
+
+    def __contains__(self, usuario):
+        return usuario in self.foto().indice
+
+    def usuarios(self):
+        return self.foto().usuarios
+
+    def supervisores(self):
+        foto = self.foto()
+        return [EmpleadoDir(foto, i) for i, f in enumerate(foto.flags) if f & ES_SUPERVISOR]
+
+    def agentes(self, supervisor):
+        """Subordinados directos de `supervisor`."""
+        foto = self.foto()
+        return [EmpleadoDir(foto, i) for i in foto.por_supervisor.get(supervisor, ())]
+
+    def stats(self):
+        foto = self._foto
+        return {'empleados': len(foto.usuarios) if foto else None,
+                'version': foto.version if foto else None,
+                'recargas': self.recargas, 'ttl': self.ttl}
+
+
+directorio = _de_la_app('directorio')
@@ -0,0 +1,161 @@
+"""CRUD de Empleados (listado, crear, editar, borrar, subir masivo)."""
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask_login import login_required
+
+from .alcance import _condicion_rol
+from .caches import datos_modificados
+from .calculo import registrar_cambios
+from .cargas import _etiqueta_fila, bloques_archivo
+from .directorio import directorio
+from .extensiones import db
+from .importes import pesos
+from .modelos import Employee
+from .trabajos import encolar, respuesta_job
+
+
+bp_empleados = Blueprint('empleados', __name__)
+
+
+@bp_empleados.route('/employees')
+@login_required
+def list_employees():
+    empleados = Employee.query.filter(_condicion_rol(Employee.usuario))\
+                              .order_by(Employee.usuario).all()
+    return render_template('employees.html', empleados=empleados)
+
+
+@bp_empleados.route('/employees/create', methods=['GET','POST'])
+@login_required
+def create_employee():
+    supervisors = directorio.supervisores()
+    if request.method=='POST':
+        usr = request.form['usuario'].strip()
+        if usr in directorio:
+            flash(f"El usuario «{usr}» ya está registrado.", "warning")
+            return redirect(url_for('empleados.create_employee'))
+        e = Employee(
+            usuario        = usr,
+            nombre         = request.form['nombre'].strip(),
+            salario_diario = pesos(request.form['salario_diario']),
+            puesto         = request.form['puesto'].strip(),
+            is_supervisor  = ('is_supervisor' in request.form),
+            supervisor_id  = request.form.get('supervisor_id') or None
+        )
+        db.session.add(e)
+        registrar_cambios([(usr, None, None)])
+        db.session.commit()
+        datos_modificados('employee')
+        flash('Empleado creado correctamente.', 'success')
+        return redirect(url_for('empleados.list_employees'))
+    return render_template('employee_form.html',
+                           action='Crear',
+                           supervisors=supervisors)
+
+
+@bp_empleados.route('/employees/<usuario>/edit', methods=['GET','POST'])
+@login_required
+def edit_employee(usuario):
+    e = Employee.query.get_or_404(usuario)
+    supervisors = directorio.supervisores()
+    if request.method=='POST':
+        salario          = pesos(request.form['salario_diario'])
+        if salario != e.salario_diario:
+            registrar_cambios([(e.usuario, None, None)])
+        e.nombre         = request.form['nombre'].strip()
+        e.salario_diario = salario
+        e.puesto         = request.form['puesto'].strip()
+        e.is_supervisor  = ('is_supervisor' in request.form)
+        e.supervisor_id  = request.form.get('supervisor_id') or None
+        db.session.commit()
+        datos_modificados('employee')
+        flash('Empleado actualizado correctamente.', 'success')
+        return redirect(url_for('empleados.list_employees'))
+    return render_template('employee_form.html',
+                           action='Editar',
+                           empleado=e,
+                           supervisors=supervisors)
+
+
+@bp_empleados.route('/employees/<usuario>/delete', methods=['POST'])
+@login_required
+def delete_employee(usuario):
+    e = Employee.query.get_or_404(usuario)
+    db.session.delete(e)
+    registrar_cambios([(usuario, None, None)])
+    db.session.commit()
+    datos_modificados('employee')
+    flash('Empleado eliminado.', 'warning')
+    return redirect(url_for('empleados.list_employees'))
+
+
+def procesar_empleados(data, archivo=None, avance=None):
+    """Alta masiva de empleados desde un .xlsx, .csv o .parquet.
+
+    Devuelve los mensajes (texto, categoría) que antes se mostraban con flash.
+    """
+    errores = []; nuevos = []; existentes = 0; leidas = 0; creados = 0; lectura = []
+    cols = ['Usuario','Nombre','Salario diario','Puesto','EsSupervisor','SupervisorID']
+    foto = directorio.foto(forzar=True)       # otro worker pudo dar altas hace poco
+    vistos = set()                            # altas de este mismo archivo
+
+    for hoja, df in bloques_archivo(data, archivo, cols, lectura, 'plantilla'):
+        for i,row in df.iterrows():
+            fila = f"{_etiqueta_fila(hoja)} {i+2}"
+            usr  = str(row['Usuario']).strip()
+            if not usr:
+                errores.append(f"{fila}: usuario vacío")
+                continue
+            if usr in foto.indice or usr in vistos:
+                existentes += 1
+                continue
+            try:
+                nombre = str(row['Nombre']).strip()
+                salario= pesos(row['Salario diario'])
+                puesto = str(row['Puesto']).strip()
+                is_sup = str(row['EsSupervisor']).strip().upper() in ('TRUE','1','SI','YES')
+                supid  = str(row['SupervisorID']).strip() or None
+                if supid and supid not in foto.indice and supid not in vistos:
+                    raise ValueError(f"Supervisor «{supid}» no existe")
+                e = Employee(
+                    usuario        = usr,
+                    nombre         = nombre,
+                    salario_diario = salario,
+                    puesto         = puesto,
+                    is_supervisor  = is_sup,
+                    supervisor_id  = supid
+                )
+                db.session.add(e)
+                nuevos.append(usr)
+                vistos.add(usr)
+            except Exception as ex:
+                errores.append(f"{fila}: {ex}")
+        registrar_cambios([(usr, None, None) for usr in nuevos[creados:]])
+        db.session.commit()
+        creados = len(nuevos)
+        leidas += len(df)
+        if avance:
+            avance(leidas, None)
+
+    if lectura and not leidas:
+        return lectura
+    if creados:
+        datos_modificados('employee')
+    mensajes = []
+    if creados:   mensajes.append((f"Se crearon {creados} empleados nuevos.", 'success'))
+    if existentes:mensajes.append((f"{existentes} ya existían y se omitieron.", 'info'))
+    if errores:
+        mensajes.append(("Se omitieron filas con error:", 'warning'))
+        mensajes += [(msg, 'warning') for msg in errores]
+    return mensajes + lectura
+
+
+@bp_empleados.route('/upload/employees', methods=['GET','POST'])
+@login_required
+def upload_employees():
+    plantilla  = 'employees.xlsx'
+    if request.method=='POST':
+        f   = request.files['file']
+        job = encolar('empleados', procesar_empleados, f.read(), f.filename)
+        return respuesta_job(job, url_for('empleados.upload_employees'))
+
+    return render_template('upload_employees.html', plantilla=plantilla)
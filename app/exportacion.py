@@ -0,0 +1,108 @@
+"""Exportación en streaming (XLSX constant_memory / CSV por bloques) y JSON."""
+import os
+import io
+import csv
+import tempfile
+import json
+from decimal import Decimal
+from flask import request, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+from .extensiones import db
+
+
+MIME_XLSX   = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+LOTE_EXPORT = 1000
+
+
+def _csv_stream(encabezados, filas):
+    buf = io.StringIO()
+    buf.write('\ufeff')                     # BOM para que Excel respete los acentos
+    w = csv.writer(buf)
+    w.writerow(encabezados)
+    for n, fila in enumerate(filas, 1):
+        w.writerow(fila)
+        if n % LOTE_EXPORT == 0:
+            yield buf.getvalue().encode('utf-8')
+            buf.seek(0); buf.truncate()
+    yield buf.getvalue().encode('utf-8')
+
+
+def _xlsx_stream(encabezados, filas, hoja):
+    # xlsxwriter en constant_memory escribe fila por fila a un temporal;
+    # el .xlsx (un zip) se envía por bloques cuando está cerrado.
+    import xlsxwriter
+    fd, ruta = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        wb = xlsxwriter.Workbook(ruta, {'constant_memory': True,
+                                        'default_date_format': 'yyyy-mm-dd'})
+        ws = wb.add_worksheet(hoja)
+        ws.write_row(0, 0, encabezados)
+        for n, fila in enumerate(filas, 1):
+            ws.write_row(n, 0, fila)
+        wb.close()
+        with open(ruta, 'rb') as f:
+            while bloque := f.read(64*1024):
+                yield bloque
+    finally:
+        os.remove(ruta)
+
+
+def en_streaming(gen):
+    """stream_with_context que además cierra la sesión de la vista al terminar.
+
+    Las consultas armadas en la vista quedan ligadas a esa sesión; al
+    iterarlas durante el envío ya salió del registro y nadie la cierra, así
+    que su conexión sólo volvía al pool con el recolector de basura.
+    """
+    sesion = db.session()
+
+    def cerrando():
+        try:
+            yield from gen
+        finally:
+            sesion.close()
+    return stream_with_context(cerrando())
+
+
+def respuesta_export(encabezados, filas, nombre, hoja):
+    """Respuesta en streaming; ?formato=csv para CSV, XLSX por defecto."""
+    if request.args.get('formato') == 'csv':
+        gen, mime, ext = _csv_stream(encabezados, filas), 'text/csv; charset=utf-8', 'csv'
+    else:
+        gen, mime, ext = _xlsx_stream(encabezados, filas, hoja), MIME_XLSX, 'xlsx'
+    return Response(
+        en_streaming(gen),
+        mimetype=mime,
+        headers={'Content-Disposition': f'attachment; filename={nombre}.{ext}'}
+    )
+
+
+def _json_importe(o):
+    """default= de JSON para jsonify y NDJSON: importes como número, fechas en ISO."""
+    # Un Decimal de dos decimales sale como número JSON: float() conserva su
+    # representación más corta, que es el mismo texto decimal
+    if isinstance(o, Decimal):
+        return float(o)
+    if hasattr(o, 'isoformat'):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class ProveedorJSON(DefaultJSONProvider):
+    default = staticmethod(_json_importe)
+
+
+def respuesta_ndjson(filas):
+    """application/x-ndjson en streaming: un objeto por línea, en bloques."""
+    def gen():
+        buf = []
+        for fila in filas:
+            buf.append(json.dumps(fila, default=_json_importe, ensure_ascii=False))
+            if len(buf) >= LOTE_EXPORT:
+                yield '\n'.join(buf) + '\n'
+                buf = []
+        if buf:
+            yield '\n'.join(buf) + '\n'
+    return Response(en_streaming(gen()), mimetype='application/x-ndjson')
@@ -0,0 +1,15 @@
+"""Extensiones compartidas (SQLAlchemy, Flask-Login) y objetos propios de cada app."""
+from flask import current_app
+from flask_sqlalchemy import SQLAlchemy
+from flask_login import LoginManager
+from werkzeug.local import LocalProxy
+
+
+db = SQLAlchemy()
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
+
+
+def _de_la_app(nombre):
+    """Proxy a un objeto propio de la app en curso (los crea create_app)."""
+    return LocalProxy(lambda: current_app.extensions['nomina'][nombre])
@@ -0,0 +1,64 @@
+"""Importes: centavos enteros en la base, Decimal en Python."""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
+
+from .extensiones import db
+
+
+CENTAVO = Decimal('0.01')
+
+
+def pesos(valor):
+    """Decimal a dos decimales (redondeo comercial) desde Decimal, float, int o texto."""
+    try:
+        if not isinstance(valor, Decimal):
+            valor = Decimal(str(valor).strip())
+        return valor.quantize(CENTAVO, ROUND_HALF_UP)
+    except InvalidOperation:
+        raise ValueError(f"importe inválido «{valor}»") from None
+
+
+def a_centavos(valor):
+    return int(pesos(valor).scaleb(2))
+
+
+def centavos_o_nada(valor):
+    """a_centavos(valor), o None si no es un importe (para validar columnas)."""
+    try:
+        return a_centavos(valor)
+    except ValueError:
+        return None
+
+
+def de_centavos(c):
+    return Decimal(int(c)).scaleb(-2)
+
+
+class Dinero(db.TypeDecorator):
+    """Importe guardado como BIGINT de centavos; en Python es Decimal.
+
+    SUM() sobre estas columnas es una suma entera exacta. Las rutas masivas
+    leen y escriben los centavos tal cual con centavos() y tabla_centavos(),
+    sin crear un Decimal por valor.
+    """
+    impl     = db.BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else a_centavos(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else de_centavos(value)
+
+
+def centavos(col):
+    """Una columna Dinero (o su SUM) leída como entero de centavos."""
+    return db.type_coerce(col, db.BigInteger)
+
+
+@lru_cache(maxsize=None)
+def tabla_centavos(model):
+    """La tabla de `model` con sus columnas Dinero como BIGINT, para escribir centavos en bloque."""
+    return db.table(model.__tablename__, *[
+        db.column(c.name, db.BigInteger() if isinstance(c.type, Dinero) else c.type)
+        for c in model.__table__.columns])
@@ -0,0 +1,43 @@
+"""Escritura en lotes: upsert por dialecto y transacciones de LOTE_ESCRITURA."""
+from flask import current_app
+
+from .extensiones import db
+
+
+LOTE_IN = 500      # valores por cláusula IN antes de cambiar de estrategia
+
+
+def _insert_dialecto():
+    """insert() con on_conflict_do_update del motor en uso (PostgreSQL o SQLite)."""
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _upsert(model, filas, claves, actualizar):
+    """INSERT … ON CONFLICT (claves) DO UPDATE en un solo executemany.
+
+    `model` puede ser también una tabla, p. ej. tabla_centavos(Payroll).
+    """
+    stmt = _insert_dialecto()(getattr(model, '__table__', model))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=claves,
+        set_={c: stmt.excluded[c] for c in actualizar}
+    )
+    db.session.execute(stmt, filas)
+
+
+def escribir_por_lotes(filas, escribir, avance=None):
+    """Aplica escribir(lote) con un commit cada LOTE_ESCRITURA filas.
+
+    Así ninguna escritura masiva retiene el candado de la base por mucho
+    tiempo y los demás escritores (otras cargas, la nómina) se intercalan.
+    """
+    n = current_app.config['LOTE_ESCRITURA']
+    for i in range(0, len(filas), n):
+        escribir(filas[i:i+n])
+        db.session.commit()
+        if avance:
+            avance(min(i+n, len(filas)), len(filas))
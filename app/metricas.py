@@ -0,0 +1,201 @@
+"""Instrumentación opcional por petición (NOMINA_INSTRUMENTACION=1)."""
+import json
+import logging
+import threading
+import time
+from flask import (
+    current_app, request, g, has_request_context, before_render_template,
+    template_rendered
+)
+from flask_login import current_user
+from collections import defaultdict, Counter
+from sqlalchemy import event
+
+from .caches import cache_meta
+from .extensiones import _de_la_app, db
+
+
+log_metricas = logging.getLogger('nomina.metricas')
+BUCKETS_S    = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Metricas:
+    """Acumuladores por ruta, expuestos en formato de texto de Prometheus.
+
+    Son por proceso: con varios workers cada uno publica los suyos.
+    """
+
+    def __init__(self):
+        self._lock       = threading.Lock()
+        self.solicitudes = Counter()                 # (endpoint, método, estado)
+        self.buckets     = defaultdict(lambda: [0]*len(BUCKETS_S))
+        self.dur_suma    = Counter()
+        self.dur_n       = Counter()
+        self.sql_n       = Counter()
+        self.sql_s       = Counter()
+        self.plantilla_s = Counter()
+        self.lectura_n   = 0
+        self.lectura_s   = 0.0
+
+    def observar(self, endpoint, metodo, estado, m, duracion):
+        with self._lock:
+            self.solicitudes[(endpoint, metodo, estado)] += 1
+            self.dur_suma[endpoint] += duracion
+            self.dur_n[endpoint]    += 1
+            for i, limite in enumerate(BUCKETS_S):
+                if duracion <= limite:
+                    self.buckets[endpoint][i] += 1
+            self.sql_n[endpoint]       += m['sql_n']
+            self.sql_s[endpoint]       += m['sql_s']
+            self.plantilla_s[endpoint] += m['plantilla_s']
+
+    def lectura(self, duracion):
+        with self._lock:
+            self.lectura_n += 1
+            self.lectura_s += duracion
+
+    def texto(self, endpoints):
+        lineas = []
+
+        def serie(nombre, tipo, ayuda, valores):
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            lineas.extend(f"{nombre}{etiquetas} {valor}" for etiquetas, valor in valores)
+
+        with self._lock:
+            serie('nomina_http_solicitudes_total', 'counter', 'Solicitudes atendidas',
+                  [(f'{{endpoint="{e}",metodo="{m}",estado="{c}"}}', n)
+                   for (e, m, c), n in sorted(self.solicitudes.items())])
+            hist = []
+            for e in endpoints:
+                for limite, n in zip(BUCKETS_S, self.buckets[e]):
+                    hist.append((f'_bucket{{endpoint="{e}",le="{limite}"}}', n))
+                hist.append((f'_bucket{{endpoint="{e}",le="+Inf"}}', self.dur_n[e]))
+                hist.append((f'_sum{{endpoint="{e}"}}', round(self.dur_suma[e], 6)))
+                hist.append((f'_count{{endpoint="{e}"}}', self.dur_n[e]))
+            lineas.append("# HELP nomina_http_duracion_segundos Duración total de la solicitud")
+            lineas.append("# TYPE nomina_http_duracion_segundos histogram")
+            lineas.extend(f"nomina_http_duracion_segundos{s} {v}" for s, v in hist)
+            serie('nomina_sql_sentencias_total', 'counter', 'Sentencias SQL por ruta',
+                  [(f'{{endpoint="{e}"}}', self.sql_n[e]) for e in endpoints])
+            serie('nomina_sql_segundos_total', 'counter', 'Tiempo en SQL por ruta',
+                  [(f'{{endpoint="{e}"}}', round(self.sql_s[e], 6)) for e in endpoints])
+            serie('nomina_plantilla_segundos_total', 'counter', 'Tiempo de render Jinja por ruta',
+                  [(f'{{endpoint="{e}"}}', round(self.plantilla_s[e], 6)) for e in endpoints])
+            serie('nomina_lectura_bloques_total', 'counter', 'Bloques leídos de archivos de carga',
+                  [('', self.lectura_n)])
+            serie('nomina_lectura_segundos_total', 'counter', 'Tiempo esperando bloques del lector',
+                  [('', round(self.lectura_s, 6))])
+        cm = cache_meta.stats()
+        serie('nomina_cache_metadatos_total', 'counter', 'Consultas al cache de metadatos',
+              [('{resultado="hit"}', cm['hits']), ('{resultado="miss"}', cm['misses'])])
+        return "\n".join(lineas) + "\n"
+
+
+metricas = _de_la_app('metricas')
+
+
+def _metricas_req():
+    return g.get('_metricas') if has_request_context() else None
+
+
+def leer_archivo(data, nombre, columnas=()):
+    """lectura.leer_bloques con los lectores configurados y su tiempo en las métricas.
+
+    Cada bloque trae LOTE_ESCRITURA filas: se escribe en una transacción propia.
+    """
+    from lectura import leer_bloques
+    bloques = leer_bloques(data, nombre, columnas, lote=current_app.config['LOTE_ESCRITURA'],
+                           procesos=current_app.config['LECTORES'],
+                           hojas_extra=current_app.config['HOJAS_EXTRA'])
+    try:
+        while True:
+            t0 = time.perf_counter()
+            try:
+                bloque = next(bloques)
+            except StopIteration:
+                return
+            finally:
+                if current_app.config['INSTRUMENTACION']:
+                    metricas.lectura(time.perf_counter() - t0)
+            yield bloque
+    finally:
+        bloques.close()
+
+
+def _sql_antes(conn, cursor, statement, parameters, context, executemany):
+    # En el contexto de ejecución y no en conn.info: si la sentencia falla
+    # no hay after_cursor_execute, y el contexto se descarta con ella
+    context._t_sql = time.perf_counter()
+
+
+def _sql_despues(conn, cursor, statement, parameters, context, executemany):
+    m = _metricas_req()
+    if m is not None:
+        m['sql_n'] += 1
+        m['sql_s'] += time.perf_counter() - context._t_sql
+        m['sql_textos'][statement] += 1
+
+
+def _plantilla_antes(sender, template, context, **extra):
+    m = _metricas_req()
+    if m is not None:
+        m['_t_plantilla'] = time.perf_counter()
+
+
+def _plantilla_despues(sender, template, context, **extra):
+    m = _metricas_req()
+    if m is not None and '_t_plantilla' in m:
+        m['plantilla_s'] += time.perf_counter() - m.pop('_t_plantilla')
+
+
+def _inicio_solicitud():
+    g._metricas = {'t0': time.perf_counter(), 'sql_n': 0, 'sql_s': 0.0,
+                   'sql_textos': Counter(), 'plantilla_s': 0.0}
+
+
+def _fin_solicitud(resp):
+    m = g.pop('_metricas', None)
+    if m is None:
+        return resp
+    endpoint = request.endpoint or 'sin_ruta'
+    metodo, ruta, estado = request.method, request.path, resp.status_code
+    usuario = current_user.get_id() if current_user else None
+    parcial = (time.perf_counter() - m['t0']) * 1000
+    resp.headers['Server-Timing'] = ', '.join([
+        f'sql;dur={m["sql_s"]*1000:.1f};desc="{m["sql_n"]} consultas"',
+        f'tpl;dur={m["plantilla_s"]*1000:.1f}',
+        f'app;dur={parcial:.1f}',
+    ])
+
+    # En respuestas en streaming se registra al terminar de enviar el cuerpo,
+    # cuando ya no hay contexto de la app
+    acumulado = metricas._get_current_object()
+
+    def cerrar():
+        dur = time.perf_counter() - m['t0']
+        acumulado.observar(endpoint, metodo, estado, m, dur)
+        repetida = max(m['sql_textos'].values(), default=0)
+        log_metricas.info(json.dumps({
+            'endpoint': endpoint, 'metodo': metodo, 'ruta': ruta, 'estado': estado,
+            'usuario': usuario, 'ms': round(dur*1000, 1),
+            'sql_n': m['sql_n'], 'sql_ms': round(m['sql_s']*1000, 1),
+            'sql_max_repeticion': repetida,           # alto = posible N+1
+            'plantilla_ms': round(m['plantilla_s']*1000, 1),
+        }, ensure_ascii=False))
+    if resp.is_streamed:
+        resp.call_on_close(cerrar)
+    else:
+        cerrar()
+    return resp
+
+
+def instrumentar(app):
+    """Engancha las métricas por petición a `app` y a su motor (lo llama create_app)."""
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _sql_antes)
+        event.listen(db.engine, 'after_cursor_execute', _sql_despues)
+    before_render_template.connect(_plantilla_antes, app)
+    template_rendered.connect(_plantilla_despues, app)
+    app.before_request(_inicio_solicitud)
+    app.after_request(_fin_solicitud)
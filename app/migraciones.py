@@ -0,0 +1,158 @@
+"""Migraciones del esquema (foco.db existentes)."""
+import os
+from flask import current_app
+
+from .caches import subir_versiones
+from .calendario import _rango_datos, asegurar_calendario
+from .extensiones import db
+from .importes import Dinero, a_centavos, centavos, pesos
+from .modelos import Bonus, Deduction, Employee, Payroll, SchemaVersion, huella_movimiento
+from .periodos import ARCHIVABLES
+from .resumen import reconstruir_resumen
+
+
+def _crear_indices(*nombres):
+    """Crea esos índices declarados en los modelos si faltan en la base.
+
+    Cada migración nombra los suyos: un índice que hoy declara el modelo
+    puede usar una columna que agrega una migración posterior.
+    """
+    indices = {i.name: i for t in db.metadata.sorted_tables for i in t.indexes}
+    for nombre in nombres:
+        indices[nombre].create(db.session.connection(), checkfirst=True)
+
+
+def _agregar_columna(tabla, columna, tipo):
+    """ALTER TABLE … ADD COLUMN si la columna aún no existe (create_all no altera tablas)."""
+    if columna not in {c['name'] for c in db.inspect(db.session.connection()).get_columns(tabla)}:
+        db.session.execute(db.text(f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo}"))
+
+
+def _rellenar_huellas():
+    """Calcula la huella de los bonos y deducciones que no la tienen."""
+    for model in (Bonus, Deduction):
+        t = model.__table__
+        filas = [{'_id': i, '_h': huella_movimiento(u, f, tp, c, o)}
+                 for i, u, f, tp, c, o in db.session.query(
+                     model.id, model.usuario, model.fecha, model.tipo,
+                     centavos(model.monto), model.observacion).filter(model.huella.is_(None))]
+        if filas:
+            db.session.execute(t.update().where(t.c.id==db.bindparam('_id'))
+                                .values(huella=db.bindparam('_h')), filas)
+
+
+def _migrar_centavos():
+    """Pasa a centavos los importes que estaban en pesos (FLOAT).
+
+    En PostgreSQL cambia el tipo de la columna. SQLite no altera tipos: se
+    reescriben los valores y la columna conserva afinidad REAL, que guarda
+    esos enteros sin error (hasta 2^53 centavos). Todo en una transacción:
+    a medias no queda nada convertido.
+    """
+    for model in (Employee, Bonus, Deduction, Payroll):
+        tabla = model.__table__
+        cols  = [c.name for c in tabla.columns if isinstance(c.type, Dinero)]
+        if db.engine.dialect.name == 'postgresql':
+            for c in cols:
+                db.session.execute(db.text(
+                    f"ALTER TABLE {tabla.name} ALTER COLUMN {c} TYPE BIGINT "
+                    f"USING round({c}::numeric * 100)::bigint"))
+            continue
+        pk = tabla.primary_key.columns.values()[0].name
+        # El redondeo va sobre el decimal más corto de cada float, no sobre x*100
+        filas = [{'_pk': f[0], **{c: None if v is None else a_centavos(v)
+                                  for c, v in zip(cols, f[1:])}}
+                 for f in db.session.execute(db.text(
+                     f"SELECT {pk}, {', '.join(cols)} FROM {tabla.name}"))]
+        if filas:
+            db.session.execute(db.text(
+                f"UPDATE {tabla.name} SET {', '.join(f'{c} = :{c}' for c in cols)} "
+                f"WHERE {pk} = :_pk"), filas)
+
+
+def _migrar_archivo_centavos():
+    """Reescribe las particiones archivadas con importes float64 como decimal(18, 2)."""
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    for tabla, model in ARCHIVABLES.items():
+        raiz = os.path.join(current_app.config['ARCHIVO_DIR'], tabla)
+        cols = [c.name for c in model.__table__.columns if isinstance(c.type, Dinero)]
+        for parte in (sorted(os.listdir(raiz)) if os.path.isdir(raiz) else []):
+            ruta = os.path.join(raiz, parte, 'part-0.parquet')
+            t    = pq.read_table(ruta)
+            if not any(pa.types.is_floating(t.schema.field(c).type) for c in cols):
+                continue
+            df = t.to_pandas()
+            for c in cols:
+                df[c] = [None if pd.isna(v) else pesos(v) for v in df[c]]
+            # El esquema del propio archivo: las particiones viejas no tienen las columnas nuevas
+            esquema = pa.schema([pa.field(f.name, pa.decimal128(18, 2)) if f.name in cols else f
+                                 for f in t.schema])
+            pq.write_table(pa.Table.from_pandas(df, schema=esquema, preserve_index=False),
+                           ruta + '.tmp', compression='zstd')
+            os.replace(ruta + '.tmp', ruta)
+
+
+# (versión, descripción, pasos); un paso es SQL o una función sin argumentos.
+# Sólo se agregan al final: la versión aplicada queda en schema_version.
+MIGRACIONES = [
+    (1, 'Índices compuestos usuario/fecha, fecha/id, supervisor, cartera y periodo',
+        [lambda: _crear_indices(
+            'ix_employee_supervisor_id', 'ix_attendance_fecha_id',
+            'ix_attendance_supervisor_fecha', 'ix_attendance_cartera_fecha',
+            'ix_deduction_usuario_fecha', 'ix_deduction_fecha_id',
+            'ix_bonus_usuario_fecha', 'ix_bonus_fecha_id', 'ix_payroll_periodo')]),
+    (2, 'Resumen mensual de asistencia (attendance_summary)',
+        [lambda: reconstruir_resumen()]),
+    (3, 'Índice único de nómina por usuario y periodo; registro de cambios',
+        # Dos create_payroll simultáneos dejaban filas repetidas: queda la última
+        ["DELETE FROM payroll WHERE id NOT IN "
+         "(SELECT MAX(id) FROM payroll GROUP BY usuario, inicio, fin)",
+         lambda: _crear_indices('uix_payroll_usuario_periodo')]),
+    (4, 'Contador de cambios por tabla (table_version)',
+        [lambda: subir_versiones(t.name for t in db.metadata.sorted_tables)]),
+    (5, 'Cierre de periodos con archivo Parquet (payroll_close)',
+        [lambda: subir_versiones(['payroll_close'])]),
+    (6, 'Importes en centavos enteros (salario, montos y nómina)',
+        [_migrar_centavos, _migrar_archivo_centavos,
+         lambda: subir_versiones(['employee', 'bonus', 'deduction', 'payroll'])]),
+    (7, 'Huella de llave natural en bonos/deducciones; archivos ya cargados (upload_file)',
+        [lambda: _agregar_columna('bonus', 'huella', 'BIGINT'),
+         lambda: _agregar_columna('deduction', 'huella', 'BIGINT'),
+         _rellenar_huellas,
+         lambda: _crear_indices('ix_bonus_fecha_huella', 'ix_deduction_fecha_huella')]),
+    (8, 'Dimensión de fechas con quincenas, semanas y festivos (calendar_dim)',
+        [lambda: asegurar_calendario(*_rango_datos()),
+         lambda: subir_versiones(['calendar_dim'])]),
+    (9, 'Dueño de cada job y un solo job ejecutando por clave (job)',
+        [lambda: _agregar_columna('job', 'proceso', 'VARCHAR(100)'),
+         # Sin dueño registrado no hay forma de saber si siguen vivos
+         "UPDATE job SET estado = 'error', error = 'Interrumpido (anterior a la migración 9)' "
+         "WHERE estado IN ('pendiente', 'ejecutando')",
+         lambda: _crear_indices('uix_job_clave_ejecutando')]),
+    (10, 'Latido y avance de cada job (job)',
+        [lambda: _agregar_columna('job', 'latido', 'DATETIME'),
+         lambda: _agregar_columna('job', 'hechos', 'INTEGER'),
+         lambda: _agregar_columna('job', 'total', 'INTEGER'),
+         "UPDATE job SET latido = iniciado WHERE estado = 'ejecutando'"]),
+]
+
+
+def migrar():
+    """Crea las tablas nuevas y aplica las migraciones pendientes."""
+    db.create_all()
+    hechas = {v for (v,) in db.session.query(SchemaVersion.version)}
+    aplicadas = []
+    for version, descripcion, pasos in MIGRACIONES:
+        if version in hechas:
+            continue
+        for paso in pasos:
+            if callable(paso):
+                paso()
+            else:
+                db.session.execute(db.text(paso))
+        db.session.add(SchemaVersion(version=version, descripcion=descripcion))
+        db.session.commit()
+        aplicadas.append(version)
+    return aplicadas
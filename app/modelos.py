@@ -0,0 +1,224 @@
+"""Modelos de datos."""
+import hashlib
+from datetime import datetime
+from flask_login import UserMixin
+
+from .extensiones import db
+from .importes import Dinero, a_centavos
+
+
+class Employee(db.Model, UserMixin):
+    usuario        = db.Column(db.String(50), primary_key=True)
+    nombre         = db.Column(db.String(100), nullable=False)
+    salario_diario = db.Column(Dinero, nullable=False)
+    puesto         = db.Column(db.String(100))
+    password_hash  = db.Column(db.String(128))  # implementar check_password
+    is_admin       = db.Column(db.Boolean, default=False)
+    is_supervisor  = db.Column(db.Boolean, default=False)
+    supervisor_id  = db.Column(db.String(50), db.ForeignKey('employee.usuario'), index=True)
+    agentes        = db.relationship(
+                        'Employee',
+                        backref=db.backref('supervisor', remote_side=[usuario])
+                    )
+
+    def get_id(self):
+        return self.usuario
+
+    def check_password(self, pw):
+        # aquí tu lógica de verificación de contraseña
+        return True
+
+
+class Attendance(db.Model):
+    __tablename__ = 'attendance'
+    id          = db.Column(db.Integer, primary_key=True)
+    usuario     = db.Column(db.String(50), db.ForeignKey('employee.usuario'), nullable=False)
+    fecha       = db.Column(db.Date, nullable=False)
+    estado      = db.Column(db.String(20), nullable=False)   # A, V, MG, F, D
+    supervisor  = db.Column(db.String(100))
+    cartera     = db.Column(db.String(100))
+    __table_args__ = (
+        db.UniqueConstraint('usuario', 'fecha', name='uix_usuario_fecha'),
+        db.Index('ix_attendance_fecha_id', 'fecha', 'id'),
+        db.Index('ix_attendance_supervisor_fecha', 'supervisor', 'fecha'),
+        db.Index('ix_attendance_cartera_fecha', 'cartera', 'fecha'),
+    )
+
+
+def huella_movimiento(usuario, fecha, tipo, monto_centavos, observacion):
+    """Hash de 64 bits de la llave natural de un bono o deducción."""
+    clave = '\x1f'.join((usuario or '', fecha.isoformat(), tipo or '',
+                         str(int(monto_centavos)), observacion or ''))
+    return int.from_bytes(hashlib.blake2b(clave.encode('utf-8'), digest_size=8).digest(),
+                          'big', signed=True)
+
+
+def _huella_por_defecto(ctx):
+    # Para los INSERT por el modelo (ORM o db.insert(model)); la carga masiva la calcula en bloque
+    p = ctx.get_current_parameters()
+    return huella_movimiento(p['usuario'], p['fecha'], p['tipo'], a_centavos(p['monto']),
+                             p.get('observacion'))
+
+
+class Deduction(db.Model):
+    id          = db.Column(db.Integer, primary_key=True)
+    usuario     = db.Column(db.String(50), db.ForeignKey('employee.usuario'))
+    fecha       = db.Column(db.Date, nullable=False)
+    tipo        = db.Column(db.String(50), nullable=False)
+    monto       = db.Column(Dinero, nullable=False)
+    observacion = db.Column(db.String(200))
+    huella      = db.Column(db.BigInteger, default=_huella_por_defecto, info={'interna': True})
+    __table_args__ = (
+        db.Index('ix_deduction_usuario_fecha', 'usuario', 'fecha'),
+        db.Index('ix_deduction_fecha_id', 'fecha', 'id'),
+        db.Index('ix_deduction_fecha_huella', 'fecha', 'huella'),
+    )
+
+
+class Bonus(db.Model):
+    id          = db.Column(db.Integer, primary_key=True)
+    usuario     = db.Column(db.String(50), db.ForeignKey('employee.usuario'))
+    fecha       = db.Column(db.Date, nullable=False)
+    tipo        = db.Column(db.String(50), nullable=False)
+    monto       = db.Column(Dinero, nullable=False)
+    observacion = db.Column(db.String(200))
+    huella      = db.Column(db.BigInteger, default=_huella_por_defecto, info={'interna': True})
+    __table_args__ = (
+        db.Index('ix_bonus_usuario_fecha', 'usuario', 'fecha'),
+        db.Index('ix_bonus_fecha_id', 'fecha', 'id'),
+        db.Index('ix_bonus_fecha_huella', 'fecha', 'huella'),
+    )
+
+
+class Payroll(db.Model):
+    id                = db.Column(db.Integer, primary_key=True)
+    usuario           = db.Column(db.String(50), db.ForeignKey('employee.usuario'))
+    inicio            = db.Column(db.Date, nullable=False)
+    fin               = db.Column(db.Date, nullable=False)
+    sueldo_base       = db.Column(Dinero)
+    total_bonos       = db.Column(Dinero)
+    total_deducciones = db.Column(Dinero)
+    neto              = db.Column(Dinero)
+    employee          = db.relationship('Employee', backref='payrolls')
+    __table_args__ = (
+        db.Index('ix_payroll_periodo', 'inicio', 'fin', 'usuario'),
+        db.Index('uix_payroll_usuario_periodo', 'usuario', 'inicio', 'fin', unique=True),
+    )
+
+
+class PayrollChange(db.Model):
+    # Entradas de nómina modificadas: asistencia/bonos/deducciones de
+    # [desde, hasta] o, con fechas nulas, el empleado en sí (salario, alta, baja)
+    __tablename__ = 'payroll_change'
+    id          = db.Column(db.Integer, primary_key=True)
+    usuario     = db.Column(db.String(50), nullable=False)
+    desde       = db.Column(db.Date)
+    hasta       = db.Column(db.Date)
+    __table_args__ = (
+        db.Index('ix_payroll_change_desde_hasta', 'desde', 'hasta'),
+        {'sqlite_autoincrement': True},    # ids crecientes aunque se poden filas
+    )
+
+
+class PayrollRun(db.Model):
+    # Última corrida de cada periodo y hasta qué PayrollChange.id incluyó
+    __tablename__ = 'payroll_run'
+    inicio        = db.Column(db.Date, primary_key=True)
+    fin           = db.Column(db.Date, primary_key=True)
+    ultimo_cambio = db.Column(db.Integer, nullable=False, default=0)
+    ejecutado     = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class Calendario(db.Model):
+    # Dimensión de fechas: un renglón por día, contiguo; lo amplía asegurar_calendario()
+    __tablename__ = 'calendar_dim'
+    fecha           = db.Column(db.Date, primary_key=True)
+    anio            = db.Column(db.Integer, nullable=False)
+    mes             = db.Column(db.Integer, nullable=False)
+    dia_semana      = db.Column(db.Integer, nullable=False)     # 0 = lunes … 6 = domingo
+    semana          = db.Column(db.Integer, nullable=False)     # ISO: año*100 + semana
+    quincena        = db.Column(db.Integer, nullable=False)     # año*1000 + mes*10 + 1|2
+    quincena_inicio = db.Column(db.Date, nullable=False)
+    quincena_fin    = db.Column(db.Date, nullable=False)
+    es_festivo      = db.Column(db.Boolean, nullable=False, default=False)
+    festivo         = db.Column(db.String(100))
+    __table_args__ = (
+        db.Index('ix_calendar_dim_quincena', 'quincena', 'fecha'),
+        db.Index('ix_calendar_dim_semana', 'semana', 'fecha'),
+    )
+
+
+class AttendanceSummary(db.Model):
+    # Días por usuario, mes y estado; se mantiene al cargar/editar/borrar asistencia
+    __tablename__ = 'attendance_summary'
+    usuario     = db.Column(db.String(50), primary_key=True)
+    mes         = db.Column(db.Date, primary_key=True)          # primer día del mes
+    estado      = db.Column(db.String(20), primary_key=True)
+    dias        = db.Column(db.Integer, nullable=False)
+    __table_args__ = (
+        db.Index('ix_attendance_summary_mes', 'mes', 'usuario'),
+    )
+
+
+class Job(db.Model):
+    id          = db.Column(db.String(32), primary_key=True)   # uuid4().hex
+    tipo        = db.Column(db.String(50), nullable=False)     # nomina, empleados, upload:<tipo>
+    clave       = db.Column(db.String(100))                    # trabajos con la misma clave no se solapan
+    estado      = db.Column(db.String(20), nullable=False, default='pendiente')  # pendiente, ejecutando, terminado, error
+    usuario     = db.Column(db.String(50))
+    mensajes    = db.Column(db.JSON)
+    error       = db.Column(db.Text)
+    creado      = db.Column(db.DateTime, default=datetime.utcnow)
+    iniciado    = db.Column(db.DateTime)
+    terminado   = db.Column(db.DateTime)
+    proceso     = db.Column(db.String(100))                    # equipo:pid del worker que lo encoló/ejecuta
+    latido      = db.Column(db.DateTime)                       # lo renueva el worker mientras lo ejecuta
+    hechos      = db.Column(db.Integer)                        # avance, guardado cada JOB_LATIDO
+    total       = db.Column(db.Integer)
+
+    __table_args__ = (
+        # Reclamo en la base: un solo job 'ejecutando' por clave entre todos los workers
+        db.Index('uix_job_clave_ejecutando', 'clave', unique=True,
+                 sqlite_where=db.text("estado = 'ejecutando'"),
+                 postgresql_where=db.text("estado = 'ejecutando'")),
+    )
+
+
+class PeriodoCerrado(db.Model):
+    # Periodo de nómina archivado en Parquet; `podado` = ya no está en las tablas vivas
+    __tablename__ = 'payroll_close'
+    inicio      = db.Column(db.Date, primary_key=True)
+    fin         = db.Column(db.Date, primary_key=True)
+    filas       = db.Column(db.JSON, nullable=False)        # {tabla: filas archivadas}
+    cerrado     = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    podado      = db.Column(db.DateTime)
+
+
+class ArchivoCargado(db.Model):
+    # Archivo de bonos/deducciones ya procesado, por el hash de su contenido
+    __tablename__ = 'upload_file'
+    tipo        = db.Column(db.String(20), primary_key=True)
+    sha256      = db.Column(db.String(64), primary_key=True)
+    nombre      = db.Column(db.String(255))
+    filas       = db.Column(db.Integer)                     # registros añadidos
+    cargado     = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class TableVersion(db.Model):
+    # Contador de cambios por tabla; lo suben datos_modificados() y lo leen
+    # los ETag/Last-Modified de la API sin tocar las tablas de datos
+    __tablename__ = 'table_version'
+    tabla       = db.Column(db.String(50), primary_key=True)
+    version     = db.Column(db.Integer, nullable=False, default=0)
+    modificado  = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class SchemaVersion(db.Model):
+    __tablename__ = 'schema_version'
+    version     = db.Column(db.Integer, primary_key=True)
+    descripcion = db.Column(db.String(200))
+    aplicada    = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# Códigos válidos de Attendance.estado
+ESTADOS = ('A','V','MG','F','D')
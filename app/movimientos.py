@@ -0,0 +1,95 @@
+"""Subida masiva y listados de Deducciones y Bonos."""
+import hashlib
+from datetime import datetime
+from flask import Blueprint, render_template, request, url_for
+from flask_login import login_required
+
+from .alcance import _condicion_rol, alcance_actual
+from .caches import lista_usuarios
+from .cargas import procesar_archivo
+from .modelos import Bonus, Deduction
+from .paginacion import json_pagina, paginar, quiere_json
+from .trabajos import encolar, respuesta_job
+
+
+bp_movimientos = Blueprint('movimientos', __name__)
+
+
+@bp_movimientos.route('/upload/<tipo>', methods=['GET','POST'])
+@login_required
+def upload(tipo):
+    plantilla = f"{tipo}.xlsx"
+    if request.method=='POST':
+        alcance = alcance_actual() if tipo=='asistencia' else None
+        f    = request.files['file']
+        data = f.read()
+        # Dos envíos del mismo archivo no corren a la vez: el segundo ve el primero ya registrado
+        clave = None if tipo=='asistencia' else f"carga:{tipo}:{hashlib.sha256(data).hexdigest()}"
+        job = encolar(f"upload:{tipo}", procesar_archivo, tipo,
+                      data, alcance, f.filename, clave=clave)
+        return respuesta_job(job, url_for('movimientos.upload', tipo=tipo))
+
+    return render_template('upload.html', tipo=tipo, plantilla=plantilla)
+
+
+# —————————————————————————————————————————————————————————
+# Listado y filtro de Deducciones y Bonos (idéntico patrón)
+# —————————————————————————————————————————————————————————
+@bp_movimientos.route('/deductions')
+@login_required
+def list_deductions():
+    records, siguiente = paginar(Deduction.query.filter(_condicion_rol(Deduction.usuario)),
+                                 Deduction)
+    if quiere_json():
+        return json_pagina(records, siguiente)
+    return render_template('deductions.html', records=records, siguiente=siguiente)
+
+@bp_movimientos.route('/deductions/filter', methods=['GET'])
+@login_required
+def filter_deductions():
+    usuarios = lista_usuarios()
+    u_sel    = request.args.get('usuario','')
+    d1       = request.args.get('start_date','')
+    d2       = request.args.get('end_date','')
+    q = Deduction.query.filter(_condicion_rol(Deduction.usuario))
+    if u_sel: q = q.filter_by(usuario=u_sel)
+    if d1:    q = q.filter(Deduction.fecha >= datetime.strptime(d1,'%Y-%m-%d').date())
+    if d2:    q = q.filter(Deduction.fecha <= datetime.strptime(d2,'%Y-%m-%d').date())
+    regs, siguiente = paginar(q, Deduction)
+    if quiere_json():
+        return json_pagina(regs, siguiente)
+    return render_template('deductions_filter.html',
+                           registros=regs,
+                           siguiente=siguiente,
+                           usuarios=usuarios,
+                           usuario_sel=u_sel,
+                           start_date=d1, end_date=d2)
+
+@bp_movimientos.route('/bonuses')
+@login_required
+def list_bonuses():
+    records, siguiente = paginar(Bonus.query.filter(_condicion_rol(Bonus.usuario)), Bonus)
+    if quiere_json():
+        return json_pagina(records, siguiente)
+    return render_template('bonuses.html', records=records, siguiente=siguiente)
+
+@bp_movimientos.route('/bonuses/filter', methods=['GET'])
+@login_required
+def filter_bonuses():
+    usuarios = lista_usuarios()
+    u_sel    = request.args.get('usuario','')
+    d1       = request.args.get('start_date','')
+    d2       = request.args.get('end_date','')
+    q = Bonus.query.filter(_condicion_rol(Bonus.usuario))
+    if u_sel: q = q.filter_by(usuario=u_sel)
+    if d1:    q = q.filter(Bonus.fecha >= datetime.strptime(d1,'%Y-%m-%d').date())
+    if d2:    q = q.filter(Bonus.fecha <= datetime.strptime(d2,'%Y-%m-%d').date())
+    regs, siguiente = paginar(q, Bonus)
+    if quiere_json():
+        return json_pagina(regs, siguiente)
+    return render_template('bonuses_filter.html',
+                           registros=regs,
+                           siguiente=siguiente,
+                           usuarios=usuarios,
+                           usuario_sel=u_sel,
+                           start_date=d1, end_date=d2)
@@ -0,0 +1,221 @@
+"""Generación, listado, exportación, recibos en PDF y cierre de la nómina."""
+import os
+import zipfile
+from datetime import datetime
+from decimal import Decimal
+from flask import (
+    Blueprint, current_app, render_template, request, redirect, url_for, Response, flash,
+    abort
+)
+from flask_login import login_required, current_user
+from collections import defaultdict
+import recibos
+
+from .alcance import _condicion_rol
+from .caches import cache_pagina
+from .calculo import generar_nomina, totales_nomina
+from .exportacion import LOTE_EXPORT, en_streaming, respuesta_export
+from .extensiones import db
+from .modelos import Employee, Payroll
+from .periodos import cerrar_periodo
+from .trabajos import encolar, respuesta_job
+
+
+bp_nomina = Blueprint('nomina', __name__)
+
+
+@bp_nomina.route('/payroll/create', methods=['GET','POST'])
+@login_required
+def create_payroll():
+    if request.method=='POST':
+        inicio = datetime.strptime(request.form['inicio'],'%Y-%m-%d').date()
+        fin    = datetime.strptime(request.form['fin'],   '%Y-%m-%d').date()
+        incremental = request.form.get('modo') == 'incremental'
+        job = encolar('nomina', generar_nomina, inicio, fin, incremental,
+                      clave=f"nomina:{inicio}:{fin}")
+        return respuesta_job(job, url_for('nomina.list_payroll', inicio=inicio, fin=fin))
+    return render_template('payroll_form.html')
+
+
+@bp_nomina.route('/payroll', methods=['GET'])
+@login_required
+@cache_pagina('payroll', 'employee')
+def list_payroll():
+    inicio = request.args.get('inicio','')
+    fin    = request.args.get('fin','')
+    try:
+        i_date = datetime.strptime(inicio,'%Y-%m-%d').date()
+        f_date = datetime.strptime(fin,   '%Y-%m-%d').date()
+    except:
+        flash("Fechas inválidas", "danger")
+        return redirect(url_for('principal.dashboard'))
+
+    records = Payroll.query.filter_by(inicio=i_date, fin=f_date)\
+                .filter(_condicion_rol(Payroll.usuario)).all()
+    tot     = totales_nomina(i_date, f_date, _condicion_rol(Payroll.usuario))
+
+    return render_template('payroll_list.html',
+        records=records,
+        inicio=i_date, fin=f_date,
+        total_sb=tot['sueldo_base'],
+        total_bonos=tot['total_bonos'],
+        total_deducciones=tot['total_deducciones'],
+        total_neto=tot['neto']
+    )
+
+
+@bp_nomina.route('/payroll/export', methods=['GET'])
+@login_required
+def export_payroll_xlsx():
+    inicio = request.args.get('inicio','')
+    fin    = request.args.get('fin','')
+    i_date = datetime.strptime(inicio,'%Y-%m-%d').date()
+    f_date = datetime.strptime(fin,   '%Y-%m-%d').date()
+
+    q = db.session.query(
+            Payroll.usuario, Employee.nombre, Payroll.sueldo_base,
+            Payroll.total_bonos, Payroll.total_deducciones, Payroll.neto
+        ).outerjoin(Employee, Employee.usuario==Payroll.usuario)\
+         .filter(Payroll.inicio==i_date, Payroll.fin==f_date, _condicion_rol(Payroll.usuario))\
+         .order_by(Payroll.usuario)\
+         .execution_options(yield_per=LOTE_EXPORT)
+
+    def filas():
+        totales = [Decimal('0.00')] * 4
+        for r in q:
+            totales = [t if v is None else t + v for t, v in zip(totales, r[2:])]
+            yield r
+        yield ('Totales', '', *totales)
+
+    return respuesta_export(['Usuario','Nombre','Sueldo Base','Bonos','Deducciones','Neto'],
+                            filas(), f"nomina_{inicio}_a_{fin}", 'Nómina')
+
+
+# —————————————————————————————————————————————————————————
+# Recibos de nómina en PDF (pool de procesos, cache por hash, ZIP en streaming)
+# —————————————————————————————————————————————————————————
+class _SalidaZip:
+    """Destino sólo-escritura para ZipFile; lo escrito se entrega por partes."""
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos, self._partes = b''.join(self._partes), []
+        return datos
+
+
+def filas_recibo(inicio, fin):
+    """Filas de nómina del periodo visibles para current_user, como dicts."""
+    q = db.session.query(
+            Payroll.usuario, Employee.nombre, Employee.puesto,
+            Employee.supervisor_id.label('supervisor'), Payroll.inicio, Payroll.fin,
+            Payroll.sueldo_base, Payroll.total_bonos, Payroll.total_deducciones, Payroll.neto
+        ).join(Employee, Employee.usuario==Payroll.usuario)\
+         .filter(Payroll.inicio==inicio, Payroll.fin==fin, _condicion_rol(Payroll.usuario))\
+         .order_by(Payroll.usuario)
+    return [r._asdict() for r in q]
+
+
+def _nombre_zip(texto):
+    return str(texto).replace('/', '_').replace('\\', '_')
+
+
+def _recibos_zip(filas, cache):
+    """ZIP por partes: recibos/<usuario>.pdf y supervisores/<supervisor>.pdf.
+
+    Los PDF que no están en el cache se encargan todos al pool al empezar;
+    el ZIP se va escribiendo en orden a medida que cada uno termina. Al
+    terminar se poda el cache a RECIBOS_CACHE_MB.
+    """
+    pool = recibos.pool(current_app.config['RECIBOS_PROCESOS'])
+    wk   = current_app.config['WKHTMLTOPDF']
+    tope = current_app.config['RECIBOS_CACHE_MB'] << 20
+    log  = current_app.logger                       # el finally puede correr sin contexto
+    trabajos = []                                   # (nombre en el zip, ruta, futuro o None)
+
+    def encargar(nombre, lote, clave):
+        ruta = os.path.join(cache, f"{clave}.pdf")
+        if os.path.exists(ruta):
+            recibos.usado(ruta)
+            fut = None
+        else:
+            fut = pool.submit(recibos.generar_pdf, lote, ruta, cache, wk)
+        trabajos.append((nombre, ruta, fut))
+
+    claves  = {}
+    por_sup = defaultdict(list)
+    for f in filas:
+        claves[f['usuario']] = recibos.clave(f)
+        encargar(f"recibos/{_nombre_zip(f['usuario'])}.pdf", [f], claves[f['usuario']])
+        por_sup[f['supervisor'] or 'sin_supervisor'].append(f)
+    for sup, lote in sorted(por_sup.items()):
+        encargar(f"supervisores/{_nombre_zip(sup)}.pdf", lote,
+                 recibos.clave_lote([claves[f['usuario']] for f in lote]))
+
+    salida, errores = _SalidaZip(), []
+    try:
+        with zipfile.ZipFile(salida, 'w', zipfile.ZIP_STORED) as zf:
+            for nombre, ruta, fut in trabajos:
+                try:
+                    if fut:
+                        fut.result()
+                    zf.write(ruta, nombre)
+                except Exception as ex:
+                    errores.append(f"{nombre}: {ex}")
+                yield salida.vaciar()
+            if errores:
+                zf.writestr('errores.txt', '\n'.join(errores))
+        yield salida.vaciar()
+    finally:
+        # Si el cliente corta la descarga, lo que no empezó no se convierte
+        for _, _, fut in trabajos:
+            if fut:
+                fut.cancel()
+        try:
+            recibos.podar(cache, tope)
+        except OSError:
+            log.exception("No se pudo podar el cache de recibos")
+
+
+@bp_nomina.route('/payroll/payslips', methods=['GET'])
+@login_required
+def export_payslips():
+    inicio = request.args.get('inicio','')
+    fin    = request.args.get('fin','')
+    try:
+        i_date = datetime.strptime(inicio,'%Y-%m-%d').date()
+        f_date = datetime.strptime(fin,   '%Y-%m-%d').date()
+    except ValueError:
+        flash("Fechas inválidas", "danger")
+        return redirect(url_for('principal.dashboard'))
+    if not recibos.wkhtmltopdf_disponible(current_app.config['WKHTMLTOPDF']):
+        flash("No se encontró wkhtmltopdf; instálalo o configura NOMINA_WKHTMLTOPDF.", "danger")
+        return redirect(url_for('nomina.list_payroll', inicio=inicio, fin=fin))
+
+    cache = current_app.config['RECIBOS_CACHE']
+    os.makedirs(cache, exist_ok=True)
+    return Response(
+        en_streaming(_recibos_zip(filas_recibo(i_date, f_date), cache)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename=recibos_{inicio}_a_{fin}.zip'}
+    )
+
+
+@bp_nomina.route('/payroll/close', methods=['POST'])
+@login_required
+def close_payroll():
+    if not current_user.is_admin:
+        abort(403)
+    inicio = datetime.strptime(request.form['inicio'],'%Y-%m-%d').date()
+    fin    = datetime.strptime(request.form['fin'],   '%Y-%m-%d').date()
+    podar  = request.form.get('podar') in ('1', 'on', 'true')
+    job = encolar('cierre', cerrar_periodo, inicio, fin, podar, clave=f"nomina:{inicio}:{fin}")
+    return respuesta_job(job, url_for('nomina.list_payroll', inicio=inicio, fin=fin))
@@ -0,0 +1,69 @@
+"""Paginación por cursor (keyset sobre fecha, id), variante JSON y fechas de la petición."""
+from datetime import datetime
+from flask import current_app, request, jsonify, abort
+
+from .extensiones import db
+
+
+def paginar(q, model):
+    """Una página de `q` en orden (fecha, id) descendente.
+
+    ?cursor=<fecha>_<id> continúa después de esa fila y ?per_page fija el
+    tamaño (hasta MAX_PAGE_SIZE). El filtro (fecha, id) < cursor usa el
+    índice, así que cada página cuesta lo mismo sin importar el tamaño de la
+    tabla. Devuelve (registros, cursor de la página siguiente o None).
+    """
+    per_page = request.args.get('per_page', current_app.config['PAGE_SIZE'], type=int)
+    per_page = max(1, min(per_page, current_app.config['MAX_PAGE_SIZE']))
+    cursor   = request.args.get('cursor')
+    if cursor:
+        try:
+            f, i = cursor.split('_')
+            f, i = datetime.strptime(f,'%Y-%m-%d').date(), int(i)
+        except ValueError:
+            abort(400, "Cursor inválido")
+        q = q.filter(db.tuple_(model.fecha, model.id) < (f, i))
+    regs = q.order_by(model.fecha.desc(), model.id.desc()).limit(per_page+1).all()
+    siguiente = None
+    if len(regs) > per_page:
+        regs = regs[:per_page]
+        siguiente = f"{regs[-1].fecha}_{regs[-1].id}"
+    return regs, siguiente
+
+
+def quiere_json():
+    return request.args.get('formato') == 'json'
+
+
+def columnas_internas(model):
+    """Columnas que no salen en JSON (info={'interna': True}), como la huella."""
+    return {c.name for c in model.__table__.columns if c.info.get('interna')}
+
+
+def _a_dict(r):
+    d = {}
+    for c in r.__table__.columns:
+        if c.info.get('interna'):
+            continue
+        v = getattr(r, c.name)
+        d[c.name] = v.isoformat() if hasattr(v, 'isoformat') else v
+    return d
+
+
+def json_pagina(registros, siguiente):
+    return jsonify(registros=[_a_dict(r) for r in registros], siguiente=siguiente)
+
+
+def _fechas_api(*nombres, requeridas=True):
+    """Fechas YYYY-MM-DD de request.args; ValueError con el parámetro inválido."""
+    fechas = []
+    for nombre in nombres:
+        valor = request.args.get(nombre, '')
+        if not valor and not requeridas:
+            fechas.append(None)
+            continue
+        try:
+            fechas.append(datetime.strptime(valor, '%Y-%m-%d').date())
+        except ValueError:
+            raise ValueError(f"Parámetro «{nombre}» inválido; se espera YYYY-MM-DD") from None
+    return fechas
@@ -0,0 +1,150 @@
+"""Cierre de periodos: archivo Parquet por periodo y consulta unificada."""
+import os
+from datetime import datetime
+from flask import current_app
+
+from .alcance import _condicion_rol
+from .caches import datos_modificados
+from .extensiones import db
+from .importes import Dinero
+from .modelos import Attendance, Bonus, Deduction, Employee, Payroll, PeriodoCerrado
+
+
+ARCHIVABLES = {'payroll': Payroll, 'attendance': Attendance, 'bonus': Bonus, 'deduction': Deduction}
+
+
+def _ruta_archivo(tabla, inicio, fin):
+    """<ARCHIVO_DIR>/<tabla>/periodo=<inicio>_<fin>/part-0.parquet (particiones estilo Hive)."""
+    return os.path.join(current_app.config['ARCHIVO_DIR'], tabla, f"periodo={inicio}_{fin}", 'part-0.parquet')
+
+
+def _filtro_periodo(model, inicio, fin):
+    if model is Payroll:
+        return (Payroll.inicio==inicio) & (Payroll.fin==fin)
+    return model.fecha.between(inicio, fin)
+
+
+def _esquema_arrow(model):
+    import pyarrow as pa
+    tipos = [(Dinero, pa.decimal128(18, 2)), (db.Integer, pa.int64()), (db.Float, pa.float64()),
+             (db.Boolean, pa.bool_()),
+             (db.DateTime, pa.timestamp('us')), (db.Date, pa.date32())]
+    return pa.schema([
+        (c.name, next((t for k, t in tipos if isinstance(c.type, k)), pa.string()))
+        for c in model.__table__.columns
+    ])
+
+
+def periodos_cerrados(desde, hasta):
+    """[(inicio, fin, podado)] de los cierres que se solapan con [desde, hasta]."""
+    return db.session.query(PeriodoCerrado.inicio, PeriodoCerrado.fin, PeriodoCerrado.podado)\
+             .filter(PeriodoCerrado.inicio <= hasta, PeriodoCerrado.fin >= desde)\
+             .order_by(PeriodoCerrado.inicio).all()
+
+
+def leer_archivo_periodos(tabla, periodos, desde=None, hasta=None):
+    """Filas archivadas de `tabla` para esos periodos, leídas con memory mapping.
+
+    Sólo se abren las particiones de los periodos pedidos; `desde`/`hasta`
+    filtran por fecha dentro del archivo (no aplica a payroll).
+    """
+    import pandas as pd
+    import pyarrow.parquet as pq
+    filtros = None
+    if tabla != 'payroll' and desde and hasta:
+        filtros = [('fecha', '>=', desde), ('fecha', '<=', hasta)]
+    partes = [pq.read_table(_ruta_archivo(tabla, i, f), memory_map=True, filters=filtros).to_pandas()
+              for i, f in periodos]
+    if not partes:
+        return _esquema_arrow(ARCHIVABLES[tabla]).empty_table().to_pandas()
+    return pd.concat(partes, ignore_index=True)
+
+
+def consultar_historico(tabla, desde, hasta, alcance=None):
+    """DataFrame de `tabla` en [desde, hasta], uniendo tablas vivas y archivo.
+
+    Los periodos cerrados se leen siempre del Parquet (estén o no podados) y
+    se excluyen de la consulta viva, así nada se cuenta dos veces. En payroll
+    el rango elige los periodos que se solapan con él.
+    """
+    import pandas as pd
+    model   = ARCHIVABLES[tabla]
+    cierres = [(i, f) for i, f, _ in periodos_cerrados(desde, hasta)]
+
+    q = db.select(model)
+    if model is Payroll:
+        q = q.where(Payroll.inicio <= hasta, Payroll.fin >= desde)
+    else:
+        q = q.where(model.fecha.between(desde, hasta))
+    for i, f in cierres:
+        q = q.where(~_filtro_periodo(model, i, f))
+    if alcance is not None:
+        q = q.where(_condicion_rol(model.usuario, alcance))
+    vivo = pd.read_sql(q, db.session.connection(), coerce_float=False)   # importes en Decimal
+
+    archivado = leer_archivo_periodos(tabla, cierres, desde, hasta)
+    if alcance is not None and alcance[0] != 'admin' and not archivado.empty:
+        visibles = {u for (u,) in db.session.query(Employee.usuario)
+                                            .filter(_condicion_rol(Employee.usuario, alcance))}
+        archivado = archivado[archivado['usuario'].isin(visibles)]
+    if archivado.empty:
+        return vivo
+    return pd.concat([vivo, archivado], ignore_index=True)
+
+
+def cerrar_periodo(inicio, fin, podar=False, avance=None):
+    """Archiva la nómina del periodo y los movimientos que la produjeron.
+
+    Cada tabla queda en su partición Parquet (zstd). Desde ese momento el
+    periodo no admite cargas, ediciones ni nuevas corridas de nómina.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    if periodos_cerrados(inicio, fin):
+        raise ValueError(f"El periodo del {inicio} al {fin} se solapa con uno ya cerrado")
+    if not db.session.query(Payroll.query.filter_by(inicio=inicio, fin=fin).exists()).scalar():
+        raise ValueError(f"No hay nómina generada del {inicio} al {fin}")
+
+    filas = {}
+    for n, (tabla, model) in enumerate(ARCHIVABLES.items()):
+        if avance:
+            avance(n, len(ARCHIVABLES))
+        df   = pd.read_sql(db.select(model).where(_filtro_periodo(model, inicio, fin)),
+                           db.session.connection(), coerce_float=False)
+        t    = pa.Table.from_pandas(df, schema=_esquema_arrow(model), preserve_index=False)
+        ruta = _ruta_archivo(tabla, inicio, fin)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        pq.write_table(t, ruta + '.tmp', compression='zstd')
+        os.replace(ruta + '.tmp', ruta)
+        filas[tabla] = t.num_rows
+    db.session.add(PeriodoCerrado(inicio=inicio, fin=fin, filas=filas))
+    db.session.commit()
+    datos_modificados('payroll_close')
+
+    mensajes = [(f"Periodo del {inicio} al {fin} archivado: "
+                 + ', '.join(f"{t} {n}" for t, n in filas.items()) + " filas.", 'success')]
+    if podar:
+        mensajes += podar_periodo(inicio, fin)
+    return mensajes
+
+
+def podar_periodo(inicio, fin, avance=None):
+    """Borra de las tablas vivas un periodo cerrado, tras comprobar el archivo."""
+    import pyarrow.parquet as pq
+    cierre = db.session.get(PeriodoCerrado, (inicio, fin))
+    if cierre is None:
+        raise ValueError(f"El periodo del {inicio} al {fin} no está cerrado")
+    for tabla, model in ARCHIVABLES.items():
+        en_archivo = pq.ParquetFile(_ruta_archivo(tabla, inicio, fin)).metadata.num_rows
+        vivas      = model.query.filter(_filtro_periodo(model, inicio, fin)).count()
+        if en_archivo != cierre.filas[tabla] or vivas not in (0, en_archivo):
+            raise ValueError(f"{tabla}: el archivo tiene {en_archivo} filas y la base {vivas}; no se poda")
+    borradas = {tabla: model.query.filter(_filtro_periodo(model, inicio, fin))
+                                  .delete(synchronize_session=False)
+                for tabla, model in ARCHIVABLES.items()}
+    cierre.podado = datetime.utcnow()
+    db.session.commit()
+    datos_modificados(*ARCHIVABLES, 'payroll_close')
+    return [("Podadas de las tablas vivas: "
+             + ', '.join(f"{t} {n}" for t, n in borradas.items()) + " filas.", 'info')]
@@ -0,0 +1,73 @@
+"""Reporte de planes de consulta (flask plan-consultas)."""
+from datetime import datetime
+
+from .alcance import agentes_visibles
+from .calendario import _consulta_agregados
+from .extensiones import db
+from .modelos import Attendance, Bonus, Deduction, Employee, Payroll
+
+
+def _consultas_principales():
+    """La consulta principal de cada vista, con parámetros de ejemplo."""
+    d1, d2 = datetime(2024,1,1).date(), datetime(2024,1,15).date()
+    asis = db.session.query(Attendance.usuario, Attendance.fecha, Attendance.estado)
+    return [
+        ('list_attendance (página)',
+            Attendance.query.order_by(Attendance.fecha.desc(), Attendance.id.desc()).limit(100)),
+        ('list_attendance (supervisor)',
+            Attendance.query.filter(Attendance.usuario.in_(agentes_visibles('SUP', False)))
+            .order_by(Attendance.fecha.desc(), Attendance.id.desc()).limit(100)),
+        ('list_attendance (supervisor, jerarquía recursiva)',
+            Attendance.query.filter(Attendance.usuario.in_(agentes_visibles('SUP', True)))
+            .order_by(Attendance.fecha.desc(), Attendance.id.desc()).limit(100)),
+        ('filter_attendance (usuario + rango)',
+            asis.filter(Attendance.usuario=='agente1', Attendance.fecha.between(d1,d2))),
+        ('filter_attendance (supervisor + rango)',
+            asis.filter(Attendance.supervisor=='SUP', Attendance.fecha.between(d1,d2))),
+        ('filter_attendance (cartera + rango)',
+            asis.filter(Attendance.cartera=='CARTERA', Attendance.fecha.between(d1,d2))),
+        ('filter_attendance (rango)',
+            asis.filter(Attendance.fecha.between(d1,d2))),
+        ('list_deductions (página)',
+            Deduction.query.order_by(Deduction.fecha.desc(), Deduction.id.desc()).limit(100)),
+        ('filter_deductions (usuario + rango)',
+            Deduction.query.filter(Deduction.usuario=='agente1', Deduction.fecha.between(d1,d2))
+            .order_by(Deduction.fecha.desc(), Deduction.id.desc()).limit(100)),
+        ('filter_bonuses (usuario + rango)',
+            Bonus.query.filter(Bonus.usuario=='agente1', Bonus.fecha.between(d1,d2))
+            .order_by(Bonus.fecha.desc(), Bonus.id.desc()).limit(100)),
+        ('create_payroll (días por usuario y semana, con calendar_dim)',
+            _consulta_agregados(d1, d2)),
+        ('create_payroll (bonos por usuario)',
+            db.session.query(Bonus.usuario, db.func.sum(Bonus.monto))
+            .filter(Bonus.fecha.between(d1,d2)).group_by(Bonus.usuario)),
+        ('create_payroll (deducciones por usuario)',
+            db.session.query(Deduction.usuario, db.func.sum(Deduction.monto))
+            .filter(Deduction.fecha.between(d1,d2)).group_by(Deduction.usuario)),
+        ('list_payroll / export_payroll_xlsx',
+            db.session.query(Payroll.usuario, Employee.nombre, Payroll.neto)
+            .outerjoin(Employee, Employee.usuario==Payroll.usuario)
+            .filter(Payroll.inicio==d1, Payroll.fin==d2).order_by(Payroll.usuario)),
+        ('list_employees (supervisor)',
+            Employee.query.filter(Employee.supervisor_id=='SUP')),
+    ]
+
+
+def plan_consultas():
+    """[(vista, [líneas del plan], hay_escaneo_completo)] para la base actual."""
+    explain = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    reporte = []
+    for nombre, q in _consultas_principales():
+        comp   = q.statement.compile(db.engine, compile_kwargs={'render_postcompile': True})
+        params = comp.params
+        if comp.positiontup is not None:
+            params = tuple(params[k] for k in comp.positiontup)
+        filas  = db.session.connection().exec_driver_sql(explain + str(comp), params).all()
+        lineas = [str(f[-1]) for f in filas]
+        # SQLite: "SCAN tabla" sin índice = recorrido completo de la tabla
+        # (recorrer una CTE, p. ej. la jerarquía de supervisores, es esperado)
+        ctes = {l.split()[-1] for l in lineas if l.startswith(('CO-ROUTINE ', 'MATERIALIZE '))}
+        completo = any(l.startswith('SCAN ') and ' USING ' not in l and l.split()[1] not in ctes
+                       for l in lineas)
+        reporte.append((nombre, lineas, completo))
+    return reporte
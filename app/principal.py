@@ -0,0 +1,52 @@
+"""Dashboard, estado de los trabajos, métricas y estadísticas de los caches."""
+from flask import Blueprint, current_app, render_template, Response, jsonify, abort
+from flask_login import login_required
+
+from .caches import cache_meta, paginas
+from .directorio import directorio
+from .extensiones import db
+from .metricas import metricas
+from .modelos import Job
+
+
+bp_principal = Blueprint('principal', __name__)
+
+
+@bp_principal.route('/cache/stats')
+@login_required
+def cache_stats():
+    return jsonify(metadatos=cache_meta.stats(), directorio=directorio.stats(),
+                   paginas=paginas.stats())
+
+
+@bp_principal.route('/metrics')
+def metrics():
+    if not current_app.config['INSTRUMENTACION']:
+        abort(404)
+    endpoints = sorted({r.endpoint for r in current_app.url_map.iter_rules()})
+    return Response(metricas.texto(endpoints), mimetype='text/plain; version=0.0.4')
+
+
+# —————————————————————————————————————————————————————————
+# Dashboard
+# —————————————————————————————————————————————————————————
+@bp_principal.route('/')
+@login_required
+def dashboard():
+    return render_template('dashboard.html')
+
+
+@bp_principal.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    job = db.get_or_404(Job, job_id)
+    # Del Job y no de _avances: la consulta puede llegar a otro worker
+    return jsonify(
+        id=job.id, tipo=job.tipo, estado=job.estado,
+        avance=None if job.hechos is None else {'hechos': job.hechos, 'total': job.total},
+        mensajes=[{'texto': t, 'categoria': c} for t, c in (job.mensajes or [])],
+        error=job.error,
+        creado=job.creado and job.creado.isoformat(),
+        iniciado=job.iniciado and job.iniciado.isoformat(),
+        terminado=job.terminado and job.terminado.isoformat(),
+    )
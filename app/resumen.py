@@ -0,0 +1,203 @@
+"""Resumen materializado y matriz compacta de asistencia."""
+import calendar
+from datetime import datetime, timedelta
+from flask import request
+from collections import defaultdict, Counter
+
+from .alcance import _condicion_rol
+from .extensiones import db
+from .lotes import LOTE_IN, _insert_dialecto
+from .modelos import Attendance, AttendanceSummary, ESTADOS, PeriodoCerrado
+from .periodos import leer_archivo_periodos, periodos_cerrados
+
+
+def _inicio_mes(d):
+    return d.replace(day=1)
+
+
+def _fin_mes(d):
+    return d.replace(day=calendar.monthrange(d.year, d.month)[1])
+
+
+def _recalcular_mes(mes, usuarios=None):
+    """Vuelve a contar attendance_summary de un mes (todos o esos usuarios)."""
+    borrar = AttendanceSummary.query.filter(AttendanceSummary.mes==mes)
+    # Por la fecha de la propia asistencia: sin JOIN, ningún día se pierde
+    # aunque al calendario le falte
+    origen = db.select(
+                Attendance.usuario, db.literal(mes, db.Date),
+                Attendance.estado, db.func.count()
+             ).where(Attendance.fecha.between(mes, _fin_mes(mes)))\
+              .group_by(Attendance.usuario, Attendance.estado)
+    if usuarios is not None:
+        borrar = borrar.filter(AttendanceSummary.usuario.in_(usuarios))
+        origen = origen.where(Attendance.usuario.in_(usuarios))
+    borrar.delete(synchronize_session=False)
+    db.session.execute(db.insert(AttendanceSummary).from_select(
+        ['usuario','mes','estado','dias'], origen))
+
+    # Días de periodos ya podados: se suman desde el archivo Parquet
+    podados = [(i, f) for i, f, p in periodos_cerrados(mes, _fin_mes(mes)) if p]
+    if podados:
+        df = leer_archivo_periodos('attendance', podados, mes, _fin_mes(mes))
+        if usuarios is not None:
+            df = df[df['usuario'].isin(usuarios)]
+        conteo = df.groupby(['usuario','estado']).size().reset_index(name='dias')
+        if not conteo.empty:
+            conteo['mes'] = mes
+            stmt = _insert_dialecto()(AttendanceSummary.__table__)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['usuario','mes','estado'],
+                set_={'dias': AttendanceSummary.__table__.c.dias + stmt.excluded.dias})
+            db.session.execute(stmt, conteo.to_dict('records'))
+
+
+def refrescar_resumen(claves):
+    """Recalcula el resumen de los (usuario, fecha) tocados; no hace commit."""
+    por_mes = defaultdict(set)
+    for usr, fecha in claves:
+        por_mes[_inicio_mes(fecha)].add(usr)
+    for mes, usuarios in por_mes.items():
+        if len(usuarios) > LOTE_IN:
+            _recalcular_mes(mes)
+        else:
+            _recalcular_mes(mes, sorted(usuarios))
+
+
+def reconstruir_resumen():
+    """Rehace attendance_summary completo a partir de attendance."""
+    AttendanceSummary.query.delete()
+    d1, d2 = db.session.query(db.func.min(Attendance.fecha), db.func.max(Attendance.fecha)).one()
+    p1, p2 = db.session.query(db.func.min(PeriodoCerrado.inicio), db.func.max(PeriodoCerrado.fin))\
+               .filter(PeriodoCerrado.podado.isnot(None)).one()
+    d1 = min(filter(None, (d1, p1)), default=None)
+    d2 = max(filter(None, (d2, p2)), default=None)
+    mes = d1 and _inicio_mes(d1)
+    while mes and mes <= d2:
+        _recalcular_mes(mes)
+        mes = _fin_mes(mes) + timedelta(days=1)
+    db.session.commit()
+
+
+def _contar_asistencia(q, col_usuario):
+    """Suma filas (usuario, estado, n) de q con el rol y el ?usuario= actuales."""
+    q = q.filter(_condicion_rol(col_usuario))
+    u_sel = request.args.get('usuario','')
+    if u_sel:
+        q = q.filter(col_usuario==u_sel)
+    return q.all()
+
+
+def resumen_asistencia(start, end):
+    """{usuario: Counter(estado)} del filtro actual de filter_attendance.
+
+    Los meses completos del rango se leen de attendance_summary; sólo los
+    días sueltos de los bordes se cuentan sobre attendance. Con filtro de
+    supervisor o cartera (que no están en el resumen) se agrupa en SQL.
+    """
+    summary = defaultdict(Counter)
+    directo = db.session.query(Attendance.usuario, Attendance.estado, db.func.count())\
+                .group_by(Attendance.usuario, Attendance.estado)
+
+    if request.args.get('supervisor') or request.args.get('cartera'):
+        filas = _filtrar_asistencia(directo).all()
+    else:
+        m1 = start if start is None or start.day==1 else _fin_mes(start) + timedelta(days=1)
+        m2 = end   if end   is None or end==_fin_mes(end) else _inicio_mes(end) - timedelta(days=1)
+        if m1 and m2 and m1 > m2:
+            filas = _contar_asistencia(directo.filter(Attendance.fecha.between(start, end)),
+                                       Attendance.usuario)
+        else:
+            S = AttendanceSummary
+            q = db.session.query(S.usuario, S.estado, db.func.sum(S.dias))\
+                  .group_by(S.usuario, S.estado)
+            if m1: q = q.filter(S.mes >= m1)
+            if m2: q = q.filter(S.mes <= m2)
+            filas = _contar_asistencia(q, S.usuario)
+            if start and m1 != start:
+                filas += _contar_asistencia(directo.filter(
+                    Attendance.fecha.between(start, m1 - timedelta(days=1))), Attendance.usuario)
+            if end and m2 != end:
+                filas += _contar_asistencia(directo.filter(
+                    Attendance.fecha.between(m2 + timedelta(days=1), end)), Attendance.usuario)
+
+    for usr, estado, n in filas:
+        summary[usr][estado] += n
+    return summary
+
+
+class MatrizAsistencia:
+    """Matriz usuario × día con el estado codificado en un arreglo int8.
+
+    `matriz[usuario][fecha]` devuelve el estado (o None) como el dict anidado
+    anterior; iterarla da (usuario, [estado o '' por día]) para la plantilla.
+    """
+    __slots__ = ('usuarios', 'fechas', 'codigos', '_fila')
+
+    def __init__(self, usuarios, fechas, codigos):
+        self.usuarios = usuarios
+        self.fechas   = fechas
+        self.codigos  = codigos
+        self._fila    = {u: i for i, u in enumerate(usuarios)}
+
+    @classmethod
+    def construir(cls, celdas, fechas):
+        """celdas: (usuario, fecha, estado) · fechas: eje de días consecutivos."""
+        import numpy as np
+        import pandas as pd
+        df = pd.DataFrame(celdas, columns=['usuario','fecha','estado'])
+        if df.empty or not fechas:
+            return cls([], fechas, np.full((0, len(fechas)), -1, dtype=np.int8))
+        col = (pd.to_datetime(df['fecha']) - pd.Timestamp(fechas[0])).dt.days.to_numpy()
+        ok  = (col >= 0) & (col < len(fechas))
+        fila, usuarios = pd.factorize(df['usuario'][ok], sort=True)
+        codigos = np.full((len(usuarios), len(fechas)), -1, dtype=np.int8)
+        codigos[fila, col[ok]] = pd.Categorical(df['estado'][ok], categories=ESTADOS).codes
+        return cls(list(usuarios), fechas, codigos)
+
+    def __len__(self):
+        return len(self.usuarios)
+
+    def __iter__(self):
+        import numpy as np
+        etiquetas = np.array(list(ESTADOS) + [''], dtype=object)[self.codigos]  # -1 → ''
+        for usuario, fila in zip(self.usuarios, etiquetas):
+            yield usuario, fila.tolist()
+
+    def __getitem__(self, usuario):
+        i = self._fila.get(usuario)
+        return _FilaMatriz(self.codigos[i] if i is not None else None,
+                           self.fechas[0] if self.fechas else None)
+
+
+class _FilaMatriz:
+    __slots__ = ('codigos', 'inicio')
+
+    def __init__(self, codigos, inicio):
+        self.codigos = codigos
+        self.inicio  = inicio
+
+    def __getitem__(self, fecha):
+        if self.codigos is None:
+            return None
+        j = (fecha - self.inicio).days
+        if not 0 <= j < len(self.codigos) or self.codigos[j] < 0:
+            return None
+        return ESTADOS[self.codigos[j]]
+
+
+def _filtrar_asistencia(q):
+    """Aplica el alcance del rol y los filtros de request.args a una consulta de asistencia."""
+    q = q.filter(_condicion_rol(Attendance.usuario))
+
+    u_sel = request.args.get('usuario','')
+    s_sel = request.args.get('supervisor','')
+    c_sel = request.args.get('cartera','')
+    d1    = request.args.get('start_date','')
+    d2    = request.args.get('end_date','')
+    if u_sel: q = q.filter(Attendance.usuario==u_sel)
+    if s_sel: q = q.filter(Attendance.supervisor==s_sel)
+    if c_sel: q = q.filter(Attendance.cartera==c_sel)
+    if d1:    q = q.filter(Attendance.fecha >= datetime.strptime(d1,'%Y-%m-%d').date())
+    if d2:    q = q.filter(Attendance.fecha <= datetime.strptime(d2,'%Y-%m-%d').date())
+    return q
@@ -0,0 +1,201 @@
+"""Trabajos en segundo plano (cargas y nómina fuera del hilo HTTP)."""
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app, request, redirect, url_for, flash, jsonify
+from flask_login import current_user
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from uuid import uuid4
+from sqlalchemy.exc import IntegrityError
+
+from .extensiones import db
+from .modelos import Job
+
+
+_executor = None                   # se crea con el primer trabajo del proceso
+_avances  = {}                     # job_id -> (hechos, total); el latido lo lleva al Job
+_claves   = {}                     # clave -> [lock, trabajos que la esperan o la tienen]
+_claves_lock = threading.Lock()
+
+
+def _pool_trabajos():
+    global _executor
+    with _claves_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=current_app.config['JOB_WORKERS'],
+                                           thread_name_prefix='job')
+        return _executor
+
+
+def detener_trabajos():
+    """Espera a que terminen los trabajos en curso (al apagar un worker)."""
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+
+
+def _proceso():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def marcar_huerfanos():
+    """Pasa a 'error' los jobs cuyo worker ya no existe o dejó de latir; no hace commit.
+
+    Los trabajos viven en el pool del worker que los encoló: si gunicorn lo
+    recicla (max_requests) y no terminan dentro de graceful_timeout, o lo mata
+    por timeout, el job quedaría 'pendiente' o 'ejecutando' para siempre y su
+    clave ocupada. En este equipo se reconoce por el pid; en cualquier equipo
+    (un contenedor que se reinició cambia de nombre), por un latido de más de
+    JOB_VENCE segundos. Se llama al arrancar el servidor, al nacer cada
+    worker y mientras un trabajo espera su clave.
+    """
+    vence = datetime.utcnow() - timedelta(seconds=current_app.config['JOB_VENCE'])
+    latido = db.func.coalesce(Job.latido, Job.creado)
+    activos = db.session.query(Job, (Job.estado == 'ejecutando') & (latido < vence))\
+                .filter(Job.estado.in_(['pendiente', 'ejecutando'])).filter(db.or_(
+                    Job.proceso.startswith(f"{socket.gethostname()}:", autoescape=True),
+                    (Job.estado == 'ejecutando') & (latido < vence)))
+    huerfanos = [job for job, vencido in activos
+                 if vencido or not _vivo(int(job.proceso.rsplit(':', 1)[1]))]
+    for job in huerfanos:
+        job.estado, job.terminado = 'error', datetime.utcnow()
+        job.error = "Interrumpido: el worker que lo ejecutaba terminó; vuelve a enviarlo"
+    return len(huerfanos)
+
+
+def encolar(tipo, fn, *args, clave=None):
+    """Registra un Job y ejecuta fn(*args, avance=…) en el pool de trabajos."""
+    job = Job(id=uuid4().hex, tipo=tipo, clave=clave, usuario=current_user.get_id(),
+              proceso=_proceso())
+    db.session.add(job)
+    db.session.commit()
+    _pool_trabajos().submit(_ejecutar_job, current_app._get_current_object(),
+                            job.id, clave, fn, args)
+    return job
+
+
+@contextmanager
+def _candado_clave(clave):
+    """Serializa en este proceso los trabajos con la misma clave (entre workers, _tomar_job).
+
+    La entrada de _claves se borra cuando ningún trabajo la usa, así el dict
+    no crece con cada periodo o archivo que pasó por el pool.
+    """
+    if not clave:
+        yield
+        return
+    with _claves_lock:
+        entrada = _claves.setdefault(clave, [threading.Lock(), 0])
+        entrada[1] += 1
+    try:
+        with entrada[0]:
+            yield
+    finally:
+        with _claves_lock:
+            entrada[1] -= 1
+            if not entrada[1]:
+                del _claves[clave]
+
+
+def _tomar_job(job_id):
+    """Pasa el job a 'ejecutando'; False si otro worker ya ejecuta uno con su clave.
+
+    El reclamo es el índice único parcial uix_job_clave_ejecutando: la base
+    rechaza el segundo UPDATE aunque venga de otro proceso o de otro equipo.
+    """
+    try:
+        ahora = datetime.utcnow()
+        db.session.execute(db.update(Job).where(Job.id == job_id).values(
+            estado='ejecutando', iniciado=ahora, latido=ahora, proceso=_proceso()))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+
+@contextmanager
+def _latido(app, job_id):
+    """Renueva job.latido y guarda el avance cada JOB_LATIDO s mientras corre el trabajo.
+
+    Va en su propio hilo y su propia sesión: el trabajo no hace commit a
+    medias por reportar avance, y un paso largo sin avance no deja vencer
+    el reclamo de la clave.
+    """
+    fin = threading.Event()
+
+    def latir():
+        with app.app_context():
+            while not fin.wait(app.config['JOB_LATIDO']):
+                hechos, total = _avances.get(job_id, (None, None))
+                try:
+                    db.session.execute(db.update(Job).where(Job.id == job_id).values(
+                        latido=datetime.utcnow(), hechos=hechos, total=total))
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("No se pudo renovar el job %s", job_id)
+
+    hilo = threading.Thread(target=latir, name=f'latido-{job_id[:8]}', daemon=True)
+    hilo.start()
+    try:
+        yield
+    finally:
+        fin.set()
+        hilo.join()
+
+
+def _ejecutar_job(app, job_id, clave, fn, args):
+    def avance(hechos, total):
+        _avances[job_id] = (hechos, total)
+
+    with app.app_context(), _candado_clave(clave):
+        limite = time.monotonic() + app.config['JOB_ESPERA_MAX']
+        while not _tomar_job(job_id):
+            # Si quien la tiene murió o dejó de latir, su job pasa a 'error' y la clave queda libre
+            if marcar_huerfanos():
+                db.session.commit()
+            elif time.monotonic() > limite:
+                job = db.session.get(Job, job_id)
+                job.estado, job.terminado = 'error', datetime.utcnow()
+                job.error = (f"Otro trabajo con la clave {clave} siguió en curso más de "
+                             f"{app.config['JOB_ESPERA_MAX']:g} s; vuelve a enviarlo")
+                db.session.commit()
+                return
+            else:
+                time.sleep(app.config['JOB_ESPERA'])
+        job = db.session.get(Job, job_id)
+        try:
+            with _latido(app, job_id):
+                mensajes = fn(*args, avance=avance)
+            job.estado, job.mensajes = 'terminado', mensajes
+        except Exception as ex:
+            db.session.rollback()
+            app.logger.exception("Job %s (%s) falló", job_id, job.tipo)
+            job.estado, job.error = 'error', str(ex)
+        job.terminado = datetime.utcnow()
+        if job_id in _avances:
+            job.hechos, job.total = _avances.pop(job_id)
+        db.session.commit()
+
+
+def respuesta_job(job, destino):
+    """202 con el id para clientes JSON; para el navegador, flash y redirect."""
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(id=job.id, estado=job.estado,
+                       url=url_for('principal.job_status', job_id=job.id)), 202
+    flash(f"Trabajo {job.id} en proceso; consulta el avance en "
+          f"{url_for('principal.job_status', job_id=job.id)}", 'info')
+    return redirect(destino)
@@ -0,0 +1,131 @@
+"""Tiempo de arranque en frío: importar la app, crearla y atender /login.
+
+Uso:
+    python bench/arranque.py [--repeticiones 5] [--comparar REV] [--salida resultados.json]
+
+Cada medida corre en un intérprete nuevo, como un worker o un comando
+`flask` recién lanzado:
+
+- `python -X importtime -c "import app"`: tiempo acumulado de importar app
+  y qué módulos pesados (pandas, numpy, xlsxwriter, pdfkit) trajo consigo;
+- el proceso completo (arranque de Python incluido) hasta tener la app
+  creada, y hasta la primera respuesta de GET /login con el cliente de
+  pruebas, junto con los módulos pesados cargados en ese momento.
+
+Con --comparar REV la misma medición se repite sobre esa revisión de git,
+extraída con `git archive` a un directorio temporal (p. ej. --comparar HEAD~1
+para medir contra el árbol anterior a la fábrica de la app). Imprime (o
+guarda) un JSON con las medianas.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ    = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PESADOS = ['pandas', 'numpy', 'xlsxwriter', 'pdfkit', 'lectura']
+
+# Sirve para los dos árboles: antes de la fábrica `import app` ya creaba la app
+CREAR = """
+import app as modulo
+app = modulo.create_app() if hasattr(modulo, 'create_app') else modulo.app
+"""
+LOGIN = CREAR + """
+from jinja2 import ChoiceLoader, DictLoader
+app.jinja_loader = ChoiceLoader([app.jinja_loader, DictLoader({'login.html': ''})])
+assert app.test_client().get('/login').status_code == 200
+"""
+REPORTE = """
+import json, sys
+print(json.dumps([m for m in %r if m in sys.modules]))
+""" % PESADOS
+
+
+def _correr(codigo, arbol, entorno, importtime=False):
+    """(segundos de reloj del proceso, stdout, stderr)."""
+    cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', codigo]
+    t0 = time.perf_counter()
+    r = subprocess.run(cmd, cwd=arbol, env=entorno, capture_output=True, text=True)
+    dur = time.perf_counter() - t0
+    if r.returncode:
+        raise RuntimeError(f"falló en {arbol}:\n{r.stderr[-2000:]}")
+    return dur, r.stdout, r.stderr
+
+
+def _importtime(stderr):
+    """{módulo: µs acumulados} de las líneas de -X importtime."""
+    tiempos = {}
+    for linea in stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, acumulado, nombre = linea[len('import time:'):].split('|')
+        tiempos[nombre.strip()] = int(acumulado)
+    return tiempos
+
+
+def medir(arbol, repeticiones):
+    tmp = tempfile.mkdtemp(prefix='nomina_arranque_')
+    entorno = dict(os.environ, PYTHONPATH=arbol,
+                   NOMINA_DB='sqlite:///' + os.path.join(tmp, 'arranque.db'))
+    try:
+        _correr(LOGIN, arbol, entorno)              # compila los .pyc: se mide el caso caliente de disco
+        importar, crear, login = [], [], []
+        for _ in range(repeticiones):
+            _, _, err = _correr('import app', arbol, entorno, importtime=True)
+            importar.append(_importtime(err)['app'] / 1000)
+            crear.append(_correr(CREAR, arbol, entorno)[0] * 1000)
+            login.append(_correr(LOGIN, arbol, entorno)[0] * 1000)
+        tiempos = _importtime(err)
+        _, cargados, _ = _correr(LOGIN + REPORTE, arbol, entorno)
+        return {
+            'import_app_ms':         round(statistics.median(importar), 1),
+            'proceso_crear_app_ms':  round(statistics.median(crear), 1),
+            'proceso_login_ms':      round(statistics.median(login), 1),
+            'importados_con_app':    {m: round(tiempos[m] / 1000, 1) for m in PESADOS if m in tiempos},
+            'cargados_tras_login':   json.loads(cargados),
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def extraer(rev):
+    destino = tempfile.mkdtemp(prefix='nomina_rev_')
+    archivo = subprocess.run(['git', 'archive', rev], cwd=RAIZ, capture_output=True, check=True)
+    subprocess.run(['tar', '-x', '-C', destino], input=archivo.stdout, check=True)
+    return destino
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument('--repeticiones', type=int, default=5)
+    p.add_argument('--comparar', metavar='REV', help='revisión de git a medir también')
+    p.add_argument('--salida', help='archivo JSON de resultados (por defecto stdout)')
+    args = p.parse_args()
+
+    resultados = {'actual': medir(RAIZ, args.repeticiones)}
+    if args.comparar:
+        arbol = extraer(args.comparar)
+        try:
+            resultados[args.comparar] = medir(arbol, args.repeticiones)
+        finally:
+            shutil.rmtree(arbol, ignore_errors=True)
+        antes, ahora = resultados[args.comparar], resultados['actual']
+        resultados['mejora_x'] = {c: round(antes[c] / ahora[c], 2)
+                                  for c in ('import_app_ms', 'proceso_crear_app_ms', 'proceso_login_ms')}
+
+    salida = json.dumps({'config': {'repeticiones': args.repeticiones, 'python': sys.version.split()[0]},
+                         'resultados': resultados}, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            f.write(salida + '\n')
+    else:
+        print(salida)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark del cálculo de nómina: tiempo de generar_nomina según el número
+de empleados.
+
+Uso:
+    python bench/bench_payroll.py [--tamanos 100 1000 10000] [--legado]
+
+Crea una base SQLite temporal (no toca foco.db), la llena con datos
+sintéticos de una quincena y mide generar_nomina(). Con --legado mide también
+el cálculo anterior (cuatro consultas por empleado) hasta 1,000 empleados.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+_tmp = tempfile.mkdtemp(prefix='nomina_bench_')
+os.environ['NOMINA_DB'] = 'sqlite:///' + os.path.join(_tmp, 'bench.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datos  # noqa: E402
+from app import (  # noqa: E402
+    create_app, db, Employee, Attendance, Bonus, Deduction, Payroll, generar_nomina
+)
+
+app = create_app()
+
+INICIO = date(2024, 1, 1)
+FIN    = date(2024, 1, 15)
+
+
+def nomina_legado(inicio, fin):
+    """Réplica del cálculo anterior, sólo para comparar."""
+    Payroll.query.filter_by(inicio=inicio, fin=fin).delete()
+    db.session.commit()
+    for emp in Employee.query.all():
+        full = Attendance.query.filter_by(usuario=emp.usuario)\
+               .filter(Attendance.fecha.between(inicio,fin))\
+               .filter(Attendance.estado.in_(['A','V'])).count()
+        half = Attendance.query.filter_by(usuario=emp.usuario)\
+               .filter(Attendance.fecha.between(inicio,fin), Attendance.estado=='MG').count()
+        sb = emp.salario_diario * (2*full + half) / 2
+        tb = sum(b.monto for b in Bonus.query.filter_by(usuario=emp.usuario)
+                 .filter(Bonus.fecha.between(inicio,fin)))
+        td = sum(d.monto for d in Deduction.query.filter_by(usuario=emp.usuario)
+                 .filter(Deduction.fecha.between(inicio,fin)))
+        db.session.add(Payroll(usuario=emp.usuario, inicio=inicio, fin=fin,
+                               sueldo_base=sb, total_bonos=tb,
+                               total_deducciones=td, neto=sb+tb-td))
+    db.session.commit()
+
+
+def medir(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument('--tamanos', type=int, nargs='+', default=[100, 1000, 10000])
+    p.add_argument('--legado', action='store_true',
+                   help='medir también el cálculo anterior (hasta 1,000 empleados)')
+    args = p.parse_args()
+
+    print(f"{'empleados':>10} {'nuevo (s)':>10} {'ms/emp':>8} {'legado (s)':>11}")
+    with app.app_context():
+        for n in args.tamanos:
+            datos.poblar(n, dias=(FIN-INICIO).days+1, inicio=INICIO)
+            t = medir(generar_nomina, INICIO, FIN)
+            legado = ''
+            if args.legado and n <= 1000:
+                legado = f"{medir(nomina_legado, INICIO, FIN):11.3f}"
+            print(f"{n:>10} {t:>10.3f} {1000*t/n:>8.3f} {legado:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""Prueba de carga concurrente: servidor de desarrollo contra gunicorn.
+
+Uso:
+    python bench/carga.py [--empleados 2000] [--concurrencia 16] [--duracion 20]
+                          [--servidor desarrollo gunicorn] [--salida resultados.json]
+    python bench/carga.py --url http://host:8000 [--usuario admin --clave admin123]
+
+Sin --url crea una base SQLite temporal con bench/datos.py, genera la
+nómina del periodo y levanta cada servidor en un subproceso: «desarrollo»
+es `flask run --without-threads` (un solo hilo) y «gunicorn» usa
+gunicorn.conf.py. Cada usuario virtual repite login → filtro de asistencia
+→ exportación de nómina durante --duracion segundos. Imprime (o guarda) un
+JSON con solicitudes por segundo y p50/p95 por ruta para cada servidor.
+
+Si el árbol no trae las plantillas HTML, los servidores usan plantillas
+mínimas, igual que bench/suite.py.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+RAIZ  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH = os.path.dirname(os.path.abspath(__file__))
+INICIO, FIN = '2024-01-01', '2024-01-15'
+PLANTILLAS_MIN = ['login.html', 'attendance_filter.html', 'payroll_list.html', 'upload.html']
+
+
+def app_bench():
+    """La app con plantillas mínimas si faltan (para `carga:app_bench()`)."""
+    from jinja2 import ChoiceLoader, DictLoader
+    from app import create_app
+    app = create_app()
+    if not os.path.isdir(os.path.join(app.root_path, app.template_folder)):
+        app.jinja_loader = ChoiceLoader([app.jinja_loader,
+                                         DictLoader({n: '' for n in PLANTILLAS_MIN})])
+    return app
+
+
+def percentil(valores, p):
+    orden = sorted(valores)
+    if not orden:
+        return None
+    k = (len(orden) - 1) * p / 100
+    i = int(k)
+    return orden[i] if i+1 >= len(orden) else orden[i] + (orden[i+1]-orden[i]) * (k-i)
+
+
+class _SinRedireccion(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None                     # el 302 del login se cuenta como respuesta
+
+
+def _cliente():
+    return urllib.request.build_opener(
+        urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _SinRedireccion)
+
+
+def _pedir(cliente, url, datos=None):
+    """(estado, bytes) leyendo el cuerpo completo; los 4xx/5xx no lanzan."""
+    cuerpo = urllib.parse.urlencode(datos).encode('ascii') if datos else None
+    try:
+        with cliente.open(url, cuerpo, timeout=600) as r:
+            return r.status, len(r.read())
+    except urllib.error.HTTPError as ex:
+        return ex.code, len(ex.read())
+
+
+def usuario_virtual(base, usuario, clave, hasta, medidas, lock):
+    cliente = _cliente()
+    rutas = [
+        ('login',  lambda: _pedir(cliente, f"{base}/login", {'username': usuario, 'password': clave})),
+        ('filtro', lambda: _pedir(cliente, f"{base}/attendance/filter?start_date={INICIO}&end_date={FIN}")),
+        ('export', lambda: _pedir(cliente, f"{base}/payroll/export?inicio={INICIO}&fin={FIN}")),
+    ]
+    while time.monotonic() < hasta:
+        for nombre, fn in rutas:
+            t0 = time.perf_counter()
+            try:
+                estado, _ = fn()
+            except OSError:
+                estado = 'conexion'
+            dur = (time.perf_counter() - t0) * 1000
+            with lock:
+                medidas.append((nombre, estado, dur))
+
+
+def carga(base, usuario, clave, concurrencia, duracion):
+    medidas, lock = [], threading.Lock()
+    hasta = time.monotonic() + duracion
+    hilos = [threading.Thread(target=usuario_virtual,
+                              args=(base, usuario, clave, hasta, medidas, lock))
+             for _ in range(concurrencia)]
+    t0 = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    total_s = time.perf_counter() - t0
+
+    rutas = {}
+    for nombre in dict.fromkeys(m[0] for m in medidas):
+        tiempos = [d for n, _, d in medidas if n == nombre]
+        errores = sum(1 for n, e, _ in medidas if n == nombre and not (isinstance(e, int) and e < 400))
+        rutas[nombre] = {'solicitudes': len(tiempos), 'errores': errores,
+                         'p50_ms': round(percentil(tiempos, 50), 1),
+                         'p95_ms': round(percentil(tiempos, 95), 1)}
+    return {'solicitudes': len(medidas), 'segundos': round(total_s, 2),
+            'solicitudes_s': round(len(medidas) / total_s, 1), 'rutas': rutas}
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _comando(servidor, puerto):
+    if servidor == 'desarrollo':
+        return [sys.executable, '-m', 'flask', '--app', 'carga:app_bench()', 'run',
+                '--without-threads', '--port', str(puerto)]
+    return [sys.executable, '-m', 'gunicorn', '-c', os.path.join(RAIZ, 'gunicorn.conf.py'),
+            '--bind', f"127.0.0.1:{puerto}", 'carga:app_bench()']
+
+
+def levantar(servidor, entorno, log):
+    puerto = _puerto_libre()
+    proc = subprocess.Popen(_comando(servidor, puerto), cwd=RAIZ, env=entorno,
+                            stdout=log, stderr=subprocess.STDOUT)
+    base = f"http://127.0.0.1:{puerto}"
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{servidor} terminó al arrancar (código {proc.returncode}); ver {log.name}")
+        try:
+            _pedir(_cliente(), f"{base}/login")
+            return proc, base
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{servidor} no respondió en 60 s; ver {log.name}")
+
+
+def preparar_base(empleados):
+    tmp = tempfile.mkdtemp(prefix='nomina_carga_')
+    os.environ['NOMINA_DB'] = 'sqlite:///' + os.path.join(tmp, 'carga.db')
+    sys.path[:0] = [RAIZ, BENCH]
+    from datetime import date
+    import datos
+    from app import create_app, db, generar_nomina
+    with create_app().app_context():
+        datos.poblar(empleados)
+        generar_nomina(date(2024, 1, 1), date(2024, 1, 15))
+        db.engine.dispose()
+    return tmp
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument('--url', help='servidor ya levantado (no crea base ni procesos)')
+    p.add_argument('--usuario', default='admin')
+    p.add_argument('--clave', default='admin123')
+    p.add_argument('--empleados', type=int, default=2000)
+    p.add_argument('--concurrencia', type=int, default=16, help='usuarios virtuales')
+    p.add_argument('--duracion', type=float, default=20, help='segundos por servidor')
+    p.add_argument('--servidor', nargs='+', choices=['desarrollo', 'gunicorn'],
+                   default=['desarrollo', 'gunicorn'])
+    p.add_argument('--salida', help='archivo JSON de resultados (por defecto stdout)')
+    args = p.parse_args()
+
+    resultados = {}
+    if args.url:
+        resultados[args.url] = carga(args.url.rstrip('/'), args.usuario, args.clave,
+                                     args.concurrencia, args.duracion)
+    else:
+        tmp = preparar_base(args.empleados)
+        entorno = dict(os.environ, PYTHONPATH=os.pathsep.join(
+            [RAIZ, BENCH, os.environ.get('PYTHONPATH', '')]))
+        for servidor in args.servidor:
+            with open(os.path.join(tmp, f"{servidor}.log"), 'w') as log:
+                proc, base = levantar(servidor, entorno, log)
+                try:
+                    resultados[servidor] = carga(base, args.usuario, args.clave,
+                                                 args.concurrencia, args.duracion)
+                finally:
+                    proc.terminate()
+                    proc.wait(30)
+    if len(resultados) == 2 and resultados.get('desarrollo', {}).get('solicitudes_s'):
+        resultados['mejora_x'] = round(resultados['gunicorn']['solicitudes_s']
+                                       / resultados['desarrollo']['solicitudes_s'], 2)
+
+    salida = json.dumps({
+        'config': {'empleados': args.empleados, 'concurrencia': args.concurrencia,
+                   'duracion_s': args.duracion},
+        'resultados': resultados,
+    }, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            f.write(salida + '\n')
+    else:
+        print(salida)
+
+
+if __name__ == '__main__':
+    main()
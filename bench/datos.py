@@ -0,0 +1,84 @@
+"""Generador de datos sintéticos para los benchmarks.
+
+Llena la base configurada (NOMINA_DB) con empleados, asistencia, bonos y
+deducciones a la escala indicada. Se importa desde los scripts de bench/
+después de fijar NOMINA_DB, para no tocar nunca foco.db.
+"""
+import io
+import random
+from datetime import date, timedelta
+
+ESTADOS_PESO = ['A']*12 + ['V', 'MG', 'F', 'D']
+
+
+def dias_periodo(inicio, dias):
+    return [inicio + timedelta(days=i) for i in range(dias)]
+
+
+def poblar(empleados, dias=15, densidad_bonos=1.0, densidad_deducciones=1.0,
+           inicio=date(2024, 1, 1), supervisores=20, seed=0):
+    """Recrea el esquema y lo llena con datos sintéticos.
+
+    `densidad_*` es el promedio de bonos/deducciones por empleado en el
+    periodo. Devuelve el usuario administrador para iniciar sesión.
+    """
+    from app import (db, migrar, reconstruir_resumen, datos_modificados,
+                     Employee, Attendance, Bonus, Deduction)
+    rnd = random.Random(seed)
+    db.drop_all()
+    migrar()
+
+    fechas = dias_periodo(inicio, dias)
+    sups   = [f"sup{k:03d}" for k in range(supervisores)]
+    carteras = ['NORTE', 'SUR', 'CENTRO', 'COBRANZA']
+    emp = [{'usuario': 'admin_bench', 'nombre': 'Admin', 'salario_diario': 1,
+            'puesto': 'Admin', 'is_admin': True}]
+    emp += [{'usuario': s, 'nombre': f"Supervisor {s}", 'salario_diario': 800,
+             'puesto': 'Supervisor', 'is_supervisor': True} for s in sups]
+    asis, bonos, deds = [], [], []
+    for k in range(empleados):
+        usr = f"u{k:06d}"
+        sup = sups[k % len(sups)]
+        car = carteras[k % len(carteras)]
+        emp.append({'usuario': usr, 'nombre': f"Agente {k}",
+                    'salario_diario': round(rnd.uniform(200, 600), 2),
+                    'puesto': 'Agente', 'supervisor_id': sup})
+        for d in fechas:
+            asis.append({'usuario': usr, 'fecha': d, 'estado': rnd.choice(ESTADOS_PESO),
+                         'supervisor': sup, 'cartera': car})
+        for _ in range(_poisson(rnd, densidad_bonos)):
+            bonos.append({'usuario': usr, 'fecha': rnd.choice(fechas), 'tipo': 'Productividad',
+                          'monto': round(rnd.uniform(50, 500), 2), 'observacion': ''})
+        for _ in range(_poisson(rnd, densidad_deducciones)):
+            deds.append({'usuario': usr, 'fecha': rnd.choice(fechas), 'tipo': 'Retardo',
+                         'monto': round(rnd.uniform(10, 200), 2), 'observacion': ''})
+
+    for model, filas in ((Employee, emp), (Attendance, asis), (Bonus, bonos), (Deduction, deds)):
+        for i in range(0, len(filas), 50000):
+            db.session.execute(db.insert(model), filas[i:i+50000])
+    db.session.commit()
+    datos_modificados('employee', 'attendance', 'bonus', 'deduction')
+    reconstruir_resumen()
+    return 'admin_bench'
+
+
+def archivo_asistencia(empleados, dias=15, inicio=date(2024, 1, 1), seed=1):
+    """Contenido .xlsx de una carga de asistencia con el formato de /upload."""
+    import pandas as pd
+    rnd = random.Random(seed)
+    filas = [{'Usuario': f"u{k:06d}", 'Fecha': d, 'Estado': rnd.choice(ESTADOS_PESO),
+              'SUP': f"sup{k % 20:03d}", 'CARTERA': 'NORTE'}
+             for k in range(empleados) for d in dias_periodo(inicio, dias)]
+    buf = io.BytesIO()
+    pd.DataFrame(filas).to_excel(buf, index=False)
+    return buf.getvalue()
+
+
+def _poisson(rnd, media):
+    # Suficiente para densidades pequeñas; evita depender de numpy aquí
+    n, p, limite = 0, 1.0, pow(2.718281828459045, -media)
+    while True:
+        p *= rnd.random()
+        if p <= limite:
+            return n
+        n += 1
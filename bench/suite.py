@@ -0,0 +1,164 @@
+"""Suite de benchmarks de las rutas calientes a través del cliente de pruebas.
+
+Uso:
+    python bench/suite.py [--empleados 1000] [--dias 15] [--bonos 1.0]
+                          [--repeticiones 5] [--salida resultados.json]
+
+Crea una base SQLite temporal con bench/datos.py y mide create_payroll,
+la carga de asistencia (/upload/asistencia), filter_attendance y
+export_payroll_xlsx. Las rutas que encolan un trabajo se miden hasta que el
+trabajo termina. Imprime (o guarda) un JSON con p50/p95 por escenario, el
+pico de RSS del proceso y las consultas SQL por iteración.
+
+Si el árbol no trae las plantillas HTML, se usan plantillas mínimas para
+medir la lógica de las vistas sin el renderizado real.
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+_tmp = tempfile.mkdtemp(prefix='nomina_bench_')
+os.environ['NOMINA_DB'] = 'sqlite:///' + os.path.join(_tmp, 'bench.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jinja2 import ChoiceLoader, DictLoader  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import datos  # noqa: E402
+from app import create_app, db  # noqa: E402
+
+# Sin cache de páginas: cada repetición mide la consulta y el render, no un acierto
+app = create_app({'PAGINAS_MB': 0})
+
+INICIO, FIN = '2024-01-01', '2024-01-15'
+contador = None
+PLANTILLAS_MIN = ['attendance_filter.html', 'payroll_list.html', 'upload.html']
+
+
+def percentil(valores, p):
+    orden = sorted(valores)
+    k = (len(orden) - 1) * p / 100
+    i = int(k)
+    return orden[i] if i+1 >= len(orden) else orden[i] + (orden[i+1]-orden[i]) * (k-i)
+
+
+def rss_pico_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # KB en Linux
+
+
+class ContadorSQL:
+    """Cuenta sentencias SQL, sin las del sondeo de /jobs/<id>."""
+
+    def __init__(self, engine):
+        self.n = 0
+        self.hilo_ignorado = None
+        event.listen(engine, 'before_cursor_execute', self._contar)
+
+    def _contar(self, *args):
+        if threading.get_ident() != self.hilo_ignorado:
+            self.n += 1
+
+
+def esperar_job(cliente, resp):
+    assert resp.status_code == 202, resp.status_code
+    url = resp.get_json()['url']
+    while True:
+        contador.hilo_ignorado = threading.get_ident()
+        try:
+            estado = cliente.get(url).get_json()
+        finally:
+            contador.hilo_ignorado = None
+        if estado['estado'] in ('terminado', 'error'):
+            assert estado['estado'] == 'terminado', estado['error']
+            return
+        time.sleep(0.005)
+
+
+def escenarios(cliente, archivo):
+    json_hdr = {'Accept': 'application/json'}
+    return {
+        'create_payroll': lambda: esperar_job(cliente, cliente.post(
+            '/payroll/create', data={'inicio': INICIO, 'fin': FIN}, headers=json_hdr)),
+        'upload_asistencia': lambda: esperar_job(cliente, cliente.post(
+            '/upload/asistencia', headers=json_hdr,
+            data={'file': (io.BytesIO(archivo), 'asistencia.xlsx')})),
+        'filter_attendance': lambda: _ok(cliente.get(
+            f'/attendance/filter?start_date={INICIO}&end_date={FIN}')),
+        'export_payroll_xlsx': lambda: _ok(cliente.get(
+            f'/payroll/export?inicio={INICIO}&fin={FIN}')),
+    }
+
+
+def _ok(resp):
+    assert resp.status_code == 200, resp.status_code
+    resp.get_data()          # consume el streaming completo
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument('--empleados', type=int, default=1000)
+    p.add_argument('--dias', type=int, default=15)
+    p.add_argument('--bonos', type=float, default=1.0, help='bonos y deducciones promedio por empleado')
+    p.add_argument('--repeticiones', type=int, default=5)
+    p.add_argument('--solo', nargs='*', help='escenarios a correr (por defecto todos)')
+    p.add_argument('--salida', help='archivo JSON de resultados (por defecto stdout)')
+    args = p.parse_args()
+
+    if not os.path.isdir(os.path.join(app.root_path, app.template_folder)):
+        app.jinja_loader = ChoiceLoader([app.jinja_loader,
+                                         DictLoader({n: '' for n in PLANTILLAS_MIN})])
+
+    with app.app_context():
+        t0 = time.perf_counter()
+        admin = datos.poblar(args.empleados, args.dias, args.bonos, args.bonos)
+        carga_s = time.perf_counter() - t0
+        global contador
+        contador = ContadorSQL(db.engine)
+    archivo = datos.archivo_asistencia(args.empleados, args.dias)
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as s:
+        s['_user_id'] = admin
+        s['_fresh'] = True
+
+    resultados = {}
+    for nombre, fn in escenarios(cliente, archivo).items():
+        if args.solo and nombre not in args.solo:
+            continue
+        fn()                                    # calentamiento
+        tiempos, consultas = [], []
+        for _ in range(args.repeticiones):
+            contador.n = 0
+            t0 = time.perf_counter()
+            fn()
+            tiempos.append((time.perf_counter() - t0) * 1000)
+            consultas.append(contador.n)
+        resultados[nombre] = {
+            'p50_ms':      round(percentil(tiempos, 50), 2),
+            'p95_ms':      round(percentil(tiempos, 95), 2),
+            'min_ms':      round(min(tiempos), 2),
+            'consultas':   round(sum(consultas) / len(consultas), 1),
+            'rss_pico_mb': round(rss_pico_mb(), 1),
+        }
+
+    salida = json.dumps({
+        'config': {'empleados': args.empleados, 'dias': args.dias, 'bonos': args.bonos,
+                   'repeticiones': args.repeticiones, 'poblar_s': round(carga_s, 2)},
+        'resultados': resultados,
+    }, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            f.write(salida + '\n')
+    else:
+        print(salida)
+
+
+if __name__ == '__main__':
+    main()
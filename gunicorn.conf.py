@@ -0,0 +1,93 @@
+"""Configuración de gunicorn para producción.
+
+Uso:
+    gunicorn -c gunicorn.conf.py
+
+Varios procesos worker con hilos cada uno (gthread): una exportación lenta
+ocupa un hilo, no el servidor. La app se crea (create_app) una sola vez en
+el proceso maestro (preload) junto con las migraciones, el calendario y el
+directorio de empleados, así que los workers nacen por fork ya calientes.
+
+Recarga sin cortar solicitudes:
+    kill -HUP <maestro>     workers nuevos con la configuración releída; los
+                            viejos terminan lo que tienen (graceful_timeout)
+    kill -USR2 <maestro>    maestro nuevo con el código nuevo (con preload el
+                            HUP no relee el paquete app); luego kill -TERM al viejo
+
+Las cargas y la nómina (encolar) corren en un pool de hilos dentro del worker
+que las recibió, no en un proceso aparte: viven lo que vive ese worker. Al
+reciclarlo (max_requests) o con HUP, worker_exit espera sus trabajos hasta
+graceful_timeout; si no alcanzan, o si el worker muere por timeout, su job
+queda huérfano y pasa a 'error' en cuanto arranca el worker que lo reemplaza
+(post_fork) o el servidor (on_starting), para que el usuario lo reenvíe.
+NOMINA_GRACEFUL debe cubrir la nómina más larga que se espere. Dos trabajos
+con la misma clave (periodo de nómina, archivo cargado) no corren a la vez ni
+en workers distintos: lo impide un índice único en la tabla job. El worker
+renueva el job cada NOMINA_JOB_LATIDO s; uno sin latido en NOMINA_JOB_VENCE s
+(p. ej. de un contenedor que ya no existe) suelta su clave, y quien la espera
+se rinde tras NOMINA_JOB_ESPERA_MAX s.
+
+Los hooks usan la app que gunicorn ya cargó (server.app.wsgi()), así que
+sirven igual con otra fábrica en la línea de comandos.
+
+Todo se ajusta con variables de entorno NOMINA_*; la base, como siempre, con
+NOMINA_DB. Con varios workers conviene NOMINA_PAGINAS_DIR para que compartan
+el cache de páginas.
+"""
+import os
+
+wsgi_app = 'app:create_app()'
+bind     = os.environ.get('NOMINA_BIND', '127.0.0.1:8000')
+
+worker_class = 'gthread'
+workers      = int(os.environ.get('NOMINA_WORKERS', min(4, os.cpu_count() or 1)))
+threads      = int(os.environ.get('NOMINA_HILOS', 8))
+preload_app  = True
+
+timeout          = int(os.environ.get('NOMINA_TIMEOUT', 300))     # exportaciones grandes
+graceful_timeout = int(os.environ.get('NOMINA_GRACEFUL', 120))    # deja terminar cargas y nómina (ver arriba)
+keepalive        = 5
+# Reciclar workers acota la memoria que pandas no devuelve al sistema
+max_requests        = int(os.environ.get('NOMINA_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get('NOMINA_ACCESSLOG', '-')
+errorlog  = '-'
+loglevel  = os.environ.get('NOMINA_LOGLEVEL', 'info')
+
+
+def on_starting(server):
+    """En el maestro, antes del primer fork: esquema al día y datos calientes."""
+    from app import db, migrar, directorio, asegurar_calendario, marcar_huerfanos
+    from app.calendario import _rango_datos
+    with server.app.wsgi().app_context():
+        aplicadas = migrar()
+        if aplicadas:
+            server.log.info("Migraciones aplicadas: %s", aplicadas)
+        huerfanos = marcar_huerfanos()
+        if huerfanos:
+            server.log.warning("%d trabajos interrumpidos marcados como error", huerfanos)
+        asegurar_calendario(*_rango_datos())
+        db.session.commit()
+        directorio.foto(forzar=True)
+        # Ninguna conexión abierta debe cruzar el fork
+        db.session.remove()
+        db.engine.dispose()
+
+
+def post_fork(server, worker):
+    """Conexiones propias del worker; si reemplaza a uno que murió, cierra sus jobs."""
+    from app import db, marcar_huerfanos
+    with server.app.wsgi().app_context():
+        db.engine.dispose(close=False)
+        huerfanos = marcar_huerfanos()
+        db.session.commit()
+        db.session.remove()
+        if huerfanos:
+            server.log.warning("%d trabajos interrumpidos marcados como error", huerfanos)
+
+
+def worker_exit(server, worker):
+    """Espera los trabajos en segundo plano del worker (cargas, nómina)."""
+    from app import detener_trabajos
+    detener_trabajos()
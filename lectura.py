@@ -0,0 +1,198 @@
+"""Lectura por bloques de los archivos de carga (.xlsx, .csv, .parquet).
+
+No depende de Flask ni de la base: los procesos lectores sólo importan este
+módulo. Cada bloque es un DataFrame cuyo índice es la fila de datos original
+(0 = primera fila bajo el encabezado), así «Fila N» sigue siendo índice + 2.
+"""
+import html
+import io
+import multiprocessing
+import os
+import queue
+import re
+import tempfile
+import zipfile
+
+import pandas as pd
+
+LOTE_LECTURA = 5000     # filas por bloque
+COLA_BLOQUES = 4        # bloques en vuelo por hoja antes de frenar al lector
+MIN_PROCESOS = 2 << 20  # bytes; con menos no compensa arrancar procesos lectores
+
+
+def formato(nombre):
+    """'xlsx', 'csv' o 'parquet' según la extensión del archivo subido."""
+    ext = os.path.splitext(nombre or '')[1].lower()
+    if ext in ('.csv', '.txt'):
+        return 'csv'
+    if ext in ('.parquet', '.pq'):
+        return 'parquet'
+    return 'xlsx'
+
+
+def leer_bloques(data, nombre, columnas=(), lote=LOTE_LECTURA, procesos=0, hojas_extra=False):
+    """Genera (hoja, DataFrame) con hasta `lote` filas cada uno.
+
+    En .xlsx se lee sólo la primera hoja, como pd.read_excel; con
+    `hojas_extra` también las otras cuyo encabezado trae todas las
+    `columnas`. hoja es None para la primera (y en csv/parquet).
+    Con `procesos` > 0 (y un libro de al menos MIN_PROCESOS bytes) cada hoja
+    se parsea en un proceso aparte y los bloques llegan mientras el llamador
+    escribe los anteriores.
+    """
+    fmt = formato(nombre)
+    if fmt == 'csv':
+        yield from ((None, df) for df in _bloques_csv(data, lote))
+    elif fmt == 'parquet':
+        yield from ((None, df) for df in _bloques_parquet(data, lote))
+    else:
+        yield from _bloques_xlsx(data, columnas, lote, procesos, hojas_extra)
+
+
+# —————————————————————————————————————————————————————————
+# CSV y Parquet
+# —————————————————————————————————————————————————————————
+def _bloques_csv(data, lote):
+    # Todo como texto: conserva ceros a la izquierda en Usuario; la validación convierte
+    primera = data[:4096].decode('utf-8-sig', errors='ignore').split('\n', 1)[0]
+    sep = ';' if primera.count(';') > primera.count(',') else ','
+    yield from pd.read_csv(io.BytesIO(data), sep=sep, dtype=str, encoding='utf-8-sig',
+                           chunksize=lote)
+
+
+def _bloques_parquet(data, lote):
+    import pyarrow.parquet as pq
+    desde = 0
+    for lote_arrow in pq.ParquetFile(io.BytesIO(data)).iter_batches(batch_size=lote):
+        df = lote_arrow.to_pandas()
+        df.index = pd.RangeIndex(desde, desde + len(df))
+        desde += len(df)
+        yield df
+
+
+# —————————————————————————————————————————————————————————
+# Excel: lector en streaming (calamine si está instalado, si no openpyxl)
+# —————————————————————————————————————————————————————————
+def _nombres_hojas(ruta):
+    """Nombres de hoja en orden, leídos de xl/workbook.xml sin cargar el libro."""
+    with zipfile.ZipFile(ruta) as z:
+        xml = z.read('xl/workbook.xml').decode('utf-8')
+    return [html.unescape(n) for n in re.findall(r'<(?:\w+:)?sheet\b[^>]*?\bname="([^"]*)"', xml)]
+
+
+def _filas_hoja(ruta, hoja):
+    try:
+        import python_calamine
+    except ImportError:
+        python_calamine = None
+    if python_calamine is not None:
+        yield from python_calamine.load_workbook(ruta).get_sheet_by_name(hoja).iter_rows()
+        return
+    from openpyxl import load_workbook
+    wb = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        yield from wb[hoja].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _celda(v):
+    # Igual que pd.read_excel: vacío → NaN y los float enteros pasan a int
+    if v is None or v == '':
+        return None
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def _bloques_hoja(ruta, hoja, lote, columnas=()):
+    """Bloques de una hoja; nada si le falta alguna de `columnas`."""
+    filas = _filas_hoja(ruta, hoja)
+    encabezado = next(filas, None)
+    if encabezado is None:
+        return
+    nombres = [str(c) if c not in (None, '') else f"Unnamed: {j}" for j, c in enumerate(encabezado)]
+    if set(columnas) - set(nombres):
+        return
+    buf, idx, n = [], [], 0
+    for fila in filas:
+        valores = [_celda(v) for v in fila]
+        if any(v is not None for v in valores):
+            buf.append((valores + [None]*len(nombres))[:len(nombres)])
+            idx.append(n)
+        n += 1
+        if len(buf) >= lote:
+            yield pd.DataFrame(buf, columns=nombres, index=idx)
+            buf, idx = [], []
+    if buf or n == 0:
+        yield pd.DataFrame(buf, columns=nombres, index=idx)
+
+
+def _lector_hoja(ruta, hoja, lote, columnas, cola):
+    """Cuerpo del proceso lector: manda ('bloque', df)… y al final ('fin', None)."""
+    try:
+        for df in _bloques_hoja(ruta, hoja, lote, columnas):
+            cola.put(('bloque', df))
+        cola.put(('fin', None))
+    except Exception as ex:
+        cola.put(('error', f"{type(ex).__name__}: {ex}"))
+
+
+def _bloques_xlsx(data, columnas, lote, procesos, hojas_extra):
+    fd, ruta = tempfile.mkstemp(suffix='.xlsx')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    try:
+        hojas = _nombres_hojas(ruta)
+        if not hojas_extra:
+            hojas = hojas[:1]
+        if procesos > 0 and len(data) >= MIN_PROCESOS:
+            yield from _bloques_xlsx_procesos(ruta, hojas, columnas, lote, procesos)
+        else:
+            for i, hoja in enumerate(hojas):
+                for df in _bloques_hoja(ruta, hoja, lote, columnas if i else ()):
+                    yield (hoja if i else None), df
+    finally:
+        os.unlink(ruta)
+
+
+def _bloques_xlsx_procesos(ruta, hojas, columnas, lote, procesos):
+    """Un proceso por hoja (a lo sumo `procesos` a la vez); se entrega en orden."""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('forkserver')
+        ctx.set_forkserver_preload(['lectura'])      # pandas queda cargado en el servidor
+    else:
+        ctx = multiprocessing.get_context('spawn')
+    pendientes = list(enumerate(hojas))
+    activos = {}                                            # i -> (proceso, cola)
+
+    def lanzar():
+        while pendientes and len(activos) < procesos:
+            i, hoja = pendientes.pop(0)
+            cola = ctx.Queue(maxsize=COLA_BLOQUES)
+            p = ctx.Process(target=_lector_hoja, daemon=True,
+                            args=(ruta, hoja, lote, columnas if i else (), cola))
+            p.start()
+            activos[i] = (p, cola)
+
+    try:
+        for i, hoja in enumerate(hojas):
+            lanzar()
+            p, cola = activos[i]
+            while True:
+                try:
+                    tipo, valor = cola.get(timeout=1)
+                except queue.Empty:
+                    if p.exitcode not in (None, 0):
+                        raise RuntimeError(f"el lector de la hoja «{hoja}» terminó con código {p.exitcode}")
+                    continue
+                if tipo == 'error':
+                    raise ValueError(f"hoja «{hoja}»: {valor}")
+                if tipo == 'fin':
+                    break
+                yield (hoja if i else None), valor
+            p.join()
+            del activos[i]
+    finally:
+        for p, _ in activos.values():
+            p.terminate()
@@ -0,0 +1,154 @@
+"""Recibos de nómina en PDF (HTML → wkhtmltopdf vía pdfkit).
+
+Las funciones de conversión corren en un pool de procesos; como sólo
+importan este módulo, los procesos no cargan Flask ni la base. El cache es
+un directorio con archivos <hash>.html / <hash>.pdf: el hash cubre el
+contenido de la fila y la versión de la plantilla, así que un recibo que no
+cambió nunca se vuelve a generar. podar() lo mantiene bajo un tamaño
+máximo borrando lo que lleva más tiempo sin usarse.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from jinja2 import Environment
+
+VERSION_PLANTILLA = 1   # subirla al cambiar la plantilla invalida el cache
+
+PLANTILLA = Environment(autoescape=True).from_string("""\
+<section class="recibo">
+  <h2>Recibo de nómina</h2>
+  <table>
+    <tr><th>Usuario</th><td>{{ f.usuario }}</td><th>Periodo</th><td>{{ f.inicio }} — {{ f.fin }}</td></tr>
+    <tr><th>Nombre</th><td>{{ f.nombre }}</td><th>Puesto</th><td>{{ f.puesto or '' }}</td></tr>
+    <tr><th>Supervisor</th><td colspan="3">{{ f.supervisor or '' }}</td></tr>
+  </table>
+  <table class="montos">
+    <tr><th>Sueldo base</th><td>{{ '%.2f'|format(f.sueldo_base or 0) }}</td></tr>
+    <tr><th>Bonos</th><td>{{ '%.2f'|format(f.total_bonos or 0) }}</td></tr>
+    <tr><th>Deducciones</th><td>-{{ '%.2f'|format(f.total_deducciones or 0) }}</td></tr>
+    <tr class="neto"><th>Neto a pagar</th><td>{{ '%.2f'|format(f.neto or 0) }}</td></tr>
+  </table>
+</section>
+""")
+
+DOCUMENTO = """\
+<!DOCTYPE html>
+<html><head><meta charset="utf-8"><style>
+body {{ font-family: sans-serif; font-size: 11pt; }}
+.recibo {{ page-break-after: always; }}
+.recibo:last-child {{ page-break-after: auto; }}
+table {{ width: 100%; border-collapse: collapse; margin-bottom: 1em; }}
+th, td {{ border: 1px solid #999; padding: 4px 6px; text-align: left; }}
+.montos td {{ text-align: right; }}
+.neto {{ font-weight: bold; }}
+</style></head><body>
+{}
+</body></html>
+"""
+
+OPCIONES_PDF = {'page-size': 'Letter', 'encoding': 'UTF-8', 'quiet': ''}
+
+
+def clave(fila):
+    """Hash del contenido de la fila (dict) junto con la versión de plantilla."""
+    texto = json.dumps([VERSION_PLANTILLA, fila], sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def clave_lote(claves):
+    """Hash de un PDF combinado a partir de los hashes de sus recibos."""
+    return hashlib.sha256(' '.join(claves).encode('ascii')).hexdigest()
+
+
+def wkhtmltopdf_disponible(ruta=None):
+    return bool(shutil.which(ruta or 'wkhtmltopdf'))
+
+
+def _html(filas, cache):
+    """Documento con un recibo por fila; cada fragmento se guarda en el cache."""
+    partes = []
+    for fila in filas:
+        ruta = os.path.join(cache, f"{clave(fila)}.html")
+        try:
+            with open(ruta, encoding='utf-8') as f:
+                partes.append(f.read())
+            usado(ruta)
+            continue
+        except FileNotFoundError:
+            pass                            # nuevo, o podar() lo acaba de borrar
+        html = PLANTILLA.render(f=fila)
+        _escribir(ruta, html.encode('utf-8'))
+        partes.append(html)
+    return DOCUMENTO.format('\n'.join(partes))
+
+
+def _escribir(ruta, datos):
+    # Escritura atómica: otro proceso nunca ve un archivo a medias
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(datos)
+    os.replace(tmp, ruta)
+
+
+def usado(ruta):
+    """Marca un archivo del cache como recién usado (podar() borra primero los viejos)."""
+    try:
+        os.utime(ruta)
+    except OSError:
+        pass
+
+
+def podar(cache, max_bytes):
+    """Borra los archivos menos usados hasta que el cache quede en max_bytes."""
+    archivos = []
+    for e in os.scandir(cache):
+        if e.name.endswith('.tmp'):
+            continue                        # escritura en curso
+        try:
+            st = e.stat()
+        except OSError:
+            continue                        # otro proceso lo borró
+        archivos.append((st.st_mtime, st.st_size, e.path))
+    total = sum(a[1] for a in archivos)
+    for _, tam, ruta in sorted(archivos):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(ruta)
+        except OSError:
+            pass
+        total -= tam
+
+
+def generar_pdf(filas, destino, cache, wkhtmltopdf=None):
+    """Convierte los recibos de `filas` en un solo PDF `destino` (en un proceso del pool)."""
+    import pdfkit
+    config = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf) if wkhtmltopdf else None
+    pdf = pdfkit.from_string(_html(filas, cache), False, options=OPCIONES_PDF,
+                             configuration=config)
+    _escribir(destino, pdf)
+    return destino
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool(procesos):
+    """Pool de procesos compartido para las conversiones (se crea al primer uso)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context('forkserver')
+            ctx.set_forkserver_preload(['recibos'])
+        else:
+            ctx = multiprocessing.get_context('spawn')
+        _pool = ProcessPoolExecutor(max_workers=procesos, mp_context=ctx)
+        return _pool
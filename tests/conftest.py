@@ -0,0 +1,59 @@
+"""Fixtures comunes: cada prueba usa su propia base SQLite temporal."""
+import csv
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def crear_app(tmp_path):
+    """Fábrica: crear_app(**config) → app migrada con la base en tmp_path."""
+    from app import create_app, db, migrar
+    creadas = []
+
+    def crear(**config):
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'nomina.db'}",
+            'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+            'ARCHIVO_DIR':   str(tmp_path / 'archivo'),
+            'RECIBOS_CACHE': str(tmp_path / 'recibos'),
+            'PAGINAS_DIR':   None,
+            'TESTING':       True,
+            **config,
+        })
+        with app.app_context():
+            migrar()
+        creadas.append(app)
+        return app
+
+    yield crear
+    for app in creadas:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def app(crear_app):
+    app = crear_app()
+    with app.app_context():
+        yield app
+
+
+def agregar_empleados(*usuarios, salario=100):
+    from app import db, Employee
+    for u in usuarios:
+        db.session.add(Employee(usuario=u, nombre=f"Empleado {u}", salario_diario=salario))
+    db.session.commit()
+
+
+def csv_bytes(encabezado, filas):
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(encabezado)
+    w.writerows(filas)
+    return buf.getvalue().encode('utf-8')
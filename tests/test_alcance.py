@@ -0,0 +1,37 @@
+"""Alcance por rol: un agente sólo ve sus propios importes en cualquier vista."""
+from datetime import date
+
+import pytest
+
+
+@pytest.fixture
+def cliente_agente(crear_app):
+    from app import db, directorio, generar_nomina, Bonus, Deduction, Employee
+    app = crear_app()
+    with app.app_context():
+        for u in ('a1', 'a2'):
+            db.session.add(Employee(usuario=u, nombre=f"Agente {u}", salario_diario=100))
+            db.session.add(Bonus(usuario=u, fecha=date(2024, 1, 2), tipo='Prod', monto=10))
+            db.session.add(Deduction(usuario=u, fecha=date(2024, 1, 3), tipo='Retardo', monto=5))
+        db.session.commit()
+        directorio.foto(forzar=True)
+        generar_nomina(date(2024, 1, 1), date(2024, 1, 15))
+    # Sin un contexto de app abierto: cada petición carga su propio current_user
+    cliente = app.test_client()
+    with cliente.session_transaction() as s:
+        s['_user_id'] = 'a1'
+    return cliente
+
+
+def test_la_exportacion_de_nomina_solo_trae_lo_propio(cliente_agente):
+    resp = cliente_agente.get('/payroll/export?inicio=2024-01-01&fin=2024-01-15&formato=csv')
+    lineas = resp.get_data(as_text=True).lstrip('﻿').splitlines()
+    assert [l.split(',')[0] for l in lineas] == ['Usuario', 'a1', 'Totales']
+    assert lineas[-1] == 'Totales,,0.00,10.00,5.00,5.00'
+
+
+@pytest.mark.parametrize('url', ['/bonuses', '/bonuses/filter', '/deductions',
+                                 '/deductions/filter?start_date=2024-01-01'])
+def test_bonos_y_deducciones_solo_del_agente(cliente_agente, url):
+    resp = cliente_agente.get(url + ('&' if '?' in url else '?') + 'formato=json')
+    assert {r['usuario'] for r in resp.get_json()['registros']} == {'a1'}
@@ -0,0 +1,96 @@
+"""calendar_dim: la nómina nunca pierde días de asistencia por el calendario."""
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from conftest import agregar_empleados
+
+QUINCENA = (date(2024, 1, 1), date(2024, 1, 15))
+
+
+def _asistencia_quincena():
+    from app import db, Attendance
+    agregar_empleados('c1', salario=100)
+    for d in range(15):
+        db.session.add(Attendance(usuario='c1', fecha=QUINCENA[0] + timedelta(days=d), estado='A'))
+    db.session.commit()
+
+
+def _sueldo_base():
+    from app import db, Payroll, generar_nomina
+    generar_nomina(*QUINCENA)
+    return db.session.query(Payroll.sueldo_base).filter_by(usuario='c1').scalar()
+
+
+def test_calendario_recreado_se_vuelve_a_llenar(app):
+    from app import db, migrar, Calendario
+    _asistencia_quincena()
+    for _ in range(2):                         # la 2.ª corrida ya encuentra el calendario lleno
+        assert _sueldo_base() == Decimal('1500.00')
+
+    Calendario.__table__.drop(db.engine)
+    migrar()                                   # create_all la recrea vacía
+    assert not db.session.query(Calendario).count()
+    assert _sueldo_base() == Decimal('1500.00')
+
+
+def test_calendario_vaciado_bajo_la_misma_base_se_vuelve_a_llenar(app):
+    from app import db, Calendario
+    _asistencia_quincena()
+    for _ in range(2):
+        assert _sueldo_base() == Decimal('1500.00')
+
+    db.session.query(Calendario).filter(Calendario.fecha == date(2024, 1, 7)).delete()
+    db.session.commit()
+    assert _sueldo_base() == Decimal('1500.00')
+
+
+def test_un_dia_sin_calendario_es_un_error(app, monkeypatch):
+    from app import calendario as modulo
+    from app import db, Calendario
+    _asistencia_quincena()
+    modulo.asegurar_calendario(*QUINCENA)
+    db.session.query(Calendario).filter(Calendario.fecha == date(2024, 1, 7)).delete()
+    db.session.commit()
+    monkeypatch.setattr(modulo, 'asegurar_calendario', lambda desde, hasta: None)
+
+    with pytest.raises(RuntimeError, match='calendar_dim'):
+        modulo.agregados_asistencia(*QUINCENA)
+
+
+def _cliente(app):
+    cliente = app.test_client()
+    with cliente.session_transaction() as s:
+        s['_user_id'] = 'admin'
+    return cliente
+
+
+@pytest.mark.parametrize('url', [
+    '/attendance/filter?formato=json&start_date=9999-12-30&end_date=9999-12-31',
+    '/attendance/filter?formato=json&start_date=2024-01-15&end_date=2024-01-01',
+    '/attendance/filter?formato=json&start_date=2024-01-01&end_date=2026-01-01',
+    '/api/v1/attendance/weekly?inicio=9999-12-30&fin=9999-12-31',
+])
+def test_las_vistas_de_lectura_no_amplian_el_calendario(app, url):
+    from app import db, asegurar_calendario, Calendario
+    asegurar_calendario(date(2024, 1, 1), date(2025, 12, 31))
+    db.session.commit()
+    dias = db.session.query(Calendario).count()
+
+    resp = _cliente(app).get(url)
+
+    assert resp.status_code == 400
+    assert 'error' in resp.get_json()
+    assert db.session.query(Calendario).count() == dias
+
+
+def test_la_matriz_fuera_del_calendario_avisa_y_vuelve_al_filtro(app):
+    resp = _cliente(app).get('/attendance/filter?start_date=9999-12-30&end_date=9999-12-31')
+    assert resp.status_code == 302
+
+
+def test_fin_de_mes_en_el_ultimo_diciembre():
+    from app.resumen import _fin_mes
+    assert _fin_mes(date(9999, 12, 5)) == date(9999, 12, 31)
+    assert _fin_mes(date(2024, 2, 10)) == date(2024, 2, 29)
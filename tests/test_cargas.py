@@ -0,0 +1,113 @@
+"""Cargas masivas de asistencia, bonos y deducciones (procesar_archivo)."""
+import io
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import agregar_empleados, csv_bytes
+
+ENC_ASISTENCIA = ['Usuario', 'Fecha', 'Estado', 'SUP', 'CARTERA']
+
+
+def _asistencia(usuarios, dias, estado):
+    inicio = date(2024, 1, 1)
+    return [[u, (inicio + timedelta(days=d)).isoformat(), estado, 'sup', 'NORTE']
+            for d in range(dias) for u in usuarios]
+
+
+def _xlsx(hojas):
+    import xlsxwriter
+    buf = io.BytesIO()
+    wb = xlsxwriter.Workbook(buf, {'in_memory': True})
+    for nombre, filas in hojas.items():
+        ws = wb.add_worksheet(nombre)
+        for i, fila in enumerate([ENC_ASISTENCIA] + filas):
+            ws.write_row(i, 0, fila)
+    wb.close()
+    return buf.getvalue()
+
+
+def test_recarga_de_asistencia_reemplaza_en_todos_los_bloques(crear_app):
+    from app import db, Attendance, procesar_archivo
+    app = crear_app(LOTE_ESCRITURA=7)
+    with app.app_context():
+        usuarios = ['a1', 'a2', 'a3']
+        agregar_empleados(*usuarios)
+        procesar_archivo('asistencia', csv_bytes(ENC_ASISTENCIA, _asistencia(usuarios, 10, 'A')),
+                         archivo='asistencia.csv')
+        mensajes = procesar_archivo('asistencia',
+                                    csv_bytes(ENC_ASISTENCIA, _asistencia(usuarios, 10, 'F')),
+                                    archivo='asistencia.csv')
+
+        assert ("Se reemplazaron 30 registros de asistencia.", 'info') in mensajes
+        assert not any('añadieron' in t for t, _ in mensajes)
+        assert db.session.query(Attendance).count() == 30
+        assert {e for (e,) in db.session.query(Attendance.estado)} == {'F'}
+
+
+@pytest.mark.parametrize('hojas_extra, esperadas', [(False, 3), (True, 6)])
+def test_xlsx_lee_sólo_la_primera_hoja_por_defecto(crear_app, hojas_extra, esperadas):
+    from app import db, Attendance, procesar_archivo
+    data = _xlsx({'Enero': _asistencia(['a1'], 3, 'A'), 'Extra': _asistencia(['a2'], 3, 'A')})
+    app = crear_app(HOJAS_EXTRA=hojas_extra)
+    with app.app_context():
+        agregar_empleados('a1', 'a2')
+        procesar_archivo('asistencia', data, archivo='asistencia.xlsx')
+        assert db.session.query(Attendance).count() == esperadas
+
+
+ENC_BONOS = ['Usuario', 'Fecha', 'Tipo', 'Monto', 'Observación']
+
+
+def test_el_mismo_archivo_de_bonos_no_se_procesa_dos_veces(app):
+    from app import db, Bonus, procesar_archivo
+    agregar_empleados('b1')
+    data = csv_bytes(ENC_BONOS, [['b1', '2024-01-02', 'Prod', '100', ''],
+                                 ['b1', '2024-01-03', 'Prod', '50.5', 'extra']])
+    procesar_archivo('bonos', data, archivo='bonos.csv')
+    mensajes = procesar_archivo('bonos', data, archivo='otro_nombre.csv')
+
+    assert len(mensajes) == 1 and 'ya se cargó' in mensajes[0][0]
+    assert db.session.query(Bonus).count() == 2
+
+
+def test_filas_ya_cargadas_o_repetidas_se_omiten(crear_app):
+    from app import db, Deduction, procesar_archivo
+    app = crear_app(LOTE_ESCRITURA=2)
+    with app.app_context():
+        agregar_empleados('d1', 'd2')
+        procesar_archivo('deducciones', csv_bytes(ENC_BONOS, [
+            ['d1', '2024-01-02', 'Retardo', '10', ''],
+            ['d2', '2024-01-02', 'Retardo', '10', '']]), archivo='a.csv')
+        # Otro archivo: una fila ya cargada, otra repetida en el propio archivo
+        # (en bloques distintos) y una nueva con el mismo día y otro monto
+        mensajes = procesar_archivo('deducciones', csv_bytes(ENC_BONOS, [
+            ['d1', '2024-01-02', 'Retardo', '10.00', ''],
+            ['d1', '2024-01-05', 'Falta', '300', ''],
+            ['d2', '2024-01-02', 'Retardo', '12', ''],
+            ['d1', '2024-01-05', 'Falta', '300', '']]), archivo='b.csv')
+
+        assert ("Se añadieron 2 registros de «deducciones».", 'success') in mensajes
+        assert ("Se omitieron 2 registros que ya estaban cargados.", 'info') in mensajes
+        assert db.session.query(Deduction).count() == 4
+
+
+@pytest.mark.parametrize('url', ['/bonuses?formato=json', '/deductions/filter?formato=json',
+                                 '/api/v1/history/bonus?desde=2024-01-01&hasta=2024-01-31'])
+def test_la_huella_no_sale_en_json(crear_app, url):
+    import json
+    from app import db, Bonus, Deduction
+    app = crear_app()
+    with app.app_context():
+        agregar_empleados('h1')
+        db.session.add(Bonus(usuario='h1', fecha=date(2024, 1, 2), tipo='Prod', monto=10))
+        db.session.add(Deduction(usuario='h1', fecha=date(2024, 1, 2), tipo='Falta', monto=10))
+        db.session.commit()
+    cliente = app.test_client()
+    with cliente.session_transaction() as s:
+        s['_user_id'] = 'admin'
+
+    cuerpo = cliente.get(url).get_data(as_text=True)
+    filas = (json.loads(cuerpo)['registros'] if 'formato' in url
+             else [json.loads(l) for l in cuerpo.splitlines() if l])
+    assert filas and all('huella' not in f for f in filas)
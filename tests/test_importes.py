@@ -0,0 +1,51 @@
+"""Importes en centavos: el mismo redondeo por cualquier camino de escritura."""
+from datetime import date
+from decimal import Decimal
+
+from conftest import agregar_empleados, csv_bytes
+
+ENC_BONOS = ['Usuario', 'Fecha', 'Tipo', 'Monto', 'Observación']
+
+
+def test_carga_masiva_redondea_como_el_orm(app):
+    from app import db, Bonus, procesar_archivo
+    agregar_empleados('e1')
+    db.session.add(Bonus(usuario='e1', fecha=date(2024, 1, 2), tipo='Prod',
+                         monto=Decimal('10.125'), observacion=''))
+    db.session.commit()
+
+    filas = [['e1', '2024-01-02', 'Prod', '10.125', ''],      # ya está, por el ORM
+             ['e1', '2024-01-03', 'Prod', '0.005', ''],
+             ['e1', '2024-01-04', 'Prod', '2.675', '']]
+    mensajes = procesar_archivo('bonos', csv_bytes(ENC_BONOS, filas), archivo='bonos.csv')
+
+    assert ("Se omitieron 1 registros que ya estaban cargados.", 'info') in mensajes
+    montos = dict(db.session.query(Bonus.fecha, Bonus.monto))
+    assert montos == {date(2024, 1, 2): Decimal('10.13'), date(2024, 1, 3): Decimal('0.01'),
+                      date(2024, 1, 4): Decimal('2.68')}
+
+
+def test_carga_masiva_rechaza_montos_que_no_son_importes(app):
+    from app import db, Bonus, procesar_archivo
+    agregar_empleados('e1')
+    filas = [['e1', '2024-01-02', 'Prod', 'diez', ''], ['e1', '2024-01-03', 'Prod', 'inf', '']]
+    mensajes = procesar_archivo('bonos', csv_bytes(ENC_BONOS, filas), archivo='bonos.csv')
+
+    assert ("Fila 2: monto inválido «diez»", 'warning') in mensajes
+    assert ("Fila 3: monto inválido «inf»", 'warning') in mensajes
+    assert not db.session.query(Bonus).count()
+
+
+def test_totales_de_la_exportacion_son_importes_aunque_todo_sea_cero(app):
+    from app import generar_nomina
+    agregar_empleados('e1')
+    generar_nomina(date(2024, 1, 1), date(2024, 1, 15))
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as s:
+        s['_user_id'] = 'admin'
+    resp = cliente.get('/payroll/export?inicio=2024-01-01&fin=2024-01-15&formato=csv')
+
+    assert resp.status_code == 200
+    assert resp.get_data(as_text=True).splitlines()[-1].lstrip('﻿') == \
+        'Totales,,0.00,0.00,0.00,0.00'
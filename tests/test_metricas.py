@@ -0,0 +1,19 @@
+"""Instrumentación (NOMINA_INSTRUMENTACION): las sentencias que fallan no dejan rastro."""
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+
+def test_sentencias_que_fallan_no_acumulan_tiempos(crear_app):
+    from app import db, Employee
+    app = crear_app(INSTRUMENTACION=True)
+    with app.app_context():
+        db.session.add(Employee(usuario='m1', nombre='Uno', salario_diario=1))
+        db.session.commit()
+        for _ in range(5):
+            with pytest.raises(IntegrityError):
+                db.session.execute(db.insert(Employee).values(
+                    usuario='m1', nombre='Otra vez', salario_diario=1))
+            db.session.rollback()
+        with db.engine.connect() as con:
+            con.execute(db.text('SELECT 1'))
+            assert all(not v for k, v in con.info.items() if k.startswith('_t'))
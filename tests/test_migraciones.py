@@ -0,0 +1,79 @@
+"""Migraciones sobre una foco.db con el esquema original (anterior a schema_version)."""
+import sqlite3
+from decimal import Decimal
+
+ESQUEMA_ORIGINAL = """
+CREATE TABLE employee (
+    usuario VARCHAR(50) NOT NULL, nombre VARCHAR(100) NOT NULL,
+    salario_diario FLOAT NOT NULL, puesto VARCHAR(100), password_hash VARCHAR(128),
+    is_admin BOOLEAN, is_supervisor BOOLEAN, supervisor_id VARCHAR(50),
+    PRIMARY KEY (usuario), FOREIGN KEY(supervisor_id) REFERENCES employee (usuario));
+CREATE TABLE attendance (
+    id INTEGER NOT NULL, usuario VARCHAR(50) NOT NULL, fecha DATE NOT NULL,
+    estado VARCHAR(20) NOT NULL, supervisor VARCHAR(100), cartera VARCHAR(100),
+    PRIMARY KEY (id), CONSTRAINT uix_usuario_fecha UNIQUE (usuario, fecha),
+    FOREIGN KEY(usuario) REFERENCES employee (usuario));
+CREATE TABLE deduction (
+    id INTEGER NOT NULL, usuario VARCHAR(50), fecha DATE NOT NULL, tipo VARCHAR(50) NOT NULL,
+    monto FLOAT NOT NULL, observacion VARCHAR(200),
+    PRIMARY KEY (id), FOREIGN KEY(usuario) REFERENCES employee (usuario));
+CREATE TABLE bonus (
+    id INTEGER NOT NULL, usuario VARCHAR(50), fecha DATE NOT NULL, tipo VARCHAR(50) NOT NULL,
+    monto FLOAT NOT NULL, observacion VARCHAR(200),
+    PRIMARY KEY (id), FOREIGN KEY(usuario) REFERENCES employee (usuario));
+CREATE TABLE payroll (
+    id INTEGER NOT NULL, usuario VARCHAR(50), inicio DATE NOT NULL, fin DATE NOT NULL,
+    sueldo_base FLOAT, total_bonos FLOAT, total_deducciones FLOAT, neto FLOAT,
+    PRIMARY KEY (id), FOREIGN KEY(usuario) REFERENCES employee (usuario));
+
+INSERT INTO employee (usuario, nombre, salario_diario) VALUES ('e1', 'Uno', 350.5);
+INSERT INTO attendance (usuario, fecha, estado) VALUES ('e1', '2024-01-02', 'A');
+INSERT INTO bonus (usuario, fecha, tipo, monto, observacion) VALUES ('e1', '2024-01-02', 'Prod', 100.1, '');
+INSERT INTO deduction (usuario, fecha, tipo, monto, observacion) VALUES ('e1', '2024-01-03', 'Retardo', 20.25, NULL);
+INSERT INTO payroll (usuario, inicio, fin, sueldo_base, total_bonos, total_deducciones, neto)
+    VALUES ('e1', '2024-01-01', '2024-01-15', 350.5, 100.1, 20.25, 430.35);
+"""
+
+
+def test_migra_una_base_con_el_esquema_original(tmp_path, crear_app):
+    with sqlite3.connect(tmp_path / 'nomina.db') as con:
+        con.executescript(ESQUEMA_ORIGINAL)
+
+    app = crear_app()          # migrar() corre al crearla
+
+    from app import (db, migrar, huella_movimiento, MIGRACIONES, SchemaVersion,
+                     Employee, Bonus, Deduction, Payroll, Calendario)
+    with app.app_context():
+        assert {v for (v,) in db.session.query(SchemaVersion.version)} == \
+               {m[0] for m in MIGRACIONES}
+        assert migrar() == []
+
+        indices = {i['name'] for t in ('bonus', 'deduction', 'payroll', 'attendance')
+                   for i in db.inspect(db.engine).get_indexes(t)}
+        assert {'ix_bonus_fecha_huella', 'ix_deduction_fecha_huella',
+                'uix_payroll_usuario_periodo', 'ix_attendance_fecha_id'} <= indices
+
+        assert db.session.get(Employee, 'e1').salario_diario == Decimal('350.50')
+        bono = db.session.query(Bonus).one()
+        assert bono.monto == Decimal('100.10')
+        assert bono.huella == huella_movimiento('e1', bono.fecha, 'Prod', 10010, '')
+        assert db.session.query(Deduction).one().huella is not None
+        assert db.session.query(Payroll).one().neto == Decimal('430.35')
+        assert db.session.query(Calendario).count() >= 31
+
+
+def test_nominas_repetidas_no_impiden_el_indice_unico(tmp_path, crear_app):
+    with sqlite3.connect(tmp_path / 'nomina.db') as con:
+        con.executescript(ESQUEMA_ORIGINAL)
+        # Lo que dejaban dos create_payroll simultáneos sobre el mismo periodo
+        con.execute("INSERT INTO payroll (usuario, inicio, fin, sueldo_base, total_bonos, "
+                    "total_deducciones, neto) VALUES ('e1', '2024-01-01', '2024-01-15', "
+                    "350.5, 100.1, 20.25, 430.4)")
+
+    app = crear_app()
+
+    from app import db, MIGRACIONES, SchemaVersion, Payroll
+    with app.app_context():
+        assert {v for (v,) in db.session.query(SchemaVersion.version)} == \
+               {m[0] for m in MIGRACIONES}
+        assert db.session.query(Payroll).one().neto == Decimal('430.40')
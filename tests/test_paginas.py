@@ -0,0 +1,71 @@
+"""Cache de páginas: escrituras concurrentes y fallas que no deben llegar al usuario."""
+import threading
+from datetime import date
+
+from jinja2 import DictLoader
+
+from conftest import agregar_empleados
+
+
+def test_hilos_que_guardan_la_misma_clave_en_disco_no_chocan(tmp_path):
+    from app import CachePaginas
+    cache = CachePaginas(max_mb=1, directorio=str(tmp_path / 'paginas'))
+    errores = []
+
+    def guardar(n):
+        try:
+            for i in range(200):
+                cache.guardar(('vista',), ('payroll',), 'text/html', b'x' * (n + i))
+        except Exception as ex:
+            errores.append(ex)
+
+    hilos = [threading.Thread(target=guardar, args=(n,)) for n in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    assert errores == []
+    assert [p.name for p in (tmp_path / 'paginas').iterdir() if p.name.startswith('.tmp-')] == []
+    cache._datos.clear()                      # que la lectura venga del disco
+    assert cache.obtener(('vista',))[0] == 'text/html'
+
+
+def test_un_cache_que_no_se_puede_escribir_no_falla_la_solicitud(app, monkeypatch):
+    import app as modulo
+    from app import generar_nomina
+    agregar_empleados('p1')
+    generar_nomina(date(2024, 1, 1), date(2024, 1, 15))
+
+    def sin_disco(*args):
+        raise OSError(28, 'No space left on device')
+    monkeypatch.setattr(modulo.paginas._get_current_object(), 'guardar', sin_disco)
+    app.jinja_loader = DictLoader({'payroll_list.html': 'nómina'})
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as s:
+        s['_user_id'] = 'admin'
+    resp = cliente.get('/payroll?inicio=2024-01-01&fin=2024-01-15')
+    assert resp.status_code == 200
+
+
+def test_dos_administradores_no_comparten_la_pagina(crear_app):
+    from app import db, directorio, generar_nomina, Employee
+    app = crear_app()
+    with app.app_context():
+        db.session.add(Employee(usuario='e1', nombre='Jefa', salario_diario=100, is_admin=True))
+        db.session.commit()
+        directorio.foto(forzar=True)
+        generar_nomina(date(2024, 1, 1), date(2024, 1, 15))
+    # Sin un contexto de app abierto: cada petición carga su propio current_user
+    app.jinja_loader = DictLoader({'payroll_list.html': '{{ current_user.get_id() }}'})
+
+    vistas = {}
+    for usuario in ('admin', 'e1'):
+        cliente = app.test_client()
+        with cliente.session_transaction() as s:
+            s['_user_id'] = usuario
+        resp = cliente.get('/payroll?inicio=2024-01-01&fin=2024-01-15')
+        vistas[usuario] = (resp.headers['X-Cache'], resp.get_data(as_text=True))
+
+    assert vistas == {'admin': ('miss', 'admin'), 'e1': ('miss', 'e1')}
@@ -0,0 +1,47 @@
+"""Cierre de periodos: ninguna corrida de nómina debe pisar un periodo cerrado."""
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import agregar_empleados
+
+ENERO = (date(2024, 1, 1), date(2024, 1, 31))
+QUINCENA = (date(2024, 1, 1), date(2024, 1, 15))
+
+
+@pytest.fixture
+def quincena_podada(app):
+    """Asistencia de enero, nómina de la 1.ª quincena cerrada y podada."""
+    from app import db, Attendance, generar_nomina, cerrar_periodo
+    agregar_empleados('e1')
+    for d in range(31):
+        db.session.add(Attendance(usuario='e1', fecha=ENERO[0] + timedelta(days=d), estado='A'))
+    db.session.commit()
+    generar_nomina(*QUINCENA)
+    cerrar_periodo(*QUINCENA, podar=True)
+    return app
+
+
+def test_generar_nomina_rechaza_un_rango_que_se_solapa_con_un_cierre(quincena_podada):
+    from app import db, Payroll, generar_nomina
+    with pytest.raises(ValueError, match='se solapa'):
+        generar_nomina(*ENERO)
+    assert not db.session.query(Payroll).filter_by(inicio=ENERO[0], fin=ENERO[1]).count()
+
+
+def test_generar_nomina_rechaza_el_mismo_periodo_cerrado(quincena_podada):
+    from app import generar_nomina
+    with pytest.raises(ValueError):
+        generar_nomina(*QUINCENA)
+
+
+def test_nomina_lote_omite_los_rangos_que_se_solapan(quincena_podada):
+    from app import db, Payroll, nomina_lote
+    avisos = []
+    segunda = (date(2024, 1, 16), date(2024, 1, 31))
+    stats = nomina_lote([ENERO, segunda], informar=avisos.append)
+
+    assert stats['periodos'] == 1
+    assert any(a.startswith(f"Se omite {ENERO[0]}") for a in avisos)
+    assert not db.session.query(Payroll).filter_by(inicio=ENERO[0], fin=ENERO[1]).count()
+    assert db.session.query(Payroll).filter_by(inicio=segunda[0], fin=segunda[1]).count() == 1
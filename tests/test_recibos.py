@@ -0,0 +1,33 @@
+"""Cache de recibos: acotado en disco, sin perder un recibo que se está usando."""
+import os
+
+import recibos
+
+
+def _archivo(ruta, tam, mtime):
+    ruta.write_bytes(b'x' * tam)
+    os.utime(ruta, (mtime, mtime))
+
+
+def test_podar_borra_primero_lo_menos_usado(tmp_path):
+    _archivo(tmp_path / 'viejo.pdf', 400, 1000)
+    _archivo(tmp_path / 'medio.html', 400, 2000)
+    _archivo(tmp_path / 'nuevo.pdf', 400, 3000)
+    _archivo(tmp_path / 'nuevo.pdf.123.tmp', 400, 0)      # escritura en curso
+    recibos.usado(str(tmp_path / 'viejo.pdf'))
+
+    recibos.podar(str(tmp_path), 900)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == \
+        ['nuevo.pdf', 'nuevo.pdf.123.tmp', 'viejo.pdf']
+
+
+def test_un_fragmento_podado_se_vuelve_a_generar(tmp_path):
+    fila = {'usuario': 'r1', 'nombre': 'Uno', 'inicio': '2024-01-01', 'fin': '2024-01-15',
+            'neto': 10}
+    primero = recibos._html([fila], str(tmp_path))
+    recibos.podar(str(tmp_path), 0)
+    assert not list(tmp_path.iterdir())
+
+    assert recibos._html([fila], str(tmp_path)) == primero
+    assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,146 @@
+"""Trabajos en segundo plano: reclamo de la clave en la base y jobs huérfanos."""
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def _pid_muerto():
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proc.wait()
+    return proc.pid
+
+
+def _job(estado, clave=None, pid=None, equipo=None, latido=None):
+    from app import db, Job
+    from uuid import uuid4
+    job = Job(id=uuid4().hex, tipo='prueba', clave=clave, estado=estado,
+              proceso=f"{equipo or socket.gethostname()}:{pid or os.getpid()}",
+              latido=latido or datetime.utcnow())
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def test_jobs_de_un_worker_que_murio_pasan_a_error(app):
+    from app import db, Job, marcar_huerfanos
+    muerto = _pid_muerto()
+    huerfano = _job('ejecutando', 'nomina:x', pid=muerto)
+    en_cola = _job('pendiente', pid=muerto)
+    vivo = _job('ejecutando', 'nomina:y')
+
+    assert marcar_huerfanos() == 2
+    db.session.commit()
+
+    assert db.session.get(Job, huerfano).estado == 'error'
+    assert db.session.get(Job, en_cola).estado == 'error'
+    assert db.session.get(Job, vivo).estado == 'ejecutando'
+
+
+def test_la_base_no_deja_ejecutar_dos_jobs_con_la_misma_clave(app):
+    from app import db, Job
+    from app.trabajos import _tomar_job
+    primero = _job('pendiente', 'nomina:x')
+    segundo = _job('pendiente', 'nomina:x')
+    otro = _job('pendiente', 'nomina:y')
+
+    assert _tomar_job(primero)
+    assert not _tomar_job(segundo)
+    assert _tomar_job(otro)
+
+    db.session.get(Job, primero).estado = 'terminado'
+    db.session.commit()
+    assert _tomar_job(segundo)
+
+
+@pytest.mark.parametrize('dueño_vivo', [True, False])
+def test_un_job_espera_la_clave_que_tiene_otro_worker(crear_app, dueño_vivo):
+    from app import db, Job
+    from app.trabajos import _ejecutar_job
+    app = crear_app(JOB_ESPERA=0.05)
+    with app.app_context():
+        # Otro worker (otro pid) tiene la clave; este proceso no lo ve en _claves
+        ajeno = _job('ejecutando', 'nomina:x', pid=os.getppid() if dueño_vivo else _pid_muerto())
+        propio = _job('pendiente', 'nomina:x')
+    hilo = threading.Thread(target=_ejecutar_job,
+                            args=(app, propio, 'nomina:x', lambda avance: ['listo'], ()))
+    hilo.start()
+    time.sleep(0.3)
+
+    with app.app_context():
+        if dueño_vivo:
+            assert db.session.get(Job, propio).estado == 'pendiente'
+            db.session.get(Job, ajeno).estado = 'terminado'
+            db.session.commit()
+        hilo.join(5)
+        db.session.expire_all()
+        assert db.session.get(Job, propio).estado == 'terminado'
+        assert db.session.get(Job, ajeno).estado == ('terminado' if dueño_vivo else 'error')
+
+
+def test_un_reclamo_sin_latido_de_otro_equipo_vence(crear_app):
+    from app import db, Job
+    from app.trabajos import _ejecutar_job
+    app = crear_app(JOB_ESPERA=0.05, JOB_VENCE=60)
+    with app.app_context():
+        # Un contenedor que ya no existe: otro nombre de equipo y un pid cualquiera
+        ajeno = _job('ejecutando', 'nomina:x', pid=1, equipo='contenedor-viejo',
+                     latido=datetime.utcnow() - timedelta(minutes=5))
+        propio = _job('pendiente', 'nomina:x')
+
+        _ejecutar_job(app, propio, 'nomina:x', lambda avance: ['listo'], ())
+
+        db.session.expire_all()
+        assert db.session.get(Job, ajeno).estado == 'error'
+        assert db.session.get(Job, propio).estado == 'terminado'
+
+
+def test_esperar_la_clave_tiene_limite(crear_app):
+    from app import db, Job
+    from app.trabajos import _ejecutar_job
+    app = crear_app(JOB_ESPERA=0.05, JOB_ESPERA_MAX=0.2)
+    with app.app_context():
+        ajeno = _job('ejecutando', 'nomina:x', pid=1, equipo='otro-equipo')
+        propio = _job('pendiente', 'nomina:x')
+
+        _ejecutar_job(app, propio, 'nomina:x', lambda avance: ['listo'], ())
+
+        db.session.expire_all()
+        job = db.session.get(Job, propio)
+        assert job.estado == 'error' and 'nomina:x' in job.error
+        assert db.session.get(Job, ajeno).estado == 'ejecutando'
+
+
+def test_el_avance_se_ve_desde_otro_worker(crear_app):
+    from app.trabajos import _ejecutar_job
+    app = crear_app(JOB_LATIDO=0.05)
+    en_curso, seguir = threading.Event(), threading.Event()
+
+    def trabajo(avance):
+        avance(3, 10)
+        en_curso.set()
+        seguir.wait(5)
+        return []
+
+    with app.app_context():
+        job_id = _job('pendiente', 'carga:x')
+    hilo = threading.Thread(target=_ejecutar_job, args=(app, job_id, 'carga:x', trabajo, ()))
+    hilo.start()
+    en_curso.wait(5)
+    time.sleep(0.3)
+
+    cliente = app.test_client()            # lee la base, no la memoria de quien lo ejecuta
+    with cliente.session_transaction() as s:
+        s['_user_id'] = 'admin'
+    try:
+        datos = cliente.get(f'/jobs/{job_id}').get_json()
+        assert datos['estado'] == 'ejecutando'
+        assert datos['avance'] == {'hechos': 3, 'total': 10}
+    finally:
+        seguir.set()
+        hilo.join(5)